@@ -0,0 +1,130 @@
+'''
+Compares the wall time of different search configurations on the same
+problem instance.
+'''
+
+import cryptosmt
+from cryptanalysis import search, workspace, modelcache
+from parser import stpcommands
+
+import copy
+import time
+
+# Parameters which are changed for each configuration
+VARIANTS = {"regenerate" : {"incremental" : False, "modelcache" : None},
+            "incremental" : {"incremental" : True},
+            "linear" : {"strategy" : "linear"},
+            "binary" : {"strategy" : "binary"},
+            "galloping" : {"strategy" : "galloping"},
+            "descending" : {"strategy" : "descending"},
+            "parallel" : {"strategy" : "parallel"},
+            "bvplus" : {"weightencoding" : "bvplus"},
+            "seqcounter" : {"weightencoding" : "seqcounter"},
+            "totalizer" : {"weightencoding" : "totalizer"},
+            "modtotalizer" : {"weightencoding" : "modtotalizer"},
+            "ssbarray" : {"ssbencoding" : "array"},
+            "ssbcnf" : {"ssbencoding" : "cnf"},
+}
+
+
+def runbenchmark(params, variants):
+    """
+    Runs the search for each variant and returns the wall times. Every
+    variant starts without the models generated by the previous ones.
+    """
+    timings = []
+    for variant in variants:
+        variant_params = copy.deepcopy(params)
+        variant_params.update(VARIANTS[variant])
+        modelcache.clearModelCache()
+
+        print("=== {} ===".format(variant))
+        start_time = time.time()
+        cryptosmt.startsearch(variant_params)
+        timings.append((variant, time.time() - start_time))
+    return timings
+
+
+def getCNFSize(params):
+    """
+    Returns the number of variables and clauses of the CNF which STP
+    generates for the model with weight sweight.
+    """
+    cipher = cryptosmt.getCipher(params["cipher"])
+    stpcommands.setWeightEncoding(params["weightencoding"],
+                                  params["endweight"])
+    workspace.createWorkspace(cipher, params)
+    try:
+        stp_file = workspace.getWorkspaceFile(params, "size.stp")
+        cnf_file = search.writeCNF(search.createModel(cipher, params),
+                                   stp_file, params)
+        with open(cnf_file, "r") as input_file:
+            for line in input_file:
+                if line.startswith("p cnf"):
+                    return int(line.split()[2]), int(line.split()[3])
+    finally:
+        workspace.removeWorkspace(params)
+    return None
+
+
+def runcnfsizes(params, variants):
+    """
+    Prints the size of the CNF for each variant.
+    """
+    print("Variant".ljust(16) + "Variables".rjust(12) + "Clauses".rjust(12))
+    print("-" * 40)
+    for variant in variants:
+        variant_params = copy.deepcopy(params)
+        variant_params.update(VARIANTS[variant])
+        num_variables, num_clauses = getCNFSize(variant_params)
+        print(variant.ljust(16) + "{:12d}".format(num_variables) +
+              "{:12d}".format(num_clauses))
+    return
+
+
+def printtimings(params, timings):
+    """
+    Prints a table with the wall time of each variant.
+    """
+    print("")
+    print("{} - Rounds: {} Wordsize: {} Mode: {}".format(params["cipher"],
+                                                         params["rounds"],
+                                                         params["wordsize"],
+                                                         params["mode"]))
+    print("Variant".ljust(16) + "Time".rjust(12) + "Speedup".rjust(10))
+    print("-" * 38)
+    reference = timings[0][1]
+    for variant, duration in timings:
+        speedup = reference / duration if duration > 0 else float("inf")
+        print(variant.ljust(16) + "{:10.2f} s".format(duration) +
+              "{:9.2f}x".format(speedup))
+    return
+
+
+def main():
+    """
+    Parse the arguments and benchmark the selected variants. The first
+    variant is used as reference for the speedup.
+    """
+    parser = cryptosmt.getArgumentParser()
+    parser.add_argument('--variants', nargs='+', default=["regenerate",
+                                                          "incremental"],
+                        choices=sorted(VARIANTS),
+                        help="The configurations to compare.")
+    parser.add_argument('--cnfsize', action="store_true",
+                        help="Compare the size of the CNF for the weight\n"
+                             "sweight instead of the time of the search.")
+    args = parser.parse_args()
+    params = cryptosmt.loadparameters(args)
+
+    cryptosmt.checkenviroment(params)
+
+    if args.cnfsize:
+        runcnfsizes(params, args.variants)
+        return
+
+    printtimings(params, runbenchmark(params, args.variants))
+
+
+if __name__ == '__main__':
+    main()
@@ -49,7 +49,7 @@ class AsconCipher(AbstractCipher):
 
         assert (rate + capacity) == wordsize * sboxsize
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             stp_file.write("% Input File for STP\n% Ascon w={} rate={} "
                            "capacity={} round={}\n\n\n".format(wordsize,
                                                                rate, capacity,
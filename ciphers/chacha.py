@@ -44,7 +44,7 @@ class ChaChaCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             stp_file.write("% Input File for STP\n% Salsa w={}"
                            "rounds={}\n\n\n".format(wordsize, rounds))
 
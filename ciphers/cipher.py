@@ -16,7 +16,8 @@ class AbstractCipher(object, metaclass=ABCMeta):
     def createSTP(self, filename, cipherParameters):
         """
         Each cipher need to define how it creates an instance for the
-        SMT solver.
+        SMT solver. The instance is written to a file or a text stream,
+        see stpcommands.openModel.
         """
         pass
 
@@ -26,3 +27,54 @@ class AbstractCipher(object, metaclass=ABCMeta):
         Each cipher needs to specify the format it should be printed.
         """
         pass
+
+    def createCNF(self, parameters):
+        """
+        Ciphers which support the DIMACS backend return the model as a
+        cnfcommands.CNFModel. Returns None if this is not supported.
+        """
+        return None
+
+    def createModel(self, parameters):
+        """
+        Ciphers which describe their model with parser.modelir return it
+        here, which makes all backends available. Returns None if this is
+        not supported.
+        """
+        return None
+
+    def getRoundWeights(self, parameters):
+        """
+        Ciphers which support round bounds return a 16-bit expression for the
+        weight of each round. Returns None if this is not supported.
+        """
+        return None
+
+    def getRotationSymmetry(self, parameters):
+        """
+        Ciphers whose model is invariant under rotating the words return the
+        rotation as a dict with the keys
+            order: the number of distinct rotations
+            words: {prefix: (width, step)} for the rotated words, where each
+                   word is rotated to the left by step bits per rotation
+            inputs: the names of the words of the input difference
+        Returns None if the model is not invariant, see cryptanalysis.symmetry.
+        """
+        return None
+
+    def getSboxLayer(self, parameters):
+        """
+        Ciphers whose rounds consist of an S-box layer and a bit permutation
+        return (sbox, sboxes), where sboxes lists the state bits read by each
+        S-box, most significant bit first. Returns None if this is not
+        supported, see cryptanalysis.matsui.
+        """
+        return None
+
+    def getPermutation(self, parameters):
+        """
+        Ciphers which return the S-box layer return the bit permutation as a
+        list, where bit i of the output of the S-box layer is bit
+        permutation[i] of the input of the next round.
+        """
+        return None
@@ -64,7 +64,7 @@ class CraftCipherLinear(AbstractCipher):
             print("Only wordsize of 64-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% CRAFT w={} "
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -36,7 +36,7 @@ class FlyCipher(AbstractCipher):
             print("Only wordsize of 64-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% FLY w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
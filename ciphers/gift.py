@@ -15,6 +15,7 @@ class GiftCipher(AbstractCipher):
     """
 
     name = "gift"
+    sbox = [0x1, 0xa, 0x4, 0xc, 0x6, 0xf, 0x3, 0x9, 0x2, 0xd, 0xb, 0x7, 0x5, 0x0, 0x8, 0xe]
 
     def getFormatString(self):
         """
@@ -32,7 +33,7 @@ class GiftCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% GIFT w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -72,6 +73,24 @@ class GiftCipher(AbstractCipher):
 
         return
 
+    def getSboxLayer(self, parameters):
+        """
+        Returns the S-box and the state bits of the S-boxes.
+        """
+        return self.sbox, [[4*i + 3, 4*i + 2, 4*i + 1, 4*i]
+                           for i in range(parameters["wordsize"] // 4)]
+
+    def getPermutation(self, parameters):
+        """
+        Returns the bit permutation of GIFT-64 or GIFT-128.
+        """
+        wordsize = parameters["wordsize"]
+        if wordsize not in [64, 128]:
+            print("Only wordsize 64/128 bit supported!")
+            exit(1)
+        return [4*(i // 16) + wordsize // 4 * ((3*((i % 16) // 4) + i % 4) % 4)
+                + i % 4 for i in range(wordsize)]
+
     def setupGiftRound(self, stp_file, s_in, p, s_out, w, wordsize):
         """
         Model for differential behaviour of one round GIFT
@@ -289,8 +308,6 @@ class GiftCipher(AbstractCipher):
 
 
         # Substitution Layer
-        gift_sbox = [0x1, 0xa, 0x4, 0xc, 0x6, 0xf, 0x3, 0x9, 0x2, 0xd, 0xb, 0x7, 0x5, 0x0, 0x8, 0xe]
-
         nrOfSboxes = 0
         if wordsize == 64:
             nrOfSboxes = 16
@@ -313,7 +330,7 @@ class GiftCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 4*i + 2),
                          "{0}[{1}:{1}]".format(w, 4*i + 1),
                          "{0}[{1}:{1}]".format(w, 4*i + 0)]
-            command += stpcommands.add4bitSbox(gift_sbox, variables)
+            command += stpcommands.add4bitSbox(self.sbox, variables)
 
         stp_file.write(command)
         return
@@ -57,7 +57,7 @@ class KeccakDiffCipher(AbstractCipher):
 
         assert (rate + capacity) == wordsize * 25
         
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             stp_file.write("% Input File for STP\n% Keccak w={} rate={} "
                            "capacity={}\n\n\n".format(wordsize, rate, capacity,
                                                       rounds))
@@ -43,7 +43,7 @@ class MantisCipher(AbstractCipher):
             print("Mantis only supports a multiple of 2 as the number of rounds.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Mantis w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -4,7 +4,7 @@ Created on Dec 27, 2016
 @author: ralph
 '''
 
-from parser import stpcommands
+from parser import stpcommands, modelir
 from ciphers.cipher import AbstractCipher
 
 
@@ -15,6 +15,7 @@ class PresentCipher(AbstractCipher):
     """
 
     name = "present"
+    sbox = [0xc, 5, 6, 0xb, 9, 0, 0xa, 0xd, 3, 0xe, 0xf, 8, 4, 7, 1, 2]
 
     def getFormatString(self):
         """
@@ -27,85 +28,91 @@ class PresentCipher(AbstractCipher):
         Creates an STP file to find a characteristic for PRESENT with
         the given parameters.
         """
+        wordsize = parameters["wordsize"]
+        rounds = parameters["rounds"]
+        model = self.createModel(parameters)
+
+        with stpcommands.openModel(stp_filename) as stp_file:
+            header = ("% Input File for STP\n% PRESENT w={}"
+                      "rounds={}\n\n\n".format(wordsize, rounds))
+            modelir.writeCVC(model, stp_file, parameters, header)
+
+        return
 
+    def createCNF(self, parameters):
+        """
+        Creates the CNF to find a characteristic for PRESENT with the given
+        parameters.
+        """
+        return modelir.getCNF(self.createModel(parameters), parameters)
+
+    def createModel(self, parameters):
+        """
+        Returns the model of a characteristic for PRESENT with the given
+        parameters, see parser.modelir.
+        """
         wordsize = parameters["wordsize"]
         rounds = parameters["rounds"]
-        weight = parameters["sweight"]
 
         if wordsize != 64:
             print("Only wordsize of 64-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
-            header = ("% Input File for STP\n% PRESENT w={}"
-                      "rounds={}\n\n\n".format(wordsize, rounds))
-            stp_file.write(header)
-
-            # Setup variables
-            s = ["S{}".format(i) for i in range(rounds + 1)]
-            p = ["P{}".format(i) for i in range(rounds)]
-
-            # w = weight
-            w = ["w{}".format(i) for i in range(rounds)]
+        model = modelir.Model()
 
-            stpcommands.setupVariables(stp_file, s, wordsize)
-            stpcommands.setupVariables(stp_file, p, wordsize)
-            stpcommands.setupVariables(stp_file, w, wordsize)
+        # Setup variables, the state after the permutation layer is only a
+        # rewiring of the output of the S-boxes
+        s = model.addVariables(["S0"], wordsize)
+        p = model.addVariables(["P{}".format(i) for i in range(rounds)],
+                               wordsize)
 
-            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize)
+        # w = weight
+        w = model.addVariables(["w{}".format(i) for i in range(rounds)],
+                               wordsize)
 
-            for i in range(rounds):
-                self.setupPresentRound(stp_file, s[i], p[i], s[i+1], 
-                                      w[i], wordsize)
+        for i in range(rounds):
+            s.append(self.setupPresentRound(model, s[i], p[i], i + 1, w[i]))
 
-            # No all zero characteristic
-            stpcommands.assertNonZero(stp_file, s, wordsize)
+        model.addWeight(["w{}".format(i) for i in range(rounds)])
 
-            # Iterative characteristics only
-            # Input difference = Output difference
-            if parameters["iterative"]:
-                stpcommands.assertVariableValue(stp_file, s[0], s[rounds])
+        # No all zero characteristic
+        model.assertNonZero(s)
 
-            for key, value in parameters["fixedVariables"].items():
-                stpcommands.assertVariableValue(stp_file, key, value)
+        # Iterative characteristics only
+        # Input difference = Output difference
+        if parameters["iterative"]:
+            model.assertEqual(s[0], s[rounds])
 
-            for char in parameters["blockedCharacteristics"]:
-                stpcommands.blockCharacteristic(stp_file, char, wordsize)
+        return model
 
-            stpcommands.setupQuery(stp_file)
+    def getSboxLayer(self, parameters):
+        """
+        Returns the S-box and the state bits of the 16 S-boxes.
+        """
+        return self.sbox, [[4*i + 3, 4*i + 2, 4*i + 1, 4*i] for i in range(16)]
 
-        return
+    def getPermutation(self, parameters):
+        """
+        Returns the bit permutation of PRESENT.
+        """
+        return [16*(i % 4) + i // 4 for i in range(64)]
 
-    def setupPresentRound(self, stp_file, s_in, p, s_out, w, wordsize):
+    def setupPresentRound(self, model, s_in, p, round_out, w):
         """
         Model for differential behaviour of one round PRESENT
         """
-        command = ""
-
-        #Permutation Layer
+        # Substitution Layer
+        trails = [int("".join(str(bit) for bit in trail), 2) for trail in
+                  stpcommands.get4bitSboxTrails(self.sbox)]
         for i in range(16):
-            command += "ASSERT({0}[{1}:{1}] = {2}[{3}:{3}]);\n".format(p, i*4+0, s_out, i)
-            command += "ASSERT({0}[{1}:{1}] = {2}[{3}:{3}]);\n".format(p, i*4+1, s_out, i+16)
-            command += "ASSERT({0}[{1}:{1}] = {2}[{3}:{3}]);\n".format(p, i*4+2, s_out, i+32)
-            command += "ASSERT({0}[{1}:{1}] = {2}[{3}:{3}]);\n".format(p, i*4+3, s_out, i+48)
+            variables = [modelir.bit(word, 4*i + j) for word in [s_in, p, w]
+                         for j in [3, 2, 1, 0]]
+            model.assertTable(variables, trails)
 
-        # Substitution Layer
-        present_sbox = [0xc, 5, 6, 0xb, 9, 0, 0xa, 0xd, 3, 0xe, 0xf, 8, 4, 7, 1, 2]
+        # Permutation Layer
+        permuted = [None] * 64
         for i in range(16):
-            variables = ["{0}[{1}:{1}]".format(s_in, 4*i + 3),
-                         "{0}[{1}:{1}]".format(s_in, 4*i + 2),
-                         "{0}[{1}:{1}]".format(s_in, 4*i + 1),
-                         "{0}[{1}:{1}]".format(s_in, 4*i + 0),
-                         "{0}[{1}:{1}]".format(p, 4*i + 3),
-                         "{0}[{1}:{1}]".format(p, 4*i + 2),
-                         "{0}[{1}:{1}]".format(p, 4*i + 1),
-                         "{0}[{1}:{1}]".format(p, 4*i + 0),
-                         "{0}[{1}:{1}]".format(w, 4*i + 3),
-                         "{0}[{1}:{1}]".format(w, 4*i + 2),
-                         "{0}[{1}:{1}]".format(w, 4*i + 1),
-                         "{0}[{1}:{1}]".format(w, 4*i + 0)]
-            command += stpcommands.add4bitSbox(present_sbox, variables)
-
-
-        stp_file.write(command)
-        return
+            for j in range(4):
+                permuted[i + 16*j] = modelir.bit(p, i*4 + j)
+        return model.define("S{}".format(round_out),
+                            modelir.concatBits(permuted))
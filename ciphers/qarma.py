@@ -52,7 +52,7 @@ class QarmaCipher(AbstractCipher):
             print("Qarma only supports a multiple of 2 as the number of rounds.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Qarma w={}"
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -15,6 +15,7 @@ class RectangleCipher(AbstractCipher):
     """
 
     name = "rectangle"
+    sbox = [0x6, 0x5, 0xC, 0xA, 0x1, 0xE, 0x7, 0x9, 0xB, 0x0, 0x3, 0xD, 0x8, 0xF, 0x4, 0x2]
 
     def getFormatString(self):
         """
@@ -33,7 +34,7 @@ class RectangleCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Rectangle w={}"
                       "rounds={}\n\n\n".format(blocksize, rounds))
             stp_file.write(header)
@@ -73,6 +74,21 @@ class RectangleCipher(AbstractCipher):
 
         return
 
+    def getSboxLayer(self, parameters):
+        """
+        Returns the S-box and the state bits of the 16 columns.
+        """
+        return self.sbox, [[i + 48, i + 32, i + 16, i] for i in range(16)]
+
+    def getPermutation(self, parameters):
+        """
+        Returns ShiftRows as bit permutation, row r is rotated to the left by
+        0, 1, 12 and 13 bits.
+        """
+        shifts = [0, 1, 12, 13]
+        return [16*(i // 16) + (i % 16 + shifts[i // 16]) % 16
+                for i in range(64)]
+
     def setupRectangleRound(self, stp_file, sc_in, sr, sc_out, w, blocksize):
         """
         Model for differential behaviour of one round Rectangle
@@ -80,7 +96,6 @@ class RectangleCipher(AbstractCipher):
         command = ""
 
         #SubColumn
-        rectangle_sbox = [0x6, 0x5, 0xC, 0xA, 0x1, 0xE, 0x7, 0x9, 0xB, 0x0, 0x3, 0xD, 0x8, 0xF, 0x4, 0x2]
         for i in range(16):
             variables = ["{0}[{1}:{1}]".format(sc_in, i + 48),
                          "{0}[{1}:{1}]".format(sc_in, i + 32),
@@ -94,7 +109,7 @@ class RectangleCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, i + 32),
                          "{0}[{1}:{1}]".format(w, i + 16),
                          "{0}[{1}:{1}]".format(w, i + 0)]
-            command += stpcommands.add4bitSbox(rectangle_sbox, variables)
+            command += stpcommands.add4bitSbox(self.sbox, variables)
 
         #ShiftRows
         # row 0 <<< 0
@@ -3,7 +3,7 @@ Created on Mar 1, 2019
 @author: Shawn
 '''
 
-from parser import stpcommands
+from parser import stpcommands, cnfcommands, sboxcnf
 from ciphers.cipher import AbstractCipher
 from ciphers import GenPerm as GenPerm
 from ciphers import ssb_ddt
@@ -20,6 +20,7 @@ class Cipher(AbstractCipher):
     rot_alpha = 0
     rot_beta = 4
     PERM = []
+    ssb_encoding = "cnf"
 
     def getFormatString(self):
         """
@@ -32,6 +33,36 @@ class Cipher(AbstractCipher):
                 "sumw",
                 ]
 
+    def getNibblePermutation(self, wordsize):
+        """
+        Returns the bit permutation for the given wordsize.
+        """
+        if wordsize == 32:
+            p = [7, 4, 1, 6, 3, 0, 5, 2]
+        elif wordsize == 64:
+            p = [14, 15, 8, 9, 2, 3, 12, 13, 6, 7, 0, 1, 10, 11, 4, 5]
+        else:
+            raise Exception("Wrong wordsize!")
+        return GenPerm.GenNibblePerms(wordsize, p)
+
+    def getRotationSymmetry(self, parameters):
+        """
+        The S-boxes and the rotations are the same for all nibbles, so the
+        model is invariant under the rotations which commute with PERM.
+        """
+        wordsize = parameters["wordsize"]
+        perm = self.getNibblePermutation(wordsize)
+        step = min(step for step in range(4, wordsize + 1, 4)
+                   if wordsize % step == 0 and
+                   all(perm[(i + step) % wordsize] == (perm[i] + step) % wordsize
+                       for i in range(wordsize)))
+        words = {name : (wordsize, step) for name in ["x", "y", "outG0", "outG1", "rotG0", "rotG1", "xorG", "permG"]}
+        words.update({name : (wordsize // 4, step // 4)
+                      for name in ["actflag"]})
+        return {"order" : wordsize // step,
+                "words" : words,
+                "inputs" : ["x0", "y0"]}
+
     def createSTP(self, stp_filename, parameters):
         """
         Creates an STP file to find a characteristic for sand diff pattern with
@@ -41,15 +72,10 @@ class Cipher(AbstractCipher):
         wordsize = parameters["wordsize"]
         rounds   = parameters["rounds"]
         weight   = parameters["sweight"]
-        if wordsize == 32:
-            p = [7, 4, 1, 6, 3, 0, 5, 2]
-        elif wordsize == 64:
-            p = [14, 15, 8, 9, 2, 3, 12, 13, 6, 7, 0, 1, 10, 11, 4, 5]
-        else:
-            raise Exception("Wrong wordsize!")
-        self.PERM = GenPerm.GenNibblePerms(wordsize, p)
+        self.PERM = self.getNibblePermutation(wordsize)
+        self.ssb_encoding = parameters.get("ssbencoding", "cnf")
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP: sand diff actsbox\n"
                       "% w = {} alpha = {} beta = {}\n"
                       "% rounds = {}\n\n".format(
@@ -86,7 +112,8 @@ class Cipher(AbstractCipher):
 
             stpcommands.setupWeightComputationSum(stp_file, weight, w, 16)
 
-            self.SBOX_ACT_ASSERT(stp_file)
+            if self.ssb_encoding == "array":
+                self.SBOX_ACT_ASSERT(stp_file)
 
             for i in range(rounds):
                 self.setupRound(stp_file,
@@ -116,6 +143,130 @@ class Cipher(AbstractCipher):
 
         return
 
+    def createCNF(self, parameters):
+        """
+        Creates the CNF to find a characteristic for sand diff actsbox with
+        the given parameters.
+        """
+        wordsize = parameters["wordsize"]
+        rounds   = parameters["rounds"]
+        weight   = parameters["sweight"]
+        self.PERM = self.getNibblePermutation(wordsize)
+
+        cnf_model = cnfcommands.CNFModel()
+
+        # Setup variables
+        # x as left, y as right
+        x = ["x{}".format(i) for i in range(rounds + 1)]
+        y = ["y{}".format(i) for i in range(rounds + 1)]
+        out_G0  = ["outG0{}".format(i) for i in range(rounds)]
+        out_G1  = ["outG1{}".format(i) for i in range(rounds)]
+        rot_G0  = ["rotG0{}".format(i) for i in range(rounds)]
+        rot_G1  = ["rotG1{}".format(i) for i in range(rounds)]
+        xor_G  = ["xorG{}".format(i) for i in range(rounds)]
+        perm_G  = ["permG{}".format(i) for i in range(rounds)]
+
+        # w = weight
+        w = ["sumw{}".format(i) for i in range(rounds)]
+        act_flag = ["actflag{}".format(i) for i in range(rounds)]
+
+        # y, rot_G0, rot_G1 and perm_G are only a rewiring of other words
+        cnf_model.setupVariables(x + [y[0]] + out_G0 + out_G1 + xor_G,
+                                 wordsize)
+        cnf_model.setupVariables(act_flag, wordsize // 4)
+
+        for i in range(rounds):
+            self.setupRoundCNF(cnf_model,
+                               x[i], y[i],
+                               x[i+1], y[i+1],
+                               out_G0[i], out_G1[i],
+                               rot_G0[i], rot_G1[i],
+                               xor_G[i], perm_G[i],
+                               act_flag[i], wordsize)
+            cnf_model.addWeight(cnf_model.getBits(act_flag[i]))
+            cnf_model.setupCountWord(w[i], cnf_model.getBits(act_flag[i]))
+
+        if weight is not None:
+            cnf_model.assertWeight(weight)
+
+        # No all zero characteristic
+        cnf_model.assertNonZero([x[0], y[0]])
+
+        # Iterative characteristics only
+        # Input difference = Output difference
+        if parameters["iterative"]:
+            cnf_model.assertVariableValue(x[0], x[rounds])
+            cnf_model.assertVariableValue(y[0], y[rounds])
+
+        for key, value in parameters["fixedVariables"].items():
+            cnf_model.assertVariableValue(key, value)
+
+        for char in parameters["blockedCharacteristics"]:
+            cnf_model.blockCharacteristic(stpcommands.getBlockedWords(char))
+
+        return cnf_model
+
+    def setupRoundCNF(self,
+                      cnf_model,
+                      x_in, y_in,
+                      x_out, y_out,
+                      out_G0, out_G1,
+                      rot_G0, rot_G1,
+                      xor_G, perm_G,
+                      act_flag, wordsize):
+        """
+        CNF for the differential behaviour of one round
+        """
+        # 1. y_out = x_in
+        cnf_model.setWord(y_out, cnf_model.getBits(x_in))
+
+        # 2. pass SSb: x -> out_G0, out_G1
+        x_bits = cnf_model.getBits(x_in)
+        out_G0_bits = cnf_model.getBits(out_G0)
+        out_G1_bits = cnf_model.getBits(out_G1)
+        act_flag_bits = cnf_model.getBits(act_flag)
+        ssb_table = [(i << 8) | j for i in range(16) for j in range(256)
+                     if ssb_ddt.DDT[i][j] != 0]
+        for i in range(wordsize // 4):
+            nibble = [wordsize - 1 - 4 * i - k for k in range(4)]
+            s_in_4_bit = [x_bits[bit] for bit in nibble]
+            cnf_model.assertTable(s_in_4_bit +
+                                  [out_G0_bits[bit] for bit in nibble] +
+                                  [out_G1_bits[bit] for bit in nibble],
+                                  ssb_table)
+            cnf_model.assertOr(act_flag_bits[wordsize // 4 - 1 - i],
+                               s_in_4_bit)
+
+        # 3. rot out_G0, out_G1
+        cnf_model.setWord(rot_G0, [out_G0_bits[(i - self.rot_alpha) % wordsize]
+                                   for i in range(wordsize)])
+        cnf_model.setWord(rot_G1, [out_G1_bits[(i - self.rot_beta) % wordsize]
+                                   for i in range(wordsize)])
+
+        # 4. G0 ^ G1 = xor_G
+        cnf_model.assertXor(cnf_model.getBits(rot_G0),
+                            cnf_model.getBits(rot_G1),
+                            cnf_model.getBits(xor_G))
+
+        # 4. xor_G PERM to perm_G
+        xor_G_bits = cnf_model.getBits(xor_G)
+        perm_G_bits = [None] * wordsize
+        for i in range(wordsize):
+            perm_G_bits[self.PERM[i]] = xor_G_bits[i]
+        cnf_model.setWord(perm_G, perm_G_bits)
+
+        # 5. perm_G ^ y_in = x_out
+        cnf_model.assertXor(cnf_model.getBits(perm_G),
+                            cnf_model.getBits(y_in),
+                            cnf_model.getBits(x_out))
+        return
+
+    def getRoundWeights(self, parameters):
+        """
+        Returns the weight of each round.
+        """
+        return ["sumw{}".format(i) for i in range(parameters["rounds"])]
+
     def setupRound(self,
                         stp_file,
                         x_in, y_in,
@@ -133,6 +284,62 @@ class Cipher(AbstractCipher):
         command += "ASSERT({} = {});\n".format(y_out, x_in)
 
         # 2. pass SSb: x -> out_G0, out_G1
+        if self.ssb_encoding == "cnf":
+            command += self.getSSbCNF(x_in, out_G0, out_G1, act_flag, wordsize)
+        else:
+            command += self.getSSbArray(x_in, out_G0, out_G1, act_flag,
+                                        wordsize)
+
+        # 3. rot out_G0, out_G1
+        out_G0_rotalpha = rotl(out_G0, self.rot_alpha, wordsize)
+        out_G1_rotbeta  = rotl(out_G1, self.rot_beta,  wordsize)
+        command += "ASSERT({} = {});\n".format(rot_G0, out_G0_rotalpha)
+        command += "ASSERT({} = {});\n".format(rot_G1, out_G1_rotbeta)
+
+        # 4. G0 ^ G1 = xor_G
+        command += "ASSERT({} = BVXOR({}, {}));\n".format(xor_G, rot_G0, rot_G1)
+
+        # 4. xor_G PERM to perm_G
+        for i in range(wordsize):
+            command += "ASSERT({0}[{1}:{1}] = {2}[{3}:{3}]);\n".format(
+                    perm_G, self.PERM[i], xor_G, i)
+
+        # 5. perm_G ^ y_in = x_out
+        command += "ASSERT({} = BVXOR({}, {}));\n".format(y_in, perm_G, x_out)
+
+        # 6. Weight computation
+        sum_w_i = stpcommands.getWeightString([act_flag], wordsize // 4, 0, w)
+        sum_w_i += '\n'
+        command += sum_w_i
+
+        stp_file.write(command)
+        return
+
+    def getSSbCNF(self, x_in, out_G0, out_G1, act_flag, wordsize):
+        """
+        Returns the SSb transitions and the active S-boxes as minimized
+        clauses over the bits of the input, the outputs and the flag.
+        """
+        ssb_table = [(((i << 8) | j) << 1) | (i != 0) for i in range(16)
+                     for j in range(256) if ssb_ddt.DDT[i][j] != 0]
+        clauses = sboxcnf.getTableCNF(ssb_table, 13)
+
+        command = ""
+        for i in range(wordsize // 4):
+            nibble = [wordsize - 1 - 4 * i - k for k in range(4)]
+            variables = ["{}[{}:{}]".format(word, bit, bit)
+                         for word in [x_in, out_G0, out_G1] for bit in nibble]
+            variables.append("{0}[{1}:{1}]".format(act_flag,
+                                                   wordsize // 4 - 1 - i))
+            command += "ASSERT({} = 0bin1);\n".format(
+                sboxcnf.getCVCString(clauses, variables))
+        return command
+
+    def getSSbArray(self, x_in, out_G0, out_G1, act_flag, wordsize):
+        """
+        Returns the SSb transitions as reads of the array SBOX.
+        """
+        command = ""
         for i in range(wordsize // 4):
             s_in_4_bit = "{0}[{1}:{1}]@{0}[{2}:{2}]@" \
                          "{0}[{3}:{3}]@{0}[{4}:{4}]".format(
@@ -165,31 +372,7 @@ class Cipher(AbstractCipher):
                                       "ELSE 0bin1 ENDIF));\n".format(
                         s_in_4_bit,
                         "{0}[{1}:{1}]".format(act_flag, wordsize // 4 - 1 - i))
-
-        # 3. rot out_G0, out_G1
-        out_G0_rotalpha = rotl(out_G0, self.rot_alpha, wordsize)
-        out_G1_rotbeta  = rotl(out_G1, self.rot_beta,  wordsize)
-        command += "ASSERT({} = {});\n".format(rot_G0, out_G0_rotalpha)
-        command += "ASSERT({} = {});\n".format(rot_G1, out_G1_rotbeta)
-
-        # 4. G0 ^ G1 = xor_G
-        command += "ASSERT({} = BVXOR({}, {}));\n".format(xor_G, rot_G0, rot_G1)
-
-        # 4. xor_G PERM to perm_G
-        for i in range(wordsize):
-            command += "ASSERT({0}[{1}:{1}] = {2}[{3}:{3}]);\n".format(
-                    perm_G, self.PERM[i], xor_G, i)
-
-        # 5. perm_G ^ y_in = x_out
-        command += "ASSERT({} = BVXOR({}, {}));\n".format(y_in, perm_G, x_out)
-
-        # 6. Weight computation
-        sum_w_i = stpcommands.getWeightString([act_flag], wordsize // 4, 0, w)
-        sum_w_i += '\n'
-        command += sum_w_i
-
-        stp_file.write(command)
-        return
+        return command
 
     def SBOX_ACT_ASSERT(self, stp_file):
         command = "SBOX : ARRAY BITVECTOR(12) OF BITVECTOR(1);\n"
@@ -46,7 +46,7 @@ class Cipher(AbstractCipher):
         else:
             raise Exception("Wrong wordsize!")
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP: sand diff pattern\n"
                       "% w = {} alpha = {} beta = {}\n"
                       "% rounds = {}\n\n".format(
@@ -104,6 +104,12 @@ class Cipher(AbstractCipher):
 
         return
 
+    def getRoundWeights(self, parameters):
+        """
+        Returns the weight of each round.
+        """
+        return ["sumw{}".format(i) for i in range(parameters["rounds"])]
+
     def setupRound(self,
                         stp_file,
                         x_in, y_in,
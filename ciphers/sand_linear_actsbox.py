@@ -3,7 +3,7 @@ Created on Mar 1, 2019
 @author: Shawn
 '''
 
-from parser import stpcommands
+from parser import stpcommands, sboxcnf
 from ciphers.cipher import AbstractCipher
 from ciphers import GenPerm as GenPerm
 from ciphers import ssb_lat
@@ -18,6 +18,7 @@ class Cipher(AbstractCipher):
     rot_alpha = 0
     rot_beta = 4
     PERM = []
+    ssb_encoding = "cnf"
 
     def getFormatString(self):
         """
@@ -30,6 +31,36 @@ class Cipher(AbstractCipher):
                 'sumw',
         ]
 
+    def getNibblePermutation(self, wordsize):
+        """
+        Returns the bit permutation for the given wordsize.
+        """
+        if wordsize == 32:
+            p = [7, 4, 1, 6, 3, 0, 5, 2]
+        elif wordsize == 64:
+            p = [14, 15, 8, 9, 2, 3, 12, 13, 6, 7, 0, 1, 10, 11, 4, 5]
+        else:
+            raise Exception("Wrong wordsize!")
+        return GenPerm.GenNibblePerms(wordsize, p)
+
+    def getRotationSymmetry(self, parameters):
+        """
+        The S-boxes and the rotations are the same for all nibbles, so the
+        model is invariant under the rotations which commute with PERM.
+        """
+        wordsize = parameters["wordsize"]
+        perm = self.getNibblePermutation(wordsize)
+        step = min(step for step in range(4, wordsize + 1, 4)
+                   if wordsize % step == 0 and
+                   all(perm[(i + step) % wordsize] == (perm[i] + step) % wordsize
+                       for i in range(wordsize)))
+        words = {name : (wordsize, step) for name in ["x", "y", "inS", "befP", "aftP"]}
+        words.update({name : (wordsize // 4, step // 4)
+                      for name in ["wiR", "wi1R"]})
+        return {"order" : wordsize // step,
+                "words" : words,
+                "inputs" : ["x0", "y0"]}
+
     def createSTP(self, stp_filename, parameters):
         """
         Creates an STP file to find a characteristic for sand nibble with
@@ -39,15 +70,10 @@ class Cipher(AbstractCipher):
         wordsize = parameters["wordsize"]
         rounds   = parameters["rounds"]
         weight   = parameters["sweight"]
-        if wordsize == 32:
-            p = [7, 4, 1, 6, 3, 0, 5, 2]
-        elif wordsize == 64:
-            p = [14, 15, 8, 9, 2, 3, 12, 13, 6, 7, 0, 1, 10, 11, 4, 5]
-        else:
-            raise Exception("Wrong wordsize!")
-        self.PERM = GenPerm.GenNibblePerms(wordsize, p)
+        self.PERM = self.getNibblePermutation(wordsize)
+        self.ssb_encoding = parameters.get("ssbencoding", "cnf")
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP: sand linear actsbox\n"
                       "% w = {} alpha = {} beta = {}\n"
                       "% rounds = {}\n\n".format(
@@ -80,7 +106,8 @@ class Cipher(AbstractCipher):
 
             stpcommands.setupWeightComputationSum(stp_file, weight, w, 16)
 
-            self.SBOX_ACT_ASSERT(stp_file)
+            if self.ssb_encoding == "array":
+                self.SBOX_ACT_ASSERT(stp_file)
 
             for i in range(rounds):
                 self.setupRound(stp_file,
@@ -109,6 +136,12 @@ class Cipher(AbstractCipher):
 
         return
 
+    def getRoundWeights(self, parameters):
+        """
+        Returns the weight of each round.
+        """
+        return ["sumw{}".format(i) for i in range(parameters["rounds"])]
+
     def setupRound(self,
                         stp_file,
                         x_in, y_in,
@@ -158,13 +191,16 @@ class Cipher(AbstractCipher):
                     w_i_0, wordsize // 4 - 1 - i)
             w_i.append(s_w)
 
-        for i in range(wordsize // 4):
-            s_in_out = "S[{}@{}@{}]".format(
-            in_0[i],
-            out_0[i],
-            out_1[(i - (self.rot_beta - self.rot_alpha)//4) % (wordsize // 4)])
-            command += "ASSERT({} = {});\n".format(w_i[i], s_in_out)
-            command += "ASSERT(NOT({} = 0bin10));\n".format(w_i[i])
+        if self.ssb_encoding == "cnf":
+            command += self.getSSbCNF(in_S, bef_P, w_i_0, w_i_1, wordsize)
+        else:
+            for i in range(wordsize // 4):
+                s_in_out = "S[{}@{}@{}]".format(
+                in_0[i],
+                out_0[i],
+                out_1[(i - (self.rot_beta - self.rot_alpha)//4) % (wordsize // 4)])
+                command += "ASSERT({} = {});\n".format(w_i[i], s_in_out)
+                command += "ASSERT(NOT({} = 0bin10));\n".format(w_i[i])
 
         # 5. perms
         for i in range(wordsize):
@@ -179,6 +215,30 @@ class Cipher(AbstractCipher):
         stp_file.write(command)
         return
 
+    def getSSbCNF(self, in_S, bef_P, w_i_0, w_i_1, wordsize):
+        """
+        Returns the SSb correlations as minimized clauses over the bits of
+        the input, the outputs and the weight. The weight bit is 0 for
+        correlation 1 and 1 for correlation 2^-1, and w_i_1 is always 0.
+        """
+        ssb_table = [(((a << 8) | b) << 1) | (abs(ssb_lat.LAT[a][b]) != 8)
+                     for a in range(16) for b in range(256)
+                     if ssb_lat.LAT[a][b] != 0]
+        clauses = sboxcnf.getTableCNF(ssb_table, 13)
+        shift = (self.rot_beta - self.rot_alpha) // 4
+
+        command = "ASSERT({} = 0bin{});\n".format(w_i_1, "0" * (wordsize // 4))
+        for i in range(wordsize // 4):
+            variables = []
+            for word, nibble in [(in_S, i), (bef_P, i),
+                                 (bef_P, (i - shift) % (wordsize // 4))]:
+                variables += ["{0}[{1}:{1}]".format(
+                    word, wordsize - 1 - 4 * nibble - k) for k in range(4)]
+            variables.append("{0}[{1}:{1}]".format(w_i_0, wordsize // 4 - 1 - i))
+            command += "ASSERT({} = 0bin1);\n".format(
+                sboxcnf.getCVCString(clauses, variables))
+        return command
+
     def SBOX_ACT_ASSERT(self, stp_file):
         command = "S: ARRAY BITVECTOR(12) OF BITVECTOR(2);\n"
 
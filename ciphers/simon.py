@@ -4,11 +4,9 @@ Created on Mar 28, 2014
 @author: stefan
 '''
 
-from parser import stpcommands
+from parser import stpcommands, modelir
 from ciphers.cipher import AbstractCipher
 
-from parser.stpcommands import getStringLeftRotate as rotl
-
 
 class SimonCipher(AbstractCipher):
     """
@@ -35,63 +33,92 @@ class SimonCipher(AbstractCipher):
 
         wordsize = parameters["wordsize"]
         rounds = parameters["rounds"]
-        weight = parameters["sweight"]
+        model = self.createModel(parameters)
 
-        # Replace with custom if set in parameters.
-        if "rotationconstants" in parameters:
-            self.rot_alpha = parameters["rotationconstants"][0]
-            self.rot_beta = parameters["rotationconstants"][1]
-            self.rot_gamma = parameters["rotationconstants"][2]
-
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Simon w={} alpha={} beta={}"
                       " gamma={} rounds={}\n\n\n".format(wordsize,
                                                          self.rot_alpha,
                                                          self.rot_beta,
                                                          self.rot_gamma,
                                                          rounds))
-            stp_file.write(header)
+            modelir.writeCVC(model, stp_file, parameters, header)
 
-            # Setup variables
-            # x = left, y = right
-            x = ["x{}".format(i) for i in range(rounds + 1)]
-            y = ["y{}".format(i) for i in range(rounds + 1)]
-            and_out = ["andout{}".format(i) for i in range(rounds + 1)]
+        return
 
-            # w = weight
-            w = ["w{}".format(i) for i in range(rounds)]
+    def createCNF(self, parameters):
+        """
+        Creates the CNF to find a characteristic for SIMON with the given
+        parameters.
+        """
+        return modelir.getCNF(self.createModel(parameters), parameters)
 
-            stpcommands.setupVariables(stp_file, x, wordsize)
-            stpcommands.setupVariables(stp_file, y, wordsize)
-            stpcommands.setupVariables(stp_file, and_out, wordsize)
-            stpcommands.setupVariables(stp_file, w, wordsize)
+    def createModel(self, parameters):
+        """
+        Returns the model of a characteristic for SIMON with the given
+        parameters, see parser.modelir.
+        """
+        wordsize = parameters["wordsize"]
+        rounds = parameters["rounds"]
 
-            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize)
+        # Replace with custom if set in parameters.
+        if "rotationconstants" in parameters:
+            self.rot_alpha = parameters["rotationconstants"][0]
+            self.rot_beta = parameters["rotationconstants"][1]
+            self.rot_gamma = parameters["rotationconstants"][2]
 
-            for i in range(rounds):
-                self.setupSimonRound(stp_file, x[i], y[i], x[i+1], y[i+1],
-                                     and_out[i], w[i], wordsize)
+        model = modelir.Model()
 
-            # No all zero characteristic
-            stpcommands.assertNonZero(stp_file, x + y, wordsize)
+        # Setup variables
+        # x = left, y = right
+        x = model.addVariables(["x0"], wordsize)
+        y = model.addVariables(["y0"], wordsize)
+        and_out = model.addVariables(["andout{}".format(i)
+                                      for i in range(rounds + 1)], wordsize)
 
-            # Iterative characteristics only
-            # Input difference = Output difference
-            if parameters["iterative"]:
-                stpcommands.assertVariableValue(stp_file, x[0], x[rounds])
-                stpcommands.assertVariableValue(stp_file, y[0], y[rounds])
+        # w = weight
+        w = ["w{}".format(i) for i in range(rounds)]
 
-            for key, value in parameters["fixedVariables"].items():
-                stpcommands.assertVariableValue(stp_file, key, value)
+        for i in range(rounds):
+            x_out, y_out = self.setupSimonRound(model, x[i], y[i], i + 1,
+                                                and_out[i], w[i], wordsize)
+            x.append(x_out)
+            y.append(y_out)
 
-            for char in parameters["blockedCharacteristics"]:
-                stpcommands.blockCharacteristic(stp_file, char, wordsize)
+        model.addWeight(w)
 
-            stpcommands.setupQuery(stp_file)
+        # No all zero characteristic
+        model.assertNonZero(x + y)
 
-        return
+        # Iterative characteristics only
+        # Input difference = Output difference
+        if parameters["iterative"]:
+            model.assertEqual(x[0], x[rounds])
+            model.assertEqual(y[0], y[rounds])
+
+        return model
+
+    def getRotationSymmetry(self, parameters):
+        """
+        The model is invariant under rotating all words by one bit, except
+        for the rounds with x = 1...1, where the lowest bit of the output of
+        the AND is fixed to 0.
+        """
+        wordsize = parameters["wordsize"]
+        return {"order" : wordsize,
+                "words" : {name : (wordsize, 1)
+                           for name in ["x", "y", "andout", "w"]},
+                "inputs" : ["x0", "y0"]}
 
-    def setupSimonRound(self, stp_file, x_in, y_in, x_out, y_out, and_out, w,
+    def getRoundWeights(self, parameters):
+        """
+        Returns the weight of each round.
+        """
+        return [stpcommands.getHammingWeightString("w{}".format(i),
+                                                   parameters["wordsize"])
+                for i in range(parameters["rounds"])]
+
+    def setupSimonRound(self, model, x_in, y_in, round_out, and_out, w,
                         wordsize):
         """
         Model for differential behaviour of one round SIMON
@@ -101,46 +128,38 @@ class SimonCipher(AbstractCipher):
         This model is only correct if gcd(self.rot_alpha - self.rot_beta, wordsize) = 1
         and self.rot_alpha > self.rot_beta
         """
-        command = ""
-
-        #Assert(y_out = x_in)
-        command += "ASSERT({} = {});\n".format(y_out, x_in)
+        y_out = model.define("y{}".format(round_out), x_in)
 
-        x_in_rotalpha = rotl(x_in, self.rot_alpha, wordsize)
-        x_in_rotbeta = rotl(x_in, self.rot_beta, wordsize)
+        x_in_rotalpha = modelir.rotl(x_in, self.rot_alpha)
+        x_in_rotbeta = modelir.rotl(x_in, self.rot_beta)
 
         #Deal with dependent inputs
-        varibits = "({0} | {1})".format(x_in_rotalpha, x_in_rotbeta)
-        doublebits = self.getDoubleBits(x_in, wordsize)
+        varibits = modelir.bvor(x_in_rotalpha, x_in_rotbeta)
+        doublebits = self.getDoubleBits(x_in)
+        all_ones = modelir.isEqual(x_in, modelir.const(-1, wordsize))
 
         #Check for valid difference
-        firstcheck = "({} & ~{})".format(and_out, varibits)
-        secondcheck = "(BVXOR({}, {}) & {})".format(
-            and_out, rotl(and_out, self.rot_alpha - self.rot_beta, wordsize), doublebits)
-        thirdcheck = "(IF {0} = 0x{1} THEN BVMOD({2}, {3}, 0x{4}2) ELSE 0x{5} ENDIF)".format(
-            x_in, "f" * (wordsize // 4), wordsize, and_out, "0" * (wordsize // 4 - 1),
-            "0" * (wordsize // 4))
+        firstcheck = modelir.bvand(and_out, modelir.bvnot(varibits))
+        secondcheck = modelir.bvand(
+            modelir.bvxor(and_out,
+                          modelir.rotl(and_out, self.rot_alpha - self.rot_beta)),
+            doublebits)
+        thirdcheck = modelir.ite(all_ones,
+                                 modelir.bvand(and_out, modelir.const(1, wordsize)),
+                                 modelir.const(0, wordsize))
 
-        command += "ASSERT(({} | {} | {}) = 0x{});\n".format(
-            firstcheck, secondcheck, thirdcheck, "0" * (wordsize // 4))
+        model.assertZero(modelir.bvor(firstcheck, secondcheck, thirdcheck))
 
         #Assert XORs
-        command += "ASSERT({} = BVXOR({}, BVXOR({}, {})));\n".format(
-            x_out, rotl(x_in, self.rot_gamma, wordsize), y_in, and_out)
+        x_out = model.define("x{}".format(round_out), modelir.bvxor(
+            modelir.rotl(x_in, self.rot_gamma), y_in, and_out))
 
         #Weight computation
-        command += "ASSERT({0} = (IF {1} = 0x{4} THEN BVSUB({5},0x{4},0x{6}1) \
-                    ELSE BVXOR({2}, {3}) ENDIF));\n".format(
-                        w, x_in, varibits, doublebits, "f" * (wordsize // 4),
-                        wordsize, "0"*((wordsize // 4) - 1))
-
-
-        stp_file.write(command)
-        return
-
-    def getDoubleBits(self, x_in, wordsize):
-        command = "({0} & ~{1} & {2})".format(
-            rotl(x_in, self.rot_beta, wordsize),
-            rotl(x_in, self.rot_alpha, wordsize),
-            rotl(x_in, 2 * self.rot_alpha - self.rot_beta, wordsize))
-        return command
+        model.define(w, modelir.ite(all_ones, modelir.const(-2, wordsize),
+                                    modelir.bvxor(varibits, doublebits)))
+        return x_out, y_out
+
+    def getDoubleBits(self, x_in):
+        return modelir.bvand(modelir.rotl(x_in, self.rot_beta),
+                             modelir.bvnot(modelir.rotl(x_in, self.rot_alpha)),
+                             modelir.rotl(x_in, 2 * self.rot_alpha - self.rot_beta))
@@ -60,7 +60,7 @@ class SimonKeyRcCipher(AbstractCipher):
 
         self.num_messages = parameters["nummessages"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Simon w={} alpha={} beta={}"
                       " gamma={} rounds={}\n\n\n".format(wordsize,
                                                          self.rot_alpha,
@@ -44,7 +44,7 @@ class SimonLinearCipher(AbstractCipher):
             self.rot_beta = parameters["rotationconstants"][1]
             self.rot_gamma = parameters["rotationconstants"][2]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Simon w={} alpha={} beta={}"
                       " gamma={} rounds={}\n\n\n".format(wordsize,
                                                          self.rot_alpha,
@@ -21,25 +21,6 @@ class SkinnyCipher(AbstractCipher):
     # Sbox lookup table
     skinny_sbox = [0xc, 0x6, 0x9, 0x0, 0x1, 0xa, 0x2, 0xb, 
                     0x3, 0x8, 0x5, 0xd, 0x4, 0xe, 0x7, 0xf]
-    # reduced product of sum (pos) representation of DDT
-    skinny_sbox_rpos = "(~a1 | a0 | ~b3 | ~b2 | b1 | b0) & (~a1 | a0 | ~b3 | ~b2 | ~b1 | ~b0) & (~a2 | ~a1 | ~a0 | ~b2 | b1 | ~b0) & (~a2 | ~a1 | ~a0 | ~b2 | ~b1 | b0) & (p1 | ~p0) & (~b0 | p0) & (a1 | b2 | ~p2) & (~b2 | p0) & (~a2 | ~b2 | p2) & (~a1 | b3 | b2 | b0) & (a2 | b3 | ~p2) & (a3 | a2 | a0 | ~b3) & (~a0 | p0) & (~a1 | ~b3 | p2) & (~a3 | ~b3 | ~b1 | p2) & (~a2 | p0) & (a3 | a2 | a1 | ~b2) & (a2 | a1 | b3 | ~b1) & (a1 | b3 | b2 | b1 | ~p1) & (~a2 | b3 | ~b0 | p2) & (~a3 | a0 | b2 | ~b0 | p2) & (~a1 | b1 | b0 | p2) & (~a3 | a2 | ~b3 | p2) & (~a3 | p0) & (~a1 | ~a0 | ~b2 | p2) & (b3 | ~b2 | b1 | ~b0 | ~p2) & (~a3 | ~a2 | a1 | b1 | ~p2) & (a3 | a0 | ~b3 | b0 | p2) & (a3 | ~a1 | a0 | ~b3 | b2 | ~b0) & (~a3 | ~a0 | ~b3 | b2 | ~b0 | ~p2) & (a2 | ~a1 | a0 | ~b2 | ~p2) & (a3 | a1 | ~b3 | ~b1 | ~p2) & (~a3 | ~a2 | a0 | b2 | b0 | ~p2) & (a3 | ~a2 | ~a0 | b2 | b0 | ~p2) & (~a2 | ~a0 | b1 | b0 | p2) & (a3 | ~a2 | ~a0 | ~b0 | p2) & (~a3 | a2 | ~a0 | b2 | ~p2) & (a3 | ~a0 | b3 | ~b0 | p2) & (~a1 | b3 | ~b1 | b0 | ~p2) & (a1 | b3 | b1 | ~p2) & (~b2 | ~b1 | ~b0 | p2) & (a0 | ~b3 | b1 | ~b0 | p2)"
-
-    def constraints_by_skinny_sbox(self, variables):
-        """
-        Generate constraints related to sbox
-        """
-        di = variables[0:4]
-        do = variables[4:8]
-        w = variables[9:12]
-        command = self.skinny_sbox_rpos
-        for i in range(4):
-            command = command.replace("a%d" % (3 - i), di[i])
-            command = command.replace("b%d" % (3 - i), do[i])          
-            if i <= 2:
-               command = command.replace("p%d" % (2 - i), w[i])
-        command = "ASSERT(%s = 0bin1);\n" % command
-        command += "ASSERT(%s = 0bin0);\n" % variables[8]
-        return command
 
     def getFormatString(self):
         """
@@ -63,7 +44,7 @@ class SkinnyCipher(AbstractCipher):
             print("Only blocksize of 64-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Skinny w={}"
                       "rounds={}\n\n\n".format(blocksize, rounds))
             stp_file.write(header)
@@ -127,8 +108,7 @@ class SkinnyCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 4*i + 2),
                          "{0}[{1}:{1}]".format(w, 4*i + 1),
                          "{0}[{1}:{1}]".format(w, 4*i + 0)]
-            #command += stpcommands.add4bitSbox(self.skinny_sbox, variables)
-            command += self.constraints_by_skinny_sbox(variables)
+            command += stpcommands.add4bitSbox(self.skinny_sbox, variables)
 
         # ShiftRows
         command += "ASSERT({1}[15:0] = {0}[15:0]);\n".format(sr, mc)
@@ -53,7 +53,7 @@ class Skinny128Cipher(AbstractCipher):
             print("Only blocksize of 128-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% Skinny w={}"
                       "rounds={}\n\n\n".format(blocksize, rounds))
             stp_file.write(header)
@@ -36,7 +36,7 @@ class SPARXRound128Cipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% SPARX w={}"
                       "rounds={}\n\n\n".format(wordsize,rounds))
             stp_file.write(header)
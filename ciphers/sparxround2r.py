@@ -35,7 +35,7 @@ class SPARXRound2RCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% SPARX w={}"
                       "rounds={}\n\n\n".format(wordsize,rounds))
             stp_file.write(header)
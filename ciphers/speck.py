@@ -43,7 +43,7 @@ class SpeckCipher(AbstractCipher):
             self.rot_alpha = parameters["rotationconstants"][0]
             self.rot_beta = parameters["rotationconstants"][1]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             stp_file.write("% Input File for STP\n% Speck w={} alpha={} beta={} "
                            "rounds={}\n\n\n".format(wordsize, self.rot_alpha,
                                                     self.rot_beta, rounds))
@@ -85,6 +85,15 @@ class SpeckCipher(AbstractCipher):
 
         return
 
+    def getRoundWeights(self, parameters):
+        """
+        Returns the weight of each round. The MSB does not contribute to the
+        weight.
+        """
+        return [stpcommands.getHammingWeightString("w{}".format(i),
+                                                   parameters["wordsize"], 1)
+                for i in range(parameters["rounds"])]
+
     def setupSpeckRound(self, stp_file, x_in, y_in, x_out, y_out, w, wordsize):
         """
         Model for differential behaviour of one round SPECK
@@ -43,7 +43,7 @@ class SpeckeyCipher(AbstractCipher):
         #    self.rot_alpha = parameters["rotationconstants"][0]
         #    self.rot_beta = parameters["rotationconstants"][1]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             stp_file.write("% Input File for STP\n% Speckey w={} alpha={} beta={} "
                            "rounds={}\n\n\n".format(wordsize, self.rot_alpha,
                                                     self.rot_beta, rounds))
@@ -1,23 +1,11 @@
 '''
 Created on Mar 1, 2019
+
+LAT of the SSb of SAND, with the entries #{x | a.x = b.SSb(x)} - 8.
 @author: Shawn
 '''
 
-LAT = [
-    (8, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, -2, 2, 0, 0, 2, 2, 0, 4, 2, -2, 0, 0, -2, -2, 0, 0, 4, 4, 0, 0, 4, -4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 4, -2, 2, 0, 0, 2, 2, 0, -4, -2, 2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -2, 2, 4, 0, -2, -2, 0, 4, 0, 0, 0, 4, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, 2, -2, -4, 0, 2, 2, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, -4, 0, 0, 0, 4, 0, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, 0, 2, 0, -2, 4, -2, 0, 2, 2, 0, 0, -2, -2, 0, 4, 2, -2, 0, 0, 2, -2, 4, 0, -2, 0, 2, 0, -2, 0, 2, 4, -2, 4, 2, 0, 2, 0, -2, 0, 2, 2, 0, 0, -2, -2, 0, -4, 2, 2, 4, 0, 2, 2, 0, 0, -2, 2, 0, 0, 2, -2, 0, 0, 2, 2, -4, 4, 2, 2, 0, 0, -2, -4, 2, 4, 2, 0, -2, 0, 2, 0, 2, 0, 2, 0, 2, 0, 2, -2, 0, 0, -2, 2, 0, 0, -2, 2, 0, 4, -2, 2, 4, 0, -2, 0, -2, -4, 2, 4, 2, 0, 2, 0, 2, 0, 2, 0, 2),
-    (0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 0, 2, -2, 0, 0, 2, 2, 4, 0, -2, 2, 0, 0, -2, -2, 0, 0, 4, 4, 0, 0, -4, 4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 4, 0, 2, -2, 0, 0, 2, 2, -4, 0, 2, -2, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, 2, -2, 0, 4, -2, -2, 4, 0, 0, 0, 4, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, -4, 0, 0, 0, 4, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, 2, 0, -2, 0, -2, 4, 2, 0, 0, 2, -2, 0, 0, -2, 2, 4, 0, -2, 2, 0, 4, -2, -2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, 4, 2, 0, -2, 0, 2, 0, 0, 2, -2, 0, 0, -2, 2, -4, 4, 2, 2, 0, 0, 2, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 4, 0, 2, -2, 0, 2, -4, 2, 4, -2, 0, 2, 0, 2, 0, 2, 0, 2, 0, 2, 0, 0, -2, -2, 0, 0, 2, -2, 0, 0, 2, -2, 4, 4, 2, -2, 0, -2, 0, 2, -4, 2, 4, 2, 0, 2, 0, 2, 0, 2, 0),
-    (0, 0, 4, 4, 0, 0, 4, -4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 4, -2, 2, 0, 0, 2, 2, 0, -4, -2, 2, 8, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, -2, 2, 0, 0, 2, 2, 0, 4, 2, -2, 0, 0, -2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, 2, -2, -4, 0, 2, 2, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -2, 2, 4, 0, -2, -2, 0, 4, 0, 0, 0, 4, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, -2, 0, 2, 0, -2, 0, 2, 4, -2, 4, 2, 0, 2, 0, -2, 0, 2, 2, 0, 0, -2, -2, 0, -4, 2, 2, 4, 0, 2, 2, 0, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, 0, 2, 0, -2, 4, -2, 0, 2, 2, 0, 0, -2, -2, 0, 4, 2, -2, 0, 0, 2, -2, 4, 0, 2, -2, 0, 0, -2, 2, 0, 0, -2, 2, 0, 4, -2, 2, 4, 0, -2, 0, -2, -4, 2, 4, 2, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 2, 0, 0, 2, -2, 0, 0, 2, 2, -4, 4, 2, 2, 0, 0, -2, -4, 2, 4, 2, 0, -2, 0, 2, 0, 2, 0, 2, 0, 2),
-    (0, 0, 4, 4, 0, 0, -4, 4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 4, 0, 2, -2, 0, 0, 2, 2, -4, 0, 2, -2, 0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 0, 2, -2, 0, 0, 2, 2, 4, 0, -2, 2, 0, 0, -2, -2, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, 2, -2, 0, 4, -2, -2, 4, 0, 0, 0, 4, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, -2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, 4, 2, 0, -2, 0, 2, 0, 0, 2, -2, 0, 0, -2, 2, -4, 4, 2, 2, 0, 0, 2, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, 2, 0, -2, 0, -2, 4, 2, 0, 0, 2, -2, 0, 0, -2, 2, 4, 0, -2, 2, 0, 4, -2, 2, 0, 0, -2, -2, 0, 0, 2, -2, 0, 0, 2, -2, 4, 4, 2, -2, 0, -2, 0, 2, -4, 2, 4, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 4, 0, 2, -2, 0, 2, -4, 2, 4, -2, 0, 2, 0, 2, 0, 2, 0, 2, 0),
-    (0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -2, 2, 4, 0, -2, -2, 0, 4, 0, 0, 0, 4, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, 2, -2, -4, 0, 2, 2, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, -4, 0, 0, 0, 4, 0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, -2, 2, 0, 0, 2, 2, 0, 4, 2, -2, 0, 0, -2, -2, 0, 0, 4, 4, 0, 0, 4, -4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 4, -2, 2, 0, 0, 2, 2, 0, -4, -2, 2, 0, -2, 2, 0, 0, 2, -2, 0, 0, 2, 2, -4, 4, 2, 2, 0, 0, -2, -4, 2, 4, 2, 0, -2, 0, 2, 0, 2, 0, 2, 0, 2, 0, 2, -2, 0, 0, -2, 2, 0, 0, -2, 2, 0, 4, -2, 2, 4, 0, -2, 0, -2, -4, 2, 4, 2, 0, 2, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, 0, 2, 0, -2, 4, -2, 0, 2, 2, 0, 0, -2, -2, 0, 4, 2, -2, 0, 0, 2, -2, 4, 0, -2, 0, 2, 0, -2, 0, 2, 4, -2, 4, 2, 0, 2, 0, -2, 0, 2, 2, 0, 0, -2, -2, 0, -4, 2, 2, 4, 0, 2, 2, 0),
-    (0, 0, -2, 2, 0, 4, 2, 2, 0, 0, 2, -2, 0, 4, -2, -2, 4, 0, 0, 0, 4, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, -4, 0, 0, 0, 4, 0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 0, 2, -2, 0, 0, 2, 2, 4, 0, -2, 2, 0, 0, -2, -2, 0, 0, 4, 4, 0, 0, -4, 4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 4, 0, 2, -2, 0, 0, 2, 2, -4, 0, 2, -2, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 4, 0, 2, -2, 0, 2, -4, 2, 4, -2, 0, 2, 0, 2, 0, 2, 0, 2, 0, 2, 0, 0, -2, -2, 0, 0, 2, -2, 0, 0, 2, -2, 4, 4, 2, -2, 0, -2, 0, 2, -4, 2, 4, 2, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, 2, 0, -2, 0, -2, 4, 2, 0, 0, 2, -2, 0, 0, -2, 2, 4, 0, -2, 2, 0, 4, -2, -2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, 4, 2, 0, -2, 0, 2, 0, 0, 2, -2, 0, 0, -2, 2, -4, 4, 2, 2, 0, 0, 2),
-    (0, 0, 2, -2, 4, 0, 2, 2, 0, 0, 2, -2, -4, 0, 2, 2, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -2, 2, 4, 0, -2, -2, 0, 4, 0, 0, 0, 4, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 4, 4, 0, 0, 4, -4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 0, 4, -2, 2, 0, 0, 2, 2, 0, -4, -2, 2, 8, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, -2, 2, 0, 0, 2, 2, 0, 4, 2, -2, 0, 0, -2, -2, 0, 2, -2, 0, 0, -2, 2, 0, 0, -2, 2, 0, 4, -2, 2, 4, 0, -2, 0, -2, -4, 2, 4, 2, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 2, 0, 0, 2, -2, 0, 0, 2, 2, -4, 4, 2, 2, 0, 0, -2, -4, 2, 4, 2, 0, -2, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, -2, 4, 2, 0, 2, 0, -2, 0, 2, 2, 0, 0, -2, -2, 0, -4, 2, 2, 4, 0, 2, 2, 0, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, 0, 2, 0, -2, 4, -2, 0, 2, 2, 0, 0, -2, -2, 0, 4, 2, -2, 0, 0, 2, -2, 4),
-    (0, 0, -2, 2, 0, 4, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, 2, -2, 0, 4, -2, -2, 4, 0, 0, 0, 4, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 0, 4, 4, 0, 0, -4, 4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 2, 2, 4, 0, 2, -2, 0, 0, 2, 2, -4, 0, 2, -2, 0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 0, 2, -2, 0, 0, 2, 2, 4, 0, -2, 2, 0, 0, -2, -2, 2, 0, 0, -2, -2, 0, 0, 2, -2, 0, 0, 2, -2, 4, 4, 2, -2, 0, -2, 0, 2, -4, 2, 4, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 4, 0, 2, -2, 0, 2, -4, 2, 4, -2, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, 4, 2, 0, -2, 0, 2, 0, 0, 2, -2, 0, 0, -2, 2, -4, 4, 2, 2, 0, 0, 2, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, 2, 0, -2, 0, -2, 4, 2, 0, 0, 2, -2, 0, 0, -2, 2, 4, 0, -2, 2, 0, 4, -2),
-    (0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 4, 2, -2, 0, 0, -2, -2, 0, 4, -2, 2, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 4, 0, 0, 4, -4, 0, 0, 2, 2, 0, -4, -2, 2, 0, 0, 2, 2, 0, 4, -2, 2, 0, 0, -2, 2, 4, 0, -2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, -4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, 2, -2, -4, 0, 2, 2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 4, 0, 0, 0, 4, 4, 2, 0, 2, 0, -2, 4, -2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -2, -2, 0, 4, -2, 4, 2, 0, 2, 0, -2, 0, -2, 0, 2, 0, -2, 0, 2, -4, 2, 2, 4, 0, 2, 2, 0, 0, 2, 2, 0, 0, -2, -2, 0, 0, 2, 2, -4, 4, 2, 2, 0, 0, -2, 2, 0, 0, 2, -2, 0, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, -4, 2, 4, 2, 0, -2, 0, -2, 2, 0, 4, -2, 2, 4, 0, 2, -2, 0, 0, -2, 2, 0, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, -2, -4, 2, 4, 2),
-    (0, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0, 0, 0, 0, 0, 4, 0, -2, 2, 0, 0, -2, -2, 4, 0, 2, -2, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 4, 0, 0, -4, 4, 0, 0, 2, 2, -4, 0, 2, -2, 0, 0, 2, 2, 4, 0, 2, -2, 0, 0, 2, -2, 0, 4, -2, -2, 0, 0, -2, 2, 0, 4, 2, 2, -4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, 0, -2, 2, 0, -4, 2, 2, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 4, 0, 0, 0, 4, 0, 2, 4, 2, 0, -2, 0, -2, 4, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, 0, -2, 2, 0, 4, -2, 2, 0, 0, 2, -2, 0, 0, -2, -2, 4, 2, 4, 2, 0, -2, 0, -2, 0, 2, 0, -2, 0, 2, 0, 2, -4, 4, 2, 2, 0, 0, 2, 2, 0, 0, 2, -2, 0, 0, -2, 2, 0, -4, 2, 2, 4, 0, 2, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 2, -4, 2, 4, -2, 0, -2, 0, 0, 2, -2, 4, 4, 2, 2, 0, 0, -2, -2, 0, 0, 2, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, -2, 0, 2, -4, 2, 4),
-    (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 4, 0, 0, 4, -4, 0, 0, 2, 2, 0, -4, -2, 2, 0, 0, 2, 2, 0, 4, -2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 4, 2, -2, 0, 0, -2, -2, 0, 4, -2, 2, 0, 0, 2, 2, 0, 0, 2, -2, -4, 0, 2, 2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, -2, 2, 4, 0, -2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, -4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 4, -2, 4, 2, 0, 2, 0, -2, 0, -2, 0, 2, 0, -2, 0, 2, -4, 2, 2, 4, 0, 2, 2, 0, 0, 2, 2, 0, 0, -2, -2, 0, 4, 2, 0, 2, 0, -2, 4, -2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -2, -2, 0, 0, -2, 2, 0, 4, -2, 2, 4, 0, 2, -2, 0, 0, -2, 2, 0, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, -2, -4, 2, 4, 2, 0, 2, 2, -4, 4, 2, 2, 0, 0, -2, 2, 0, 0, 2, -2, 0, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, -4, 2, 4, 2, 0, -2),
-    (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 4, 0, 0, -4, 4, 0, 0, 2, 2, -4, 0, 2, -2, 0, 0, 2, 2, 4, 0, 2, -2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0, 0, 0, 0, 0, 4, 0, -2, 2, 0, 0, -2, -2, 4, 0, 2, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, -4, 2, 2, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 2, -2, 0, 4, -2, -2, 0, 0, -2, 2, 0, 4, 2, 2, -4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, -2, 4, 2, 4, 2, 0, -2, 0, -2, 0, 2, 0, -2, 0, 2, 0, 2, -4, 4, 2, 2, 0, 0, 2, 2, 0, 0, 2, -2, 0, 0, -2, 2, 4, 2, 0, -2, 0, -2, 4, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, 0, -2, 2, 0, 4, -2, 2, 0, 0, 2, -2, 0, 0, -2, -2, 0, 0, 2, -2, 4, 4, 2, 2, 0, 0, -2, -2, 0, 0, 2, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, -2, 0, 2, -4, 2, 4, 2, 0, -4, 2, 2, 4, 0, 2, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 2, -4, 2, 4, -2, 0),
-    (0, 0, -2, 2, 4, 0, -2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, -4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, 2, -2, -4, 0, 2, 2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 4, 2, -2, 0, 0, -2, -2, 0, 4, -2, 2, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 4, 0, 0, 4, -4, 0, 0, 2, 2, 0, -4, -2, 2, 0, 0, 2, 2, 0, 4, -2, 2, 0, 2, 2, -4, 4, 2, 2, 0, 0, -2, 2, 0, 0, 2, -2, 0, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, -4, 2, 4, 2, 0, -2, 0, -2, 2, 0, 4, -2, 2, 4, 0, 2, -2, 0, 0, -2, 2, 0, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, -2, -4, 2, 4, 2, 4, 2, 0, 2, 0, -2, 4, -2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -2, -2, 0, 4, -2, 4, 2, 0, 2, 0, -2, 0, -2, 0, 2, 0, -2, 0, 2, -4, 2, 2, 4, 0, 2, 2, 0, 0, 2, 2, 0, 0, -2, -2, 0),
-    (0, 0, 2, -2, 0, 4, -2, -2, 0, 0, -2, 2, 0, 4, 2, 2, -4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, 0, -2, 2, 0, -4, 2, 2, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0, 0, 0, 0, 0, 4, 0, -2, 2, 0, 0, -2, -2, 4, 0, 2, -2, 0, 0, 2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 4, 0, 0, -4, 4, 0, 0, 2, 2, -4, 0, 2, -2, 0, 0, 2, 2, 4, 0, 2, -2, 2, 0, -4, 2, 2, 4, 0, 2, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 2, -4, 2, 4, -2, 0, -2, 0, 0, 2, -2, 4, 4, 2, 2, 0, 0, -2, -2, 0, 0, 2, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, -2, 0, 2, -4, 2, 4, 2, 4, 2, 0, -2, 0, -2, 4, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, 0, -2, 2, 0, 4, -2, 2, 0, 0, 2, -2, 0, 0, -2, -2, 4, 2, 4, 2, 0, -2, 0, -2, 0, 2, 0, -2, 0, 2, 0, 2, -4, 4, 2, 2, 0, 0, 2, 2, 0, 0, 2, -2, 0, 0, -2),
-    (0, 0, 2, -2, -4, 0, 2, 2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -4, 0, 0, 0, 4, 0, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, -2, 2, 4, 0, -2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, -4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 4, 0, 0, 4, -4, 0, 0, 2, 2, 0, -4, -2, 2, 0, 0, 2, 2, 0, 4, -2, 2, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0, 0, 0, 0, 0, 0, 0, 4, 2, -2, 0, 0, -2, -2, 0, 4, -2, 2, 0, 0, 2, 2, 0, -2, 2, 0, 4, -2, 2, 4, 0, 2, -2, 0, 0, -2, 2, 0, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, -2, -4, 2, 4, 2, 0, 2, 2, -4, 4, 2, 2, 0, 0, -2, 2, 0, 0, 2, -2, 0, 0, 2, 0, 2, 0, 2, 0, 2, 0, -2, -4, 2, 4, 2, 0, -2, 4, -2, 4, 2, 0, 2, 0, -2, 0, -2, 0, 2, 0, -2, 0, 2, -4, 2, 2, 4, 0, 2, 2, 0, 0, 2, 2, 0, 0, -2, -2, 0, 4, 2, 0, 2, 0, -2, 4, -2, 0, 2, 0, -2, 0, 2, 0, -2, 4, 2, -2, 0, 0, 2, -2, 4, 0, 2, 2, 0, 0, -2, -2, 0),
-    (0, 0, -2, 2, 0, -4, 2, 2, 0, 0, -2, 2, 0, 4, 2, 2, 0, 0, 0, -4, 0, 0, 0, 4, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 2, -2, 0, 4, -2, -2, 0, 0, -2, 2, 0, 4, 2, 2, -4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 4, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 4, 4, 0, 0, -4, 4, 0, 0, 2, 2, -4, 0, 2, -2, 0, 0, 2, 2, 4, 0, 2, -2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 8, 0, 0, 0, 0, 0, 0, 4, 0, -2, 2, 0, 0, -2, -2, 4, 0, 2, -2, 0, 0, 2, 2, -2, 0, 0, 2, -2, 4, 4, 2, 2, 0, 0, -2, -2, 0, 0, 2, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, -2, 0, 2, -4, 2, 4, 2, 0, -4, 2, 2, 4, 0, 2, -2, 0, 0, 2, 2, 0, 0, -2, 2, 0, 2, 0, 2, 0, 2, 0, -2, 0, 2, -4, 2, 4, -2, 0, -2, 4, 2, 4, 2, 0, -2, 0, -2, 0, 2, 0, -2, 0, 2, 0, 2, -4, 4, 2, 2, 0, 0, 2, 2, 0, 0, 2, -2, 0, 0, -2, 2, 4, 2, 0, -2, 0, -2, 4, 2, 0, -2, 0, 2, 0, -2, 0, 2, 4, 0, -2, 2, 0, 4, -2, 2, 0, 0, 2, -2, 0, 0, -2),
-]
+from parser import sboxtables
+from ciphers.ssb_ddt import SSB
+
+LAT = sboxtables.getLAT(SSB, 8).tolist()
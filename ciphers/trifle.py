@@ -19,30 +19,11 @@ class TrifleCipher(AbstractCipher):
     # trifle's Sbox lookup table
     trifle_sbox = [0, 12, 9, 7, 3, 5, 14, 4, 6, 11, 10, 2, 13, 1, 8, 15]
 
-    trifle_sbox_rpos = "(p1 | ~p0) & (~p2 | p0) & (~b3 | p0) & (b3 | b2 | b1 | b0 | ~p1) & (~a0 | p0) & (a3 | a2 | a1 | a0 | ~p0) & (a3 | b2 | b0 | p2 | ~p0) & (~a2 | ~a1 | b2 | ~b1 | p2) & (~a3 | a0 | b2 | ~b0 | p2) & (~a2 | b3 | ~b2 | ~b1 | p2) & (a0 | b3 | ~b2 | b1 | p2) & (a2 | ~a1 | a0 | b3 | b0) & (a1 | ~a0 | b3 | ~b1 | p2) & (~a1 | ~a0 | b1 | ~b0 | p2) & (a3 | ~b3 | ~b1 | ~b0 | p2) & (a3 | a1 | ~a0 | b3 | b2) & (a2 | ~b3 | ~b2 | ~b0 | p2) & (a2 | a1 | b3 | ~b0 | p2) & (~a3 | ~a0 | b1 | b0 | p2) & (~a3 | a2 | a0 | b2 | b1) & (a2 | ~a1 | ~b2 | b0 | p2) & (a3 | ~a2 | ~b3 | b1 | p2) & (a3 | a1 | a0 | b3 | b1 | ~b0) & (~a3 | a1 | b1 | b0 | p2) & (~a1 | a0 | b3 | p2) & (a3 | ~a2 | a1 | b1 | b0) & (~b1 | p0) & (a1 | ~a0 | b3 | ~b2 | b1 | ~p2) & (~a3 | ~a1 | ~a0 | b2 | ~b1 | ~b0) & (~a3 | ~a0 | b3 | ~b2 | ~b1 | ~b0) & (~a3 | ~a2 | a1 | a0 | ~b1 | ~b0) & (~a3 | a1 | ~b3 | b2 | b1 | ~b0) & (a3 | a1 | ~b2 | b1 | b0 | ~p2) & (a1 | ~b3 | ~b1 | b0 | p2) & (~a3 | ~a2 | ~b3 | b2 | ~b1 | ~b0) & (~a2 | ~a1 | ~a0 | ~b2 | ~b1 | b0) & (~a3 | ~a2 | a1 | b2 | ~b1 | b0) & (a2 | ~a1 | a0 | b3 | ~b2 | ~b1) & (a3 | a2 | b3 | b2 | ~b1 | ~b0) & (a1 | a0 | ~b3 | ~b2 | ~b1 | ~b0) & (~a3 | a2 | a1 | ~a0 | ~b2 | ~b1) & (~a3 | a1 | a0 | ~b3 | ~b2 | b1 | ~p2) & (~a3 | ~a2 | ~a1 | ~a0 | ~b3 | ~b2 | ~p2) & (a3 | ~a1 | ~a0 | b3 | ~b2 | ~b1 | ~p2) & (~a3 | ~a2 | a1 | ~a0 | b1 | ~b0 | ~p2) & (~a2 | ~a1 | ~b3 | ~b2 | b1 | ~b0) & (a3 | a2 | ~b3 | ~b2 | ~b1 | ~b0) & (a3 | a2 | ~a1 | ~a0 | ~b3 | ~b2) & (a3 | ~a2 | ~a1 | a0 | ~b3 | ~b0) & (~a2 | ~a1 | a0 | b3 | b1 | ~b0) & (~a2 | ~a1 | a0 | ~b3 | ~b2 | b0 | ~p2) & (a3 | ~a1 | ~a0 | ~b3 | b2 | b0) & (~a3 | a1 | ~a0 | ~b2 | p2) & (~a3 | a2 | ~a1 | b2 | b0 | ~p2) & (~a3 | ~a1 | a0 | b2 | b0 | ~p2) & (a2 | a0 | b2 | b0 | ~p2) & (a3 | ~a2 | ~a0 | b3 | b1 | ~p2) & (a2 | ~a1 | ~a0 | ~b3 | ~b1 | b0) & (~a3 | ~a1 | a0 | ~b2 | p2) & (a1 | b2 | b0 | p2 | ~p0) & (a3 | a1 | ~a0 | b2 | ~b1 | ~b0) & (a2 | a1 | ~a0 | b2 | ~b1 | ~b0 | ~p2) & (a3 | ~a2 | a1 | ~b3 | ~b2 | b0) & (~a3 | a2 | ~a0 | b3 | ~b2 | b1) & (a2 | a0 | b3 | ~b1 | b0 | ~p2) & (a2 | a0 | ~b3 | b2 | b1 | ~p2) & (a3 | a0 | b3 | ~b2 | ~b1 | b0) & (a2 | a1 | ~b3 | b2 | b1 | ~b0) & (a1 | b3 | b1 | b0 | p2 | ~p0) & (~a3 | a2 | a0 | ~b3 | b1 | ~b0) & (~a3 | ~a2 | ~a0 | ~b3 | b1 | ~b0) & (a3 | a1 | b3 | b2 | ~b0 | ~p2)"
-
     def BP(self, i):
         # Bp stands for BitPermutation
         output = (i / 4) + ((i % 4) * 32)
         return output
 
-    def constraints_by_trifle_sbox(self, variables):
-        """
-        generate constarints related to sbox
-        """
-        di = variables[0:4]
-        do = variables[4:8]
-        w = variables[9:12]
-        command = self.trifle_sbox_rpos
-        for i in range(4):
-            command = command.replace("a%d" % (3 - i), di[i])
-            command = command.replace("b%d" % (3 - i), do[i])
-            if i <= 2:
-                command = command.replace("p%d" % (2 - i), w[i])
-        command = "ASSERT(%s = 0bin1);\n" % command
-        command += "ASSERT(%s = 0bin0);\n" % variables[8]
-        return command
-
     def getFormatString(self):
         """
         Returns the print format.
@@ -63,7 +44,7 @@ class TrifleCipher(AbstractCipher):
             print("Only wordsize of 128-bit supported.")
             exit(1)
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% trifle w={} "
                       "rounds={}\n\n\n".format(wordsize, rounds))
             stp_file.write(header)
@@ -132,8 +113,7 @@ class TrifleCipher(AbstractCipher):
                          "{0}[{1}:{1}]".format(w, 4*i + 2),
                          "{0}[{1}:{1}]".format(w, 4*i + 1),
                          "{0}[{1}:{1}]".format(w, 4*i + 0)]            
-            #command += stpcommands.add4bitSbox(self.trifle_sbox, variables)
-            command += self.constraints_by_trifle_sbox(variables)            
+            command += stpcommands.add4bitSbox(self.trifle_sbox, variables)
         # BitPermutation Layer
         # zr = PermuteNibbles(xr)
         # zr[i] = xr[PN[i]]
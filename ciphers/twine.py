@@ -31,7 +31,7 @@ class TwineCipher(AbstractCipher):
         rounds = parameters["rounds"]
         weight = parameters["sweight"]
 
-        with open(stp_filename, 'w') as stp_file:
+        with stpcommands.openModel(stp_filename) as stp_file:
             header = ("% Input File for STP\n% TWINE w={}"
                       "rounds={}\n\n\n".format(wordsize,rounds))
             stp_file.write(header)
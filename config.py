@@ -2,6 +2,7 @@
 PATH_STP = "../stp/build/stp"
 PATH_CRYPTOMINISAT = "../cryptominisat/build/cryptominisat5"
 PATH_BOOLECTOR = "../boolector/build/bin/boolector"
+PATH_APPROXMC = "../approxmc/build/approxmc"
 #Maximum weight for characteristics to search for
 MAX_WEIGHT = 1000
 #Maximum number of characteristics to search for a differential
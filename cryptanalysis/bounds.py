@@ -0,0 +1,102 @@
+'''
+Matsui-style bounding conditions for the SAT model. The optimal weights
+B_i of the shorter round counts are used to restrict the weight of every
+prefix and suffix of the trail.
+'''
+
+
+def canUseRoundBounds(cipher, parameters, verbose=True):
+    """
+    Returns True if the round bounds are valid lower bounds for the model.
+    The bounds are only sound if the trail is not restricted in any other
+    way, as B_i is the optimal weight of an unrestricted i-round trail.
+    The reason is printed if verbose is set.
+    """
+    if not parameters["matsuibounds"] or not parameters["roundbounds"]:
+        return False
+
+    if cipher.getRoundWeights(parameters) is None:
+        if verbose:
+            print("WARNING: {} does not provide the weight of each round, "
+                  "round bounds are not used.".format(cipher.name))
+        return False
+
+    if parameters["fixedVariables"] or parameters["iterative"] or \
+       parameters["blockedCharacteristics"]:
+        if verbose:
+            print("WARNING: Round bounds are not used for restricted trails.")
+        return False
+
+    return True
+
+
+def getRoundBoundAssertions(cipher, parameters):
+    """
+    Returns the assertions that the weight of the first i and the last i
+    rounds is at least B_i for all known bounds with i < rounds.
+    """
+    if not canUseRoundBounds(cipher, parameters):
+        return []
+
+    rounds = parameters["rounds"]
+    round_weights = cipher.getRoundWeights(parameters)
+
+    assertions = []
+    for length, bound in sorted(parameters["roundbounds"].items()):
+        if length >= rounds or bound <= 0:
+            continue
+        prefix = round_weights[:length]
+        suffix = round_weights[rounds - length:]
+        for partial_weights in [prefix, suffix]:
+            assertions.append("BVGE({}, {:#018b})".format(
+                getSumString(partial_weights), bound))
+    return assertions
+
+
+def getRoundBoundWeight(parameters):
+    """
+    Returns the lower bound max(B_i + B_{rounds - i}) for the weight of the
+    whole trail, or 0 if no bound is known.
+    """
+    rounds = parameters["rounds"]
+    bounds = parameters["roundbounds"]
+
+    weight = 0
+    for length in range(1, rounds):
+        if length in bounds and (rounds - length) in bounds:
+            weight = max(weight, bounds[length] + bounds[rounds - length])
+    return weight
+
+
+def getLowerBound(cipher, parameters):
+    """
+    Returns the lower bound for the weight of the trail which follows from
+    the known optimal weights of fewer rounds. The bound B_i + B_{rounds - i}
+    is only used if the round bounds are valid for the model.
+    """
+    rounds = parameters["rounds"]
+    weight = max([bound for length, bound in parameters["roundbounds"].items()
+                  if length <= rounds], default=0)
+    if canUseRoundBounds(cipher, parameters, verbose=False):
+        weight = max(weight, getRoundBoundWeight(parameters))
+    return weight
+
+
+def updateRoundBounds(cipher, parameters):
+    """
+    Adds the optimal weights found by concurrent searches for other round
+    counts from the shared bound table and returns the lower bound for the
+    weight of the trail.
+    """
+    if parameters.get("boundtable") is not None:
+        parameters["roundbounds"].update(parameters["boundtable"].items())
+    return getLowerBound(cipher, parameters)
+
+
+def getSumString(weights):
+    """
+    Returns the 16-bit sum of the given weights.
+    """
+    if len(weights) == 1:
+        return weights[0]
+    return "BVPLUS(16, {})".format(", ".join(weights))
@@ -0,0 +1,162 @@
+'''
+Checkpoints for long running searches. If --checkpoint or --resume is given,
+the state of the search is written after every completed round or weight,
+so that a search can be resumed with --resume without solving the proven
+cases again.
+'''
+
+from cryptanalysis import diffchars
+
+import json
+import os
+
+# Parameters which have to match to resume from a checkpoint
+CHECKPOINT_PARAMETERS = ["cipher", "mode", "wordsize", "blocksize", "iterative",
+                         "fixedVariables", "nummessages", "approxmc",
+                         "symmetry", "weightencoding", "sweight", "endweight"]
+
+
+def getCheckpointFile(cipher, parameters):
+    """
+    Returns the path of the checkpoint file. If none is given in the
+    parameters it is derived from the search parameters.
+    """
+    if parameters["checkpoint"] is None:
+        parameters["checkpoint"] = "tmp/{}-wd{}-{}r-mode{}.checkpoint".format(
+            cipher.name, parameters["wordsize"], parameters["rounds"],
+            parameters["mode"])
+    return parameters["checkpoint"]
+
+
+def getCheckpointKey(cipher, parameters):
+    """
+    Returns the parameters which identify the search. It is computed when
+    the search starts, as the weight and the rounds change afterwards.
+    """
+    key = {name: parameters.get(name) for name in CHECKPOINT_PARAMETERS}
+    key["cipher"] = cipher.name
+    # The number of rounds changes during the search in mode 1
+    if parameters["mode"] != 1:
+        key["rounds"] = parameters["rounds"]
+    return key
+
+
+def saveCheckpoint(cipher, parameters, state):
+    """
+    Writes the state of the search to the checkpoint file. The file is
+    replaced atomically, so a crash never leaves a broken checkpoint.
+    """
+    if parameters.get("checkpointkey") is None:
+        return
+
+    checkpoint_file = getCheckpointFile(cipher, parameters)
+    checkpoint = {"key" : parameters["checkpointkey"],
+                  "state" : state}
+
+    with open(checkpoint_file + ".tmp", "w") as output_file:
+        json.dump(checkpoint, output_file, indent=1)
+    os.replace(checkpoint_file + ".tmp", checkpoint_file)
+    return
+
+
+def loadCheckpoint(cipher, parameters):
+    """
+    Returns the state stored in the checkpoint file if the search should be
+    resumed, otherwise an empty state. Checkpoints are only written if
+    --checkpoint or --resume is given, so that searches on the same host do
+    not share the default checkpoint file.
+    """
+    if parameters["checkpoint"] is None and not parameters["resume"]:
+        parameters["checkpointkey"] = None
+        return {}
+
+    parameters["checkpointkey"] = getCheckpointKey(cipher, parameters)
+    checkpoint_file = getCheckpointFile(cipher, parameters)
+    if not parameters["resume"]:
+        return {}
+
+    if not os.path.isfile(checkpoint_file):
+        print("No checkpoint found at {}, starting a new search.".format(
+            checkpoint_file))
+        return {}
+
+    with open(checkpoint_file, "r") as input_file:
+        checkpoint = json.load(input_file)
+
+    if checkpoint["key"] != parameters["checkpointkey"]:
+        print("ERROR: The checkpoint {} belongs to a different search.".format(
+            checkpoint_file))
+        exit(1)
+
+    print("Resuming from checkpoint {}".format(checkpoint_file))
+    return checkpoint["state"]
+
+
+def getCharacteristicLog(cipher, parameters):
+    """
+    Returns the path of the log next to the checkpoint file, to which the
+    characteristics blocked in mode 2 are appended one per line.
+    """
+    return getCheckpointFile(cipher, parameters) + ".log"
+
+
+def clearCharacteristicLog(cipher, parameters):
+    """
+    Removes the characteristics logged by a previous search.
+    """
+    if parameters.get("checkpointkey") is None:
+        return
+
+    log_file = getCharacteristicLog(cipher, parameters)
+    if os.path.isfile(log_file):
+        os.remove(log_file)
+    return
+
+
+def appendCharacteristic(cipher, parameters, characteristic):
+    """
+    Appends a blocked characteristic to the log and returns the size of the
+    log, which is stored in the checkpoint.
+    """
+    if parameters.get("checkpointkey") is None:
+        return 0
+
+    with open(getCharacteristicLog(cipher, parameters), "a") as log_file:
+        log_file.write(json.dumps(getCharacteristicState(characteristic)))
+        log_file.write("\n")
+        return log_file.tell()
+
+
+def loadCharacteristicLog(cipher, parameters, log_size):
+    """
+    Returns the characteristics in the first log_size bytes of the log.
+    Characteristics appended after the checkpoint was written are removed.
+    """
+    log_file = getCharacteristicLog(cipher, parameters)
+    if not os.path.isfile(log_file) or os.path.getsize(log_file) < log_size:
+        print("ERROR: The characteristic log {} does not match the "
+              "checkpoint.".format(log_file))
+        exit(1)
+    os.truncate(log_file, log_size)
+
+    with open(log_file, "r") as input_file:
+        return [getCharacteristicFromState(json.loads(line), cipher)
+                for line in input_file]
+
+
+def getCharacteristicState(characteristic):
+    """
+    Returns the data of a characteristic which is stored in a checkpoint.
+    """
+    return {"data" : characteristic.characteristic_data,
+            "rounds" : characteristic.num_rounds,
+            "weight" : characteristic.weight}
+
+
+def getCharacteristicFromState(state, cipher):
+    """
+    Reconstructs a characteristic stored in a checkpoint.
+    """
+    return diffchars.DifferentialCharacteristic(state["data"], cipher,
+                                                state["rounds"],
+                                                state["weight"])
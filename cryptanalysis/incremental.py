@@ -0,0 +1,658 @@
+'''
+Keeps a single solver session alive across a weight scan instead of
+regenerating the model and restarting the solver for every weight.
+'''
+
+from parser import (parsesolveroutput, stpcommands, cnfcommands, modelir,
+                    cardinality)
+from cryptanalysis import bounds, workspace, diffchars, modelcache, symmetry
+from config import PATH_STP, PATH_BOOLECTOR, PATH_CRYPTOMINISAT
+
+import io
+import os
+import re
+import shlex
+import subprocess
+import threading
+
+# The Python bindings are only needed for the pysat and maxsat backends
+try:
+    import pysat.solvers
+    import pysat.formula
+    import pysat.examples.rc2
+except ImportError:
+    pysat = None
+
+try:
+    import pycryptosat
+except ImportError:
+    pycryptosat = None
+
+# Printed by the solver after each query to mark the end of its output
+END_OF_QUERY = "cryptosmt-end-of-query"
+
+# Conflicts of the solver with the phases for each seed and query
+SEED_CONFLICTS = 1000
+
+
+def getCVCModel(cipher, parameters):
+    """
+    Returns the model for the given parameters in CVC format without the
+    weight assertion and without the query. The round bounds are added to
+    the model if enabled.
+    """
+    model = modelcache.getModelBody(cipher, parameters)
+    model += modelcache.getConstraints(parameters)
+
+    for assertion in bounds.getRoundBoundAssertions(cipher, parameters):
+        model += "ASSERT({});\n".format(assertion)
+    for assertion in symmetry.getSymmetryAssertions(cipher, parameters):
+        model += "ASSERT({});\n".format(assertion)
+    return model
+
+
+def getNativeSMT2Model(cipher, parameters):
+    """
+    Returns the model in SMT-LIB2 format generated directly from the
+    description of the cipher (see parser.modelir) without the weight
+    assertion, or None if the cipher does not provide it.
+    """
+    # The round bounds and the symmetry are only available as CVC expressions
+    if parameters["matsuibounds"] and parameters["roundbounds"]:
+        return None
+    if symmetry.getSymmetry(cipher, parameters) is not None:
+        return None
+
+    free_parameters = dict(parameters)
+    free_parameters["sweight"] = None
+    model = cipher.createModel(free_parameters)
+    if model is None:
+        return None
+    return modelir.getSMT2(model, free_parameters)
+
+
+def getSMT2Model(cipher, parameters, stp_file):
+    """
+    Returns the model for the given parameters in SMT-LIB2 format without
+    the weight assertion and without the final check-sat. The weight is
+    added later for each query as a retractable assertion. Ciphers which
+    are not described by parser.modelir are translated by STP.
+    """
+    native_model = getNativeSMT2Model(cipher, parameters)
+    if native_model is not None:
+        workspace.writeModelFile(parameters,
+                                 os.path.splitext(stp_file)[0] + ".smt2",
+                                 native_model)
+        return native_model
+
+    model = io.StringIO()
+    model.write(getCVCModel(cipher, parameters))
+    stpcommands.setupQuery(model)
+    workspace.writeModelFile(parameters, stp_file, model.getvalue())
+
+    stp_parameters = [PATH_STP, "--print-back-SMTLIB2", "--CVC"]
+    model = subprocess.check_output(stp_parameters,
+                                    input=model.getvalue().encode("utf-8"))
+    model = model.decode("utf-8")
+
+    return "\n".join(line for line in model.split("\n")
+                     if line.strip() not in ("(check-sat)", "(exit)")) + "\n"
+
+
+def getBlockingAssertion(characteristic):
+    """
+    Returns the SMT-LIB2 assertion which excludes the state words of the
+    characteristic.
+    """
+    equalities = []
+    for var_name, var_value in sorted(
+            stpcommands.getBlockedWords(characteristic).items()):
+        if var_value.startswith("0b"):
+            equalities.append("(= {} #b{})".format(var_name, var_value[2:]))
+        else:
+            equalities.append("(= {} #x{})".format(var_name, var_value[2:]))
+
+    if len(equalities) == 1:
+        return "(not {})".format(equalities[0])
+    return "(not (and {}))".format(" ".join(equalities))
+
+
+class BoolectorSession(object):
+    """
+    A long running Boolector process in incremental mode. The round model
+    is loaded once and every weight is checked inside its own push/pop
+    scope, so learned clauses are kept for the whole search.
+    """
+
+    process = None
+    cardinality = False
+
+    def __init__(self, model):
+        # The weight is counted by a cardinality network in the model
+        self.cardinality = "weightge" in model
+        boolector_parameters = [PATH_BOOLECTOR, "--smt2", "-i", "-x", "-m"]
+        self.process = subprocess.Popen(boolector_parameters,
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        universal_newlines=True)
+        self.process.stdin.write(model)
+        self.process.stdin.flush()
+        return
+
+    def write(self, command):
+        """
+        Sends a command to the solver.
+        """
+        self.process.stdin.write(command)
+        self.process.stdin.flush()
+        return
+
+    def check(self):
+        """
+        Checks the current assertions and returns the output of the solver.
+        """
+        self.write("(check-sat)\n(echo \"{}\")\n".format(END_OF_QUERY))
+
+        result = ""
+        for line in self.process.stdout:
+            if END_OF_QUERY in line:
+                break
+            result += line
+        return result
+
+    def query(self, assertions):
+        """
+        Checks the model together with the given assertions and returns
+        the output of the solver for this query. The assertions are removed
+        again afterwards.
+        """
+        command = "(push 1)\n"
+        for assertion in assertions:
+            command += "(assert {})\n".format(assertion)
+        self.write(command)
+        result = self.check()
+        self.write("(pop 1)\n")
+        return result
+
+    def enumerateCharacteristics(self, weight, cipher, rounds):
+        """
+        Yields all characteristics with the given weight. Each characteristic
+        is excluded by a blocking assertion on its state words before the
+        solver continues, so the whole enumeration uses a single process.
+        """
+        self.write("(push 1)\n")
+        for assertion in self.getWeightAssertions(weight):
+            self.write("(assert {})\n".format(assertion))
+        try:
+            while True:
+                result = self.check()
+                if "unsat" in result:
+                    return
+                if "sat" not in result:
+                    print("ERROR: Unexpected output of boolector:\n" + result)
+                    return
+                characteristic = self.getCharacteristic(result, cipher, rounds)
+                yield characteristic
+                self.write("(assert {})\n".format(
+                    getBlockingAssertion(characteristic)))
+        finally:
+            self.write("(pop 1)\n")
+
+    def getWeightAssertions(self, weight, bound=False):
+        """
+        Returns the assertions weight = w, or weight <= w if bound is set.
+        """
+        if self.cardinality and weight <= stpcommands.WEIGHT_LIMIT:
+            assertions = ["(= ((_ extract {0} {0}) weightge) #b0)".format(
+                weight + 1)]
+            if not bound:
+                assertions.append("(= ((_ extract {0} {0}) weightge) #b1)".format(
+                    weight))
+            return assertions
+        if bound:
+            return ["(bvule weight (_ bv{} 16))".format(weight)]
+        return ["(= weight (_ bv{} 16))".format(weight)]
+
+    def checkWeight(self, weight, bound=False):
+        """
+        Checks if there is a solution with exactly the given weight, or with
+        at most the given weight if bound is set.
+        """
+        return self.query(self.getWeightAssertions(weight, bound))
+
+    def getCharacteristic(self, result, cipher, rounds):
+        """
+        Parse the output of a query and construct a characteristic.
+        """
+        return parsesolveroutput.getCharBoolectorOutput(result, cipher, rounds)
+
+    def close(self):
+        """
+        Terminates the solver process.
+        """
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+        return
+
+
+class STPSession(object):
+    """
+    Keeps the model without weight assertion in memory and only appends the
+    weight bound for each query. The solver is still restarted for every
+    query, but the cipher model is generated only once.
+    """
+
+    model = None
+    solve = None
+    boolector = False
+    cardinality = False
+
+    def __init__(self, model, solve, boolector=False):
+        self.model = model
+        self.solve = solve
+        self.boolector = boolector
+        # The weight is counted by a cardinality network in the model
+        self.cardinality = "weightge:" in model
+        return
+
+    def getQuery(self, assertions):
+        """
+        Returns the model together with the given assertions and the query.
+        """
+        query = io.StringIO()
+        query.write(self.model)
+        for assertion in assertions:
+            query.write("ASSERT({});\n".format(assertion))
+        stpcommands.setupQuery(query)
+        return query.getvalue()
+
+    def query(self, assertions):
+        """
+        Returns the output of the solver for the model together with the
+        given assertions.
+        """
+        return self.solve(self.getQuery(assertions))
+
+    def getWeightAssertion(self, weight, bound=False):
+        """
+        Returns the assertion weight = w, or weight <= w if bound is set.
+        """
+        return stpcommands.getWeightAssertion(weight, bound, self.cardinality)
+
+    def checkWeight(self, weight, bound=False):
+        """
+        Checks if there is a solution with exactly the given weight, or with
+        at most the given weight if bound is set.
+        """
+        return self.query([self.getWeightAssertion(weight, bound)])
+
+    def getCharacteristic(self, result, cipher, rounds):
+        """
+        Parse the output of a query and construct a characteristic.
+        """
+        if self.boolector:
+            return parsesolveroutput.getCharBoolectorOutput(result, cipher,
+                                                            rounds)
+        return parsesolveroutput.getCharSTPOutput(result, cipher, rounds)
+
+    def close(self):
+        return
+
+
+class CNFSession(object):
+    """
+    Keeps the CNF of the model without weight constraint in memory and adds
+    a cardinality constraint on the weight for each query, which is passed
+    to a DIMACS solver over stdin.
+    """
+
+    model = None
+    solver = None
+    stp_file = None
+    parameters = None
+
+    def __init__(self, model, solver, stp_file, parameters):
+        self.model = model
+        self.solver = solver
+        self.stp_file = stp_file
+        self.parameters = parameters
+        return
+
+    def checkWeight(self, weight, bound=False):
+        """
+        Checks if there is a solution with exactly the given weight, or with
+        at most the given weight if bound is set.
+        """
+        query = self.model.copy()
+        query.assertWeight(weight, bound)
+        cnf = query.getDIMACS()
+        workspace.writeModelFile(self.parameters, self.stp_file[:-4] + ".cnf",
+                                 cnf)
+
+        result = subprocess.run(self.solver, input=cnf.encode("utf-8"),
+                                stdout=subprocess.PIPE)
+        output = result.stdout.decode("utf-8")
+        # The solver has to print the status line, otherwise it crashed
+        if not re.search(r"^s (UN)?SATISFIABLE", output, re.MULTILINE):
+            print("ERROR: The SAT solver {} failed with return code {}.".format(
+                " ".join(self.solver), result.returncode))
+            exit(1)
+        return output
+
+    def getCharacteristic(self, result, cipher, rounds):
+        """
+        Parse the output of the SAT solver and construct a characteristic.
+        Returns None if the output contains no solution.
+        """
+        assignment = cnfcommands.parseSolution(result)
+        if assignment is None:
+            return None
+        values, weight = self.model.getValues(assignment)
+        return diffchars.DifferentialCharacteristic(values, cipher, rounds,
+                                                    weight)
+
+    def close(self):
+        return
+
+
+class CryptoMiniSatSolver(object):
+    """
+    Wraps pycryptosat.Solver in the interface of the PySAT solvers.
+    """
+
+    solver = None
+    solution = None
+
+    def __init__(self):
+        self.solver = pycryptosat.Solver()
+        return
+
+    def add_clause(self, clause):
+        self.solver.add_clause(clause)
+        return
+
+    def solve(self, assumptions=None):
+        satisfiable, self.solution = self.solver.solve(assumptions or [])
+        return satisfiable
+
+    def get_model(self):
+        return [variable if value else -variable
+                for variable, value in enumerate(self.solution) if variable > 0]
+
+    def delete(self):
+        return
+
+
+def getPhaseSeeds(model, parameters):
+    """
+    Returns the phases for the trail of the previous round count, once with
+    the trail as a prefix and once as a suffix of the new trail.
+    """
+    trail = parameters.get("seedtrail")
+    if not parameters["seedphases"] or trail is None:
+        return []
+    return [model.getPhases(trail, 0), model.getPhases(trail, 1)]
+
+
+class PySATSession(object):
+    """
+    A SAT solver running inside the Python process. The clauses of the CNF
+    are added once and the variables of the model are the variables of the
+    solver. The weight is checked under assumptions on the outputs of a
+    cardinality network, so nothing has to be removed between the queries.
+    """
+
+    model = None
+    solver = None
+    encoding = None
+    weight_counter = None
+    num_clauses = 0
+    seeds = None
+    seed_solver = None
+
+    def __init__(self, model, parameters):
+        self.model = model
+        self.solver = getPySATSolver(parameters)
+        if parameters["weightencoding"] in cardinality.WEIGHT_ENCODINGS:
+            self.encoding = parameters["weightencoding"]
+        else:
+            self.encoding = "totalizer"
+        self.weight_counter = [cardinality.TRUE]
+        self.seeds = getPhaseSeeds(model, parameters)
+        if self.seeds and isinstance(self.solver, CryptoMiniSatSolver):
+            print("WARNING: pycryptosat does not support phases, the trail "
+                  "of the previous round is not used.")
+            self.seeds = []
+        if self.seeds:
+            self.seed_solver = getPySATSolver(parameters)
+        self.addClauses()
+        return
+
+    def addClauses(self):
+        """
+        Passes the clauses which were added to the model to the solver.
+        """
+        for clause in self.model.clauses[self.num_clauses:]:
+            self.solver.add_clause(clause)
+            if self.seed_solver:
+                self.seed_solver.add_clause(clause)
+        self.num_clauses = len(self.model.clauses)
+        return
+
+    def getWeightLiteral(self, weight):
+        """
+        Returns the literal for weight >= w. The counter is extended if it
+        does not count up to w yet.
+        """
+        if weight > len(self.model.weight_literals):
+            return cardinality.FALSE
+        if weight >= len(self.weight_counter):
+            limit = min(2 * weight, len(self.model.weight_literals))
+            self.weight_counter = self.model.getWeightCounter(self.encoding,
+                                                              limit)
+            self.addClauses()
+        return self.weight_counter[weight]
+
+    def checkWeight(self, weight, bound=False):
+        """
+        Checks if there is a solution with exactly the given weight, or with
+        at most the given weight if bound is set. Returns the set of true
+        literals, or UNSATISFIABLE.
+        """
+        at_least = self.getWeightLiteral(weight)
+        more = self.getWeightLiteral(weight + 1)
+        if more == cardinality.TRUE or \
+           (not bound and at_least == cardinality.FALSE):
+            return "UNSATISFIABLE"
+
+        assumptions = []
+        if more != cardinality.FALSE:
+            assumptions.append(-more)
+        if not bound and at_least != cardinality.TRUE:
+            assumptions.append(at_least)
+        solution = self.solve(assumptions)
+        if solution is None:
+            return "UNSATISFIABLE"
+        return set(literal for literal in solution if literal > 0)
+
+    def solve(self, assumptions):
+        """
+        Returns the solution under the assumptions or None. The phases of
+        the seeds stay set in the solver, so they are only tried by a second
+        solver with SEED_CONFLICTS conflicts for each seed before the
+        solver without phases decides the query.
+        """
+        for phases in self.seeds:
+            self.seed_solver.set_phases(phases)
+            self.seed_solver.conf_budget(SEED_CONFLICTS)
+            result = self.seed_solver.solve_limited(assumptions=assumptions)
+            if result is not None:
+                return self.seed_solver.get_model() if result else None
+
+        if not self.solver.solve(assumptions=assumptions):
+            return None
+        return self.solver.get_model()
+
+    def getCharacteristic(self, result, cipher, rounds):
+        """
+        Construct a characteristic from the true literals.
+        """
+        values, weight = self.model.getValues(result)
+        return diffchars.DifferentialCharacteristic(values, cipher, rounds,
+                                                    weight)
+
+    def close(self):
+        self.solver.delete()
+        if self.seed_solver:
+            self.seed_solver.delete()
+        return
+
+
+class MaxSATSession(object):
+    """
+    Finds the minimal weight with a single call of the core-guided MaxSAT
+    solver RC2 from PySAT. The clauses of the CNF are hard clauses and every
+    weight literal is a soft clause (not literal) of weight 1. The cost of
+    the cores found so far is a lower bound on the weight, which is still
+    valid if the solver is interrupted.
+    """
+
+    model = None
+    solver = None
+
+    def __init__(self, model, parameters):
+        if pysat is None:
+            print("ERROR: The maxsat backend requires PySAT (python-sat).")
+            exit(1)
+        self.model = model
+        self.solver = pysat.examples.rc2.RC2(
+            pysat.formula.WCNF(), solver=parameters["satsolver"] or "g3")
+        for clause in model.clauses:
+            self.solver.add_clause(clause)
+        for literal in model.weight_literals:
+            self.solver.add_clause([-literal], weight=1)
+
+        # There is only one call, so only the prefix alignment is used
+        seeds = getPhaseSeeds(model, parameters)
+        if seeds:
+            self.solver.oracle.set_phases(seeds[0])
+        return
+
+    def minimizeWeight(self, timelimit=-1):
+        """
+        Returns the set of true literals of a solution with minimal weight,
+        or None if there is no solution or the time limit in seconds was
+        reached, together with the proven lower bound on the weight.
+        """
+        timer = None
+        if timelimit != -1:
+            timer = threading.Timer(timelimit, self.solver.interrupt)
+            timer.start()
+        try:
+            solution = self.solver.compute(expect_interrupt=True)
+        except KeyboardInterrupt:
+            print("Interrupted with lower bound weight >= {}".format(
+                self.solver.cost))
+            raise
+        finally:
+            if timer:
+                timer.cancel()
+
+        if solution is None:
+            return None, self.solver.cost
+        return set(literal for literal in solution if literal > 0), \
+            self.solver.cost
+
+    def getCharacteristic(self, result, cipher, rounds):
+        """
+        Construct a characteristic from the true literals.
+        """
+        values, weight = self.model.getValues(result)
+        return diffchars.DifferentialCharacteristic(values, cipher, rounds,
+                                                    weight)
+
+    def close(self):
+        self.solver.delete()
+        return
+
+
+def getCNFModel(cipher, parameters):
+    """
+    Returns the CNF of the model for the given parameters without the
+    weight constraint.
+    """
+    free_parameters = dict(parameters)
+    free_parameters["sweight"] = None
+    cnf_model = cipher.createCNF(free_parameters)
+    if cnf_model is None:
+        print("ERROR: {} does not support the cnf backend.".format(cipher.name))
+        exit(1)
+    if bounds.canUseRoundBounds(cipher, parameters):
+        print("WARNING: Round bounds are not used by the cnf backend.")
+    return cnf_model
+
+
+def getSATSolver(parameters):
+    """
+    Returns the command line of the SAT solver used by the cnf backend. The
+    solver has to read the DIMACS input from stdin.
+    """
+    if parameters["satsolver"]:
+        return shlex.split(parameters["satsolver"])
+    return [PATH_CRYPTOMINISAT, "--verb", "0"]
+
+
+def getPySATSolver(parameters):
+    """
+    Returns the solver of the pysat backend. satsolver selects one of the
+    solvers of PySAT, or cryptominisat for pycryptosat.
+    """
+    name = parameters["satsolver"]
+    if name is None:
+        name = "cryptominisat" if pycryptosat is not None else "cadical153"
+
+    if name == "cryptominisat":
+        if pycryptosat is None:
+            print("ERROR: The pysat backend with cryptominisat requires "
+                  "pycryptosat.")
+            exit(1)
+        return CryptoMiniSatSolver()
+
+    if pysat is None:
+        print("ERROR: The pysat backend requires PySAT (python-sat).")
+        exit(1)
+    try:
+        return pysat.solvers.Solver(name=name)
+    except (ValueError, NotImplementedError):
+        print("ERROR: Unknown PySAT solver {}.".format(name))
+        exit(1)
+
+
+def startSession(cipher, parameters, stp_file, solve):
+    """
+    Returns a solver session with the model for the given parameters. With
+    the incremental option the solver process is kept alive, otherwise only
+    the model is kept and solve is called for each query.
+    """
+    if parameters["backend"] == "maxsat":
+        return MaxSATSession(getCNFModel(cipher, parameters), parameters)
+    if parameters["backend"] in ["cnf", "pysat"]:
+        if parameters["strategy"] == "parallel":
+            print("ERROR: The parallel strategy is not supported by the {} "
+                  "backend.".format(parameters["backend"]))
+            exit(1)
+        if parameters["backend"] == "pysat":
+            return PySATSession(getCNFModel(cipher, parameters), parameters)
+        return CNFSession(getCNFModel(cipher, parameters),
+                          getSATSolver(parameters), stp_file, parameters)
+    if parameters["strategy"] != "parallel" and not parameters["portfolio"]:
+        if parameters["incremental"]:
+            return BoolectorSession(getSMT2Model(cipher, parameters, stp_file))
+        # Boolector is kept alive if the model is available without STP
+        if parameters["boolector"]:
+            native_model = getNativeSMT2Model(cipher, parameters)
+            if native_model is not None:
+                return BoolectorSession(native_model)
+    return STPSession(getCVCModel(cipher, parameters), solve,
+                      parameters["boolector"])
@@ -1,92 +1,437 @@
 '''
 Created on Mar 22, 2017
 
+Matsui's branch-and-bound search for differential characteristics of
+S-box based ciphers with a bit permutation as linear layer (PRESENT, GIFT,
+RECTANGLE). The best weights B_1, ..., B_{n-1} of the shorter round counts
+bound the weight of the remaining rounds, so the search for n rounds only
+extends the trails which can still reach the current bound B_n'.
 @author: ralph
 '''
 
-# imports go here
+from parser import sboxtables
+
+import sys
+import time
+
+# Tolerance for comparing the weights, which are not integers for S-boxes
+# with DDT entries which are not a power of two
+EPSILON = 1e-9
+
 
 class MatsuisAlgorithm(object):
+    """
+    Finds the differential characteristics of minimal weight for an SPN.
+    The state is an integer, the S-box j reads the bits sboxes[j] (most
+    significant bit first) and bit i of the output of the S-box layer is
+    bit permutation[i] of the input of the next round.
+    """
 
+    sbox = None
+    sboxes = None
     DDT = None
+    rows = None
+    min_weights = None
+    min_weight = 0
+    columns = None
+    byte_tables = None
+    permutation = None
+    output_bits = None
+    bounds = None
+    bound = 0
+    lower_bound = 0
+    best_trail = None
+    deadline = None
+
+    def __init__(self, sbox, sboxes, permutation):
+        self.sbox = sbox
+        self.sboxes = sboxes
+        self.permutation = permutation
+        self.calculateDifferentialDistributionTable()
+        weights = sboxtables.getDifferentialWeights(sbox).tolist()
+
+        # The rows of the DDT sorted by the weight of the transitions
+        size = len(sbox)
+        self.rows = [[]] + [
+            sorted((weights[a][b], b)
+                   for b in range(size) if self.DDT[a][b] != 0)
+            for a in range(1, size)]
+        self.min_weights = [0] + [row[0][0] for row in self.rows[1:]]
+        self.min_weight = min(self.min_weights[1:])
+
+        # The input of the first round is free, so each output is reached
+        # from the input with the most probable transition
+        self.columns = sorted(
+            min((weights[a][b], b, a)
+                for a in range(1, size) if self.DDT[a][b] != 0)
+            for b in range(1, size))
+
+        # The bits of the S-box inputs in each byte of the state
+        owners = {}
+        for j, positions in enumerate(sboxes):
+            for k, position in enumerate(reversed(positions)):
+                owners[position] = (j, 1 << k)
+        self.byte_tables = []
+        for offset in range(0, len(permutation), 8):
+            table = []
+            for byte in range(256):
+                values = {}
+                for bit in range(8):
+                    if (byte >> bit) & 1 and offset + bit in owners:
+                        j, value = owners[offset + bit]
+                        values[j] = values.get(j, 0) | value
+                table.append(list(values.items()))
+            self.byte_tables.append(table)
 
-    def procedure_round_1(cipher):
+        # Input of the next round for each output of each S-box
+        self.output_bits = [
+            [self.getStateBits(positions, b, permutation)
+             for b in range(size)]
+            for positions in sboxes]
+
+        # B_0 = 0, the other bounds are added by findBestTrail
+        self.bounds = [0]
+        return
+
+    def calculateDifferentialDistributionTable(self):
         """
-        description of function 
+        Computes the DDT of the S-box.
         """
-        # create a list of all input differences with hammingweight 1
-        allInputDifferences = self.getAllPossibleDifferences(cipher)
-
-        #for each candidate for \delta X1 do the following
-        for X1 in allInputDifferences:
-            #Let p1 = max_\deltaY (\deltaX1, \deltaY)
-            p1 = self.getMaxProbability(cipher, X1)
-            #If [p1, B_n-1] >= B_n_dash 
-            #if p1*
-                #Call procedure_round_2()
-                #self.procedure_round_i(2)
+        self.DDT = sboxtables.getDDT(self.sbox).tolist()
         return
 
-    def procedure_round_i(i):
+    def getStateBits(self, positions, value, permutation=None):
         """
-        description of function 
+        Returns the state with the value of an S-box at the given positions,
+        which are moved by the permutation if it is given.
         """
-        allOutputDifferences = getAllPossibleDifferences(cipher)
+        state = 0
+        for k, position in enumerate(reversed(positions)):
+            if (value >> k) & 1:
+                if permutation is not None:
+                    position = permutation[position]
+                state |= 1 << position
+        return state
 
-        #For each candidate for \deltaYi do the following
-        for Yi in allOutputDifferences:
-            #Calculate \deltaXi according to the diffusion layer
-            Xi = self.calculateNextInputDifference(Yi, cipher)
-            #Calculate the probability pi according to the DDT of the Sbox
-            pi = getProbabilityForDifferential(Xi, Yi)
-            #If [p1, ..., pi, Bn-i] >= Bndash
-                # Call procedure_round_i(i++)
+    def getActiveSboxes(self, state):
+        """
+        Returns the sorted list of (S-box, input difference) of the active
+        S-boxes. The state is read byte by byte, as most bytes are zero.
+        """
+        values = {}
+        for table in self.byte_tables:
+            if state == 0:
+                break
+            for j, value in table[state & 0xff]:
+                values[j] = values.get(j, 0) | value
+            state >>= 8
+        return sorted(values.items())
+
+    def getSboxLayerState(self, active, values):
+        """
+        Returns the state with the given values of the active S-boxes, i.e.
+        the input or the output of the S-box layer.
+        """
+        state = 0
+        for (j, _), value in zip(active, values):
+            state |= self.getStateBits(self.sboxes[j], value)
+        return state
+
+    def calculateNextInputDifference(self, active, outputs):
+        """
+        Calculate the next input difference according to the outputs of the
+        active S-boxes and the diffusion layer of the cipher.
+        """
+        state = 0
+        for (j, _), b in zip(active, outputs):
+            state |= self.output_bits[j][b]
+        return state
+
+    def canReachBound(self, weight):
+        """
+        Returns True if a trail of this weight reaches the bound B_n' while
+        no trail is found, or improves the best trail found so far.
+        """
+        if self.best_trail is None:
+            return weight <= self.bound + EPSILON
+        return weight < self.bound - EPSILON
+
+    def reachedDeadline(self):
+        """
+        Returns True if the time limit of the search is reached.
+        """
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def procedure_round_1(self, rounds, start=0, weight=0, active=None,
+                          outputs=None, state=0):
+        """
+        Enumerates the outputs of the active S-boxes of the first round with
+        index >= start, such that p1 + B_{n-1} reaches the bound. The input
+        of each S-box is the one with the most probable transition, and state
+        is the input of the second round for the S-boxes before start.
+        """
+        active = active or []
+        outputs = outputs or []
+        remaining = self.bounds[rounds - 1]
+        for j in range(start, len(self.sboxes)):
+            if self.reachedDeadline():
+                return
+            for p1, b, a in self.columns:
+                if not self.canReachBound(weight + p1 + remaining):
+                    break
+                next_state = state | self.output_bits[j][b]
+
+                # The S-boxes of the second round stay active if more
+                # S-boxes of the first round are added
+                if rounds > 1 and not self.canReachBound(
+                        weight + p1 + self.bounds[rounds - 2] +
+                        self.min_weight * len(self.getActiveSboxes(
+                            next_state))):
+                    continue
+                next_active = active + [(j, a)]
+                next_outputs = outputs + [b]
+                self.continueTrail(2, rounds, next_state, weight + p1,
+                                   [(next_active, next_outputs, weight + p1)])
+                self.procedure_round_1(rounds, j + 1, weight + p1,
+                                       next_active, next_outputs, next_state)
         return
 
-    def procedure_round_n():
+    def continueTrail(self, i, rounds, state, weight, trail):
         """
-        description of function 
+        Continues the trail with round i, whose input is the given state.
         """
-        #Calculate \deltaXi according to the diffusion layer
-        #Calculate the probability pn according to the DDT of the Sbox
-        #If [p1, ..., pi, pn] >= Bndash
-            #Bndash = [p1, ..., pi, pn]
+        if i > rounds:
+            self.recordTrail(trail, weight)
+        elif i == rounds:
+            self.procedure_round_n(state, weight, trail)
+        else:
+            self.procedure_round_i(i, rounds, state, weight, trail)
         return
 
-    def getAllPossibleDifferences(cipher):
+    def procedure_round_i(self, i, rounds, state, weight, trail):
         """
-        Returns a list of all differences with hammingweight 1
+        Enumerates the outputs of the active S-boxes of round i such that
+        p1 + ... + pi + B_{n-i} reaches the bound.
         """
-        return [[1 if i==j else 0 for i in range(cipher.blocksize)] for j in range(cipher.blocksize)]
+        active = self.getActiveSboxes(state)
+        remaining = self.bounds[rounds - i]
+
+        # The smallest weight of the S-boxes which are not yet assigned
+        suffix = [0] * (len(active) + 1)
+        for idx in range(len(active) - 1, -1, -1):
+            suffix[idx] = suffix[idx + 1] + self.min_weights[active[idx][1]]
+        if not self.canReachBound(weight + suffix[0] + remaining) or \
+           self.reachedDeadline():
+            return
+
+        outputs = []
 
-    def getMaxProbability(cipher, diffIn):
+        def enumerateOutputs(idx, partial, next_state):
+            if idx == len(active):
+                self.continueTrail(i + 1, rounds, next_state, weight + partial,
+                                   trail + [(active, list(outputs), partial)])
+                return
+            j, a = active[idx]
+            for pi, b in self.rows[a]:
+                if not self.canReachBound(weight + partial + pi +
+                                          suffix[idx + 1] + remaining):
+                    break
+                state_b = next_state | self.output_bits[j][b]
+                if not self.canReachBound(
+                        weight + partial + pi + suffix[idx + 1] +
+                        self.bounds[rounds - i - 1] + self.min_weight *
+                        len(self.getActiveSboxes(state_b))):
+                    continue
+                outputs.append(b)
+                enumerateOutputs(idx + 1, partial + pi, state_b)
+                outputs.pop()
+            return
+
+        enumerateOutputs(0, 0, 0)
+        return
+
+    def procedure_round_n(self, state, weight, trail):
         """
-        returns the maximum probability according to a certain input difference
+        Takes the most probable output of each active S-box in the last round
+        and stores the trail if p1 + ... + pn reaches the bound.
         """
+        active = self.getActiveSboxes(state)
+        pn = sum(self.min_weights[a] for _, a in active)
+        if self.canReachBound(weight + pn):
+            outputs = [self.rows[a][0][1] for _, a in active]
+            self.recordTrail(trail + [(active, outputs, pn)], weight + pn)
         return
 
-    def calculateNextInputDifference(Yi, cipher):
+    def recordTrail(self, trail, weight):
         """
-        Calculate the next input difference according to the output difference and the diffusion layer
-        of the cipher
+        Stores the trail, given by the active S-boxes, their outputs and the
+        weight of each round, as the best trail and lowers the bound.
         """
+        self.bound = weight
+        self.best_trail = [
+            (self.getSboxLayerState(active, [a for _, a in active]),
+             self.getSboxLayerState(active, outputs), round_weight)
+            for active, outputs, round_weight in trail]
         return
 
-    def getProbabilityForDifferential(Xi, Yi):
+    def getLastRound(self, state):
         """
-        Returns the probability of a differential according to a given input/output difference
+        Returns the round with the given input and the most probable output
+        of each active S-box.
         """
-        return self.DDT[Xi][Yi]
+        active = self.getActiveSboxes(state)
+        outputs = [self.rows[a][0][1] for _, a in active]
+        return (state, self.getSboxLayerState(active, outputs),
+                sum(self.min_weights[a] for _, a in active))
+
+    def getFirstRound(self, state):
+        """
+        Returns the round whose output is moved to the given state by the
+        permutation, with the most probable input of each active S-box.
+        """
+        output = 0
+        for i, position in enumerate(self.permutation):
+            if (state >> position) & 1:
+                output |= 1 << i
+
+        columns = {b: (weight, a) for weight, b, a in self.columns}
+        active = self.getActiveSboxes(output)
+        inputs = [columns[b][1] for _, b in active]
+        return (self.getSboxLayerState(active, inputs), output,
+                sum(columns[b][0] for _, b in active))
+
+    def getExtendedTrail(self, trail):
+        """
+        Returns the trail extended by one round at the end or at the start,
+        whichever has the smaller weight. This is an upper bound for B_n.
+        """
+        _, output, _ = trail[-1]
+        active = self.getActiveSboxes(output)
+        appended = trail + [self.getLastRound(
+            self.calculateNextInputDifference(active,
+                                              [b for _, b in active]))]
+        prepended = [self.getFirstRound(trail[0][0])] + trail
+        return min(appended, prepended,
+                   key=lambda extended: sum(weight for _, _, weight
+                                            in extended))
+
+    def findBestTrail(self, rounds):
+        """
+        Returns the trail of minimal weight for the given number of rounds,
+        where B_1, ..., B_{n-1} are already known and best_trail is the trail
+        for n - 1 rounds. The bound B_n' starts at the lower bound and is
+        increased by one until a trail is found, as a search with a bound
+        close to B_n is much faster. The trail for n - 1 rounds extended by
+        one round is an upper bound, which is used for the last search.
+        Returns None if the time limit is reached, then
+        lower_bound <= B_n <= bound.
+        """
+        assert len(self.bounds) == rounds
+        # The trail consists of an i-round and an (n - i)-round trail
+        self.lower_bound = max(
+            [self.bounds[rounds - 1] + self.min_weight] +
+            [self.bounds[i] + self.bounds[rounds - i]
+             for i in range(1, rounds)])
+        if rounds == 1:
+            weight, b, a = self.columns[0]
+            upper_trail = [(self.getSboxLayerState([(0, a)], [a]),
+                            self.getSboxLayerState([(0, a)], [b]), weight)]
+        else:
+            upper_trail = self.getExtendedTrail(self.best_trail)
+        upper_bound = sum(weight for _, _, weight in upper_trail)
+
+        self.bound = self.lower_bound
+        self.best_trail = None
+        while self.bound < upper_bound - EPSILON:
+            self.procedure_round_1(rounds)
+            if self.reachedDeadline():
+                self.bound = upper_bound
+                return None
+            if self.best_trail is not None:
+                self.bounds.append(self.bound)
+                return self.best_trail
+            # There is no trail with weight <= bound
+            self.lower_bound = self.bound + EPSILON
+            self.bound += 1
+
+        # Only a better trail than the extended trail can be found
+        self.bound = upper_bound
+        self.best_trail = upper_trail
+        if self.canReachBound(self.lower_bound):
+            self.procedure_round_1(rounds)
+            if self.reachedDeadline():
+                return None
+        self.bounds.append(self.bound)
+        return self.best_trail
+
+
+def formatWeight(weight):
+    """
+    Returns the weight rounded to three decimal places.
+    """
+    return "{:g}".format(round(weight, 3))
 
-        return
 
-    def calculateDifferentialDistributionTable(cipher):
-        self.DDT = [[0]*len(cipher.sbox) for i in range(len(cipher.sbox))]
+def printTrail(cipher, parameters, trail):
+    """
+    Prints the trail in the format of the characteristics of the cipher,
+    i.e. the input and the output of the S-box layer and the weight of each
+    round.
+    """
+    state_name, sbox_name = cipher.getFormatString()[:2]
+    digits = len(cipher.getPermutation(parameters)) // 4
+    print("Rounds\t{:<{width}}{:<{width}}w".format(state_name, sbox_name,
+                                                  width=digits + 4))
+    for rnd, (state, output, weight) in enumerate(trail):
+        print("{}\t0x{:0{digits}x}  0x{:0{digits}x}  -{}".format(
+            rnd, state, output, formatWeight(weight), digits=digits))
+    print("Weight: {}".format(formatWeight(sum(weight for _, _, weight
+                                               in trail))))
+    return
 
-        for i in range(len(self.DDT)):
-            for j in range(len(self.DDT)):
-                self.DDT[i ^ j][cipher.sbox[i] ^ cipher.sbox[j]] += 1
 
+def findMinWeightCharacteristic(cipher, parameters):
+    """
+    Computes the minimal weights B_1, ..., B_n with Matsui's algorithm and
+    prints the characteristic of minimal weight for n rounds. If the time
+    limit is reached, the proven lower bound for the current round count is
+    printed.
+    """
+    sbox_layer = cipher.getSboxLayer(parameters)
+    if sbox_layer is None:
+        print("ERROR: {} does not provide an S-box layer and a bit "
+              "permutation, which are required for mode 5.".format(cipher.name))
+        exit(1)
 
+    algorithm = MatsuisAlgorithm(sbox_layer[0], sbox_layer[1],
+                                 cipher.getPermutation(parameters))
+    start_time = time.time()
+    if parameters["timelimit"] != -1:
+        algorithm.deadline = start_time + parameters["timelimit"]
 
+    print("Matsui's algorithm for {} - Rounds: {} Wordsize: {}".format(
+        cipher.name, parameters["rounds"], parameters["wordsize"]))
+    print("---")
+    trail = None
+    for rounds in range(1, parameters["rounds"] + 1):
+        round_time = time.time()
+        trail = algorithm.findBestTrail(rounds)
+        if trail is None:
+            print("Reached the time limit of {} seconds".format(
+                parameters["timelimit"]))
+            print("{} <= B_{} <= {}".format(formatWeight(algorithm.lower_bound),
+                                            rounds,
+                                            formatWeight(algorithm.bound)))
+            return None
+        print("B_{} = {}\t{:.2f}s".format(rounds, formatWeight(algorithm.bound),
+                                         time.time() - round_time))
+        sys.stdout.flush()
 
+    print("---")
+    print("Characteristic for {} - Rounds {} - Wordsize {} - Weight {} - "
+          "Time {}s".format(cipher.name, parameters["rounds"],
+                            parameters["wordsize"],
+                            formatWeight(algorithm.bound),
+                            round(time.time() - start_time, 2)))
+    printTrail(cipher, parameters, trail)
+    return algorithm.bounds[1:]
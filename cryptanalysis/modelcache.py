@@ -0,0 +1,123 @@
+'''
+Caches the structural part of the models. The round function only depends
+on the cipher and a few parameters like the number of rounds and the
+wordsize, while the weight, the fixed variables and the blocked
+characteristics only add a few assertions at the end. The body of the
+model is therefore generated once for each structural key, and only the
+assertions of the query are appended.
+'''
+
+from parser import stpcommands
+from cryptanalysis import symmetry
+
+import hashlib
+import io
+import json
+import os
+import re
+
+# Parameters which change the structure of the model
+MODEL_PARAMETERS = ["rounds", "wordsize", "blocksize", "iterative",
+                    "nummessages", "rotationconstants", "capacity", "rate",
+                    "keysize", "tweaksize", "skipround", "weightencoding",
+                    "ssbencoding"]
+
+# Bodies of the models which are already generated
+model_cache = {}
+
+
+def getModelKey(cipher, parameters):
+    """
+    Returns the key of the body of the model for the given parameters.
+    """
+    key = {name: parameters.get(name) for name in MODEL_PARAMETERS}
+    key["cipher"] = cipher.name
+    key["weightlimit"] = stpcommands.WEIGHT_LIMIT
+    return json.dumps(key, sort_keys=True)
+
+
+def getModelBody(cipher, parameters):
+    """
+    Returns the model without the weight assertion, the fixed variables,
+    the blocked characteristics and the query. If modelcache is set, the
+    bodies are also stored in this directory.
+    """
+    key = getModelKey(cipher, parameters)
+    if key in model_cache:
+        return model_cache[key]
+
+    cache_file = None
+    if parameters.get("modelcache"):
+        cache_file = os.path.join(parameters["modelcache"], "{}.stp".format(
+            hashlib.sha1(key.encode("utf-8")).hexdigest()))
+        if os.path.isfile(cache_file):
+            with open(cache_file, "r") as input_file:
+                model_cache[key] = input_file.read()
+            return model_cache[key]
+
+    free_parameters = dict(parameters)
+    free_parameters["sweight"] = None
+    free_parameters["fixedVariables"] = {}
+    free_parameters["blockedCharacteristics"] = []
+    model = io.StringIO()
+    cipher.createSTP(model, free_parameters)
+
+    model = model.getvalue()
+    model = model[:model.rindex("QUERY(FALSE);")]
+
+    if cache_file is not None:
+        os.makedirs(parameters["modelcache"], exist_ok=True)
+        temp_file = "{}.{}.tmp".format(cache_file, os.getpid())
+        with open(temp_file, "w") as output_file:
+            output_file.write(model)
+        os.replace(temp_file, cache_file)
+
+    model_cache[key] = model
+    return model
+
+
+def clearModelCache():
+    """
+    Removes the bodies generated in this process, e.g. to measure the time
+    of generating the models again.
+    """
+    model_cache.clear()
+    return
+
+
+def getConstraints(parameters):
+    """
+    Returns the assertions for the fixed variables and the blocked
+    characteristics.
+    """
+    constraints = ""
+    for key, value in parameters["fixedVariables"].items():
+        constraints += "ASSERT({} = {});\n".format(key, value)
+    for characteristic in parameters["blockedCharacteristics"]:
+        constraints += stpcommands.getBlockingString(characteristic) + "\n"
+    return constraints
+
+
+def hasWeight(model):
+    """
+    Returns True if the model declares the variable weight.
+    """
+    return re.search(r"^weight\s*:", model, re.MULTILINE) is not None
+
+
+def getModel(cipher, parameters):
+    """
+    Returns the model for the given parameters in CVC format, which is
+    equivalent to the output of cipher.createSTP.
+    """
+    model = io.StringIO()
+    body = getModelBody(cipher, parameters)
+    model.write(body)
+    model.write(getConstraints(parameters))
+    for assertion in symmetry.getSymmetryAssertions(cipher, parameters):
+        model.write("ASSERT({});\n".format(assertion))
+    if parameters["sweight"] is not None and hasWeight(body):
+        model.write("ASSERT({});\n".format(stpcommands.getWeightAssertion(
+            parameters["sweight"], cardinality="weightge:" in body)))
+    stpcommands.setupQuery(model)
+    return model.getvalue()
@@ -0,0 +1,192 @@
+'''
+Runs several solver configurations on the same query and takes the first
+answer. Which configuration is the fastest differs between ciphers and
+round counts, so the winner of every query is written to a log file which
+can be used to narrow down the portfolio for later searches.
+'''
+
+from cryptanalysis import workspace
+from config import PATH_STP, PATH_BOOLECTOR
+
+import os
+import random
+import re
+import subprocess
+import time
+
+# Each query is appended to this file with the configuration which won
+PORTFOLIO_LOG = os.path.join("tmp", "portfolio.log")
+
+
+def parseConfiguration(configuration):
+    """
+    Returns (solver, threads, seed) for a configuration of the form
+    solver[@seed], where solver is stp, cms<threads> (STP with CryptoMiniSat)
+    or boolector. The seed shuffles the order of the assertions.
+    """
+    match = re.match(r"^(stp|cms(\d+)|boolector)(@(\d+))?$", configuration)
+    if match is None:
+        print("ERROR: Unknown portfolio configuration {}, use stp, cms<threads>"
+              " or boolector with an optional @seed.".format(configuration))
+        exit(1)
+
+    solver = "boolector" if match.group(1) == "boolector" else "stp"
+    threads = int(match.group(2)) if match.group(2) else 0
+    seed = int(match.group(4)) if match.group(4) else None
+    return solver, threads, seed
+
+
+def shuffleModel(model, seed):
+    """
+    Returns the model with each block of consecutive assertions shuffled.
+    The declarations stay in front of the assertions which use them.
+    """
+    rng = random.Random(seed)
+    lines = model.split("\n")
+    result = []
+    block = []
+    for line in lines:
+        if line.startswith("ASSERT(") and line.endswith(");") and \
+           "QUERY" not in line:
+            block.append(line)
+            continue
+        rng.shuffle(block)
+        result += block + [line]
+        block = []
+    rng.shuffle(block)
+    return "\n".join(result + block)
+
+
+def startConfiguration(configuration, model, output_file):
+    """
+    Returns the processes solving the model with the given configuration.
+    The output of the solver is written to output_file.
+    """
+    solver, threads, seed = parseConfiguration(configuration)
+    if seed is not None:
+        model = shuffleModel(model, seed)
+
+    if solver == "boolector":
+        # STP translates the model and Boolector reads it from the pipe
+        translate_process = subprocess.Popen(
+            [PATH_STP, "--print-back-SMTLIB2", "--CVC"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        solver_process = subprocess.Popen([PATH_BOOLECTOR, "-x", "-m"],
+                                          stdin=translate_process.stdout,
+                                          stdout=output_file)
+        translate_process.stdout.close()
+        processes = [translate_process, solver_process]
+    else:
+        stp_parameters = [PATH_STP, "--CVC"]
+        if threads >= 1:
+            stp_parameters += ["--cryptominisat", "--threads", str(threads)]
+        processes = [subprocess.Popen(stp_parameters, stdin=subprocess.PIPE,
+                                      stdout=output_file)]
+
+    try:
+        processes[0].stdin.write(model.encode("utf-8"))
+        processes[0].stdin.close()
+    except BrokenPipeError:
+        pass
+    return processes
+
+
+def getSTPOutput(boolector_output):
+    """
+    Returns the output of Boolector in the format of STP, so the result of
+    every configuration can be parsed in the same way.
+    """
+    if "unsat" in boolector_output:
+        return "Valid.\n"
+
+    result = "Invalid.\n"
+    for row in boolector_output.split("\n"):
+        fields = row.split(" ")
+        if len(fields) == 3:
+            result += "ASSERT( {} = 0x{} );\n".format(fields[2], fields[1])
+    return result
+
+
+def isAnswer(output):
+    """
+    Returns True if the solver decided the query.
+    """
+    return output.startswith("sat") or output.startswith("unsat") or \
+        "Valid." in output or "Invalid." in output or "ASSERT" in output
+
+
+def stopConfiguration(processes):
+    """
+    Kills the processes of a configuration.
+    """
+    for process in processes:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+    return
+
+
+def logWinner(parameters, configuration, duration, result):
+    """
+    Prints the configuration which answered first and appends it to the log.
+    """
+    answer = "UNSAT" if "Valid." in result else "SAT"
+    print("\tPortfolio: {} answered {} after {}s".format(
+        configuration, answer, round(duration, 2)))
+
+    os.makedirs(os.path.dirname(PORTFOLIO_LOG), exist_ok=True)
+    with open(PORTFOLIO_LOG, "a") as log_file:
+        log_file.write("{} rounds={} wordsize={} mode={} {} {} {}s\n".format(
+            parameters["cipher"], parameters["rounds"], parameters["wordsize"],
+            parameters["mode"], configuration, answer, round(duration, 2)))
+    return
+
+
+def solve(model, parameters):
+    """
+    Returns the output of the configuration which answers the query first,
+    in the format of STP. All other configurations are stopped.
+    """
+    start_time = time.time()
+    running = {}
+    for index, configuration in enumerate(parameters["portfolio"]):
+        output_path = workspace.getWorkspaceFile(
+            parameters, "portfolio{}.out".format(index))
+        with open(output_path, "w") as output_file:
+            running[index] = (configuration,
+                              startConfiguration(configuration, model,
+                                                 output_file),
+                              output_path)
+
+    try:
+        while running:
+            time.sleep(0.01)
+            for index in sorted(running):
+                configuration, processes, output_path = running[index]
+                if processes[-1].poll() is None:
+                    continue
+                del running[index]
+                stopConfiguration(processes)
+                with open(output_path, "r") as output_file:
+                    result = output_file.read()
+                os.remove(output_path)
+
+                # A failed configuration does not decide the query
+                if not isAnswer(result):
+                    print("WARNING: Portfolio configuration {} failed.".format(
+                        configuration))
+                    continue
+
+                if parseConfiguration(configuration)[0] == "boolector":
+                    result = getSTPOutput(result)
+                logWinner(parameters, configuration,
+                          time.time() - start_time, result)
+                return result
+    finally:
+        for _, processes, output_path in running.values():
+            stopConfiguration(processes)
+            if os.path.isfile(output_path):
+                os.remove(output_path)
+
+    print("ERROR: No configuration of the portfolio solved the query.")
+    exit(1)
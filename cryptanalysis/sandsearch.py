@@ -0,0 +1,870 @@
+'''
+Branch-and-bound search for the differential trails of SAND without a
+solver. The state of round i is (x_i, y_i), the SSb maps each nibble of x_i
+to the nibbles of G0 and G1, and x_{i+1} = P(G0 <<< alpha ^ G1 <<< beta)
+^ y_i, y_{i+1} = x_i, as in sand_diff_actsbox. The search is done once for
+the number of active SSbs and once for the weight of the transitions. Like
+Matsui's algorithm, the optimal costs B_1, ..., B_{n-1} of the shorter
+round counts bound the cost of the remaining rounds.
+'''
+
+from parser import sboxtables
+from ciphers import ssb_ddt
+
+import numpy
+import sys
+import time
+
+# The cost of an active SSb is 1 or the weight of its transition
+OBJECTIVES = ["active", "weight"]
+
+
+class SandSearch(object):
+    """
+    Finds the trails of minimal cost for SAND with the given wordsize,
+    rotations and bit permutation. The costs are integers, the weights of
+    the SSb are 2 or 3.
+    """
+
+    objective = None
+    wordsize = 0
+    rotation = None
+    shifts = None
+    rows = None
+    min_costs = None
+    byte_costs = None
+    outputs = None
+    targets = None
+    transitions = None
+    best_transitions = None
+    completed = None
+    pair_costs = None
+    masks = None
+    second_round_bounds = None
+    scale = 0
+    byte_patterns = None
+    count_vectors = None
+    truncated = None
+    truncated_tables = None
+    halves = None
+    first_round_bounds = None
+    box_bounds = None
+    pattern_sizes = None
+    first_round_choices = None
+    bounds = None
+    bound = 0
+    lower_bound = 0
+    best_trail = None
+    trails = None
+    state_bounds = None
+    deadline = None
+
+    def __init__(self, wordsize, rot_alpha, rot_beta, permutation, objective,
+                 rotation=None):
+        self.objective = objective
+        self.wordsize = wordsize
+        self.rotation = rotation
+        self.shifts = [wordsize - 4 - 4 * i for i in range(wordsize // 4)]
+        weights = sboxtables.getDifferentialWeights(ssb_ddt.SSB, 8).tolist()
+
+        # The outputs of each input sorted by the weight, the number of
+        # active SSbs does not depend on the output
+        self.rows = [[(0, 0)]]
+        for a in range(1, 16):
+            row = sorted((weights[a][b], b) for b in range(256)
+                         if weights[a][b] != float("inf"))
+            self.rows.append([(int(weight) if objective == "weight" else 1, b)
+                              for weight, b in row])
+        self.min_costs = [row[0][0] for row in self.rows]
+        self.byte_costs = [self.min_costs[byte >> 4] +
+                           self.min_costs[byte & 0xf] for byte in range(256)]
+
+        # x_{i+1} ^ y_i for each output of the SSb of each nibble
+        mask = (1 << wordsize) - 1
+        self.outputs = []
+        for shift in self.shifts:
+            row = []
+            for b in range(256):
+                rot_G0 = rotl(((b >> 4) << shift) & mask, rot_alpha, wordsize)
+                rot_G1 = rotl(((b & 0xf) << shift) & mask, rot_beta, wordsize)
+                xor_G = rot_G0 ^ rot_G1
+                perm_G = 0
+                for i in range(wordsize):
+                    if (xor_G >> i) & 1:
+                        perm_G |= 1 << permutation[i]
+                row.append(perm_G)
+            self.outputs.append(row)
+
+        # The nibbles of x_{i+1} ^ y_i which depend on each SSb
+        self.targets = []
+        for row in self.outputs:
+            function = 0
+            for state in row:
+                function |= state
+            self.targets.append([k for k, shift in enumerate(self.shifts)
+                                 if (function >> shift) & 0xf])
+
+        # All transitions of one SSb sorted by the cost, a = 0 is inactive
+        self.transitions = sorted((cost, a, b) for a in range(16)
+                                  for cost, b in self.rows[a])
+        self.best_transitions = sorted((self.min_costs[a], a,
+                                        self.rows[a][0][1])
+                                       for a in range(16))
+
+        # The nibbles of F(x_i) which are known after the SSb of nibble k
+        # of x_i has an output
+        last_sources = {}
+        for k, targets in enumerate(self.targets):
+            for target in targets:
+                last_sources[target] = k
+        self.completed = [[self.shifts[target]
+                           for target, k in last_sources.items()
+                           if k == source]
+                          for source in range(len(self.shifts))]
+
+        # The smallest cost of a nibble a of x_{i-1} and a ^ f of x_{i+1}
+        # for a nibble f of F(x_i), as x_{i+1} = F(x_i) ^ x_{i-1}
+        self.pair_costs = [min(self.min_costs[a] + self.min_costs[a ^ f]
+                               for a in range(16)) for f in range(16)]
+
+        # Lower bounds for the SSbs of x_2 from nibble k on, given the
+        # nibbles of F(x_2) which are still pending
+        no_pairs = [[] for _ in self.shifts]
+        self.masks = self.getPendingMasks()
+        self.second_round_bounds = [
+            self.getSuffixBounds(self.best_transitions, no_pairs),
+            self.getSuffixBounds(self.transitions, self.completed)]
+
+        # Every active SSb costs at least scale. For SAND-32 the number of
+        # active SSbs of the remaining rounds is bounded by the truncated
+        # trails of the nibbles, which only depend on the active nibbles
+        self.scale = min(self.min_costs[1:])
+        self.byte_patterns = [int(byte >> 4 != 0) << 1 | int(byte & 0xf != 0)
+                              for byte in range(256)]
+        self.halves = (numpy.arange(1 << len(self.shifts))[:, None] >>
+                       numpy.arange(len(self.shifts))[None, :]) & 1
+        self.pattern_sizes = self.halves.sum(axis=1)
+        self.first_round_bounds = {}
+        self.box_bounds = {}
+        if len(self.shifts) <= 8:
+            self.count_vectors = self.getCountVectors()
+            self.truncated = [[[0] * (1 << len(self.shifts))
+                               for _ in range(1 << len(self.shifts))]]
+            self.truncated_tables = [numpy.array(self.truncated[0])]
+
+        # The values a of a nibble of x_1 for each nibble f of F(x_2), split
+        # by whether the nibble a ^ f of x_3 is active
+        self.first_round_choices = []
+        for f in range(16):
+            choices = {}
+            for a in range(16):
+                choices.setdefault(int(a != f), []).append(
+                    (self.min_costs[a], a))
+            self.first_round_choices.append([sorted(choices[0]),
+                                             sorted(choices[1])])
+
+        # B_0 = 0, the other bounds and trails are added by findBestTrail
+        self.bounds = [0]
+        self.trails = [[]]
+        # Lower bounds for the cost of the remaining rounds from a state,
+        # which are found by the searches
+        self.state_bounds = {}
+        return
+
+    def getPendingMasks(self):
+        """
+        Returns the mask of the nibbles of F(x_i) which depend on the SSbs
+        before nibble k and on the SSbs from nibble k on, for each k.
+        """
+        masks = [0]
+        for k in range(len(self.shifts)):
+            mask = masks[-1]
+            for target in self.targets[k]:
+                mask |= 0xf << self.shifts[target]
+            for shift in self.completed[k]:
+                mask &= ~(0xf << shift)
+            masks.append(mask)
+        return masks
+
+    def getSuffixBounds(self, transitions, completed):
+        """
+        Returns the smallest cost of the SSbs of the second round from
+        nibble k on and of the pairs p1 + p3 of the completed nibbles, for
+        each value of the pending nibbles.
+        """
+        bounds = [None] * len(self.shifts) + [{0: 0}]
+        for k in range(len(self.shifts) - 1, -1, -1):
+            bounds[k] = {}
+            value = self.masks[k]
+            while True:
+                best = None
+                for pi, _, b in transitions:
+                    function = value ^ self.outputs[k][b]
+                    cost = pi + bounds[k + 1][function & self.masks[k + 1]]
+                    for shift in completed[k]:
+                        cost += self.pair_costs[(function >> shift) & 0xf]
+                    if best is None or cost < best:
+                        best = cost
+                bounds[k][value] = best
+                if value == 0:
+                    break
+                value = (value - 1) & self.masks[k]
+        return bounds
+
+    def getPattern(self, state):
+        """
+        Returns the active nibbles of the state, bit m is the nibble at bit
+        4m of the state.
+        """
+        pattern = 0
+        bit = 0
+        while state:
+            pattern |= self.byte_patterns[state & 0xff] << bit
+            state >>= 8
+            bit += 2
+        return pattern
+
+    def getCountVectors(self):
+        """
+        Returns for each pattern of active nibbles of x_i the possible
+        numbers of active SSbs moved to each nibble of F(x_i), where 2
+        stands for two or more.
+        """
+        num_nibbles = len(self.shifts)
+        digits = numpy.arange(num_nibbles)
+        contributions = [None] * num_nibbles
+        for k, shift in enumerate(self.shifts):
+            patterns = set(self.getPattern(self.outputs[k][b])
+                           for a in range(1, 16) for _, b in self.rows[a])
+            contributions[shift // 4] = numpy.array(
+                [(pattern >> digits) & 1 for pattern in sorted(patterns)])
+
+        vectors = [numpy.zeros((1, num_nibbles), dtype=numpy.int64)]
+        for pattern in range(1, 1 << num_nibbles):
+            bit = (pattern & -pattern).bit_length() - 1
+            previous = vectors[pattern & (pattern - 1)]
+            counts = numpy.minimum(previous[:, None, :] +
+                                   contributions[bit][None, :, :], 2)
+            vectors.append(numpy.unique(counts.reshape(-1, num_nibbles),
+                                        axis=0))
+        return vectors
+
+    def getBoxes(self, table):
+        """
+        Returns the smallest entry of each row of the table for the patterns
+        X in each box, given by the digits 0 (inactive), 1 (active) and
+        2 (both) of the nibbles.
+        """
+        num_nibbles = len(self.shifts)
+        boxes = table.reshape((len(table),) + (2,) * num_nibbles)
+        for axis in range(1, num_nibbles + 1):
+            boxes = numpy.concatenate(
+                [boxes, boxes.min(axis=axis, keepdims=True)], axis=axis)
+        return boxes.reshape(len(table), 3 ** num_nibbles)
+
+    def extendTruncatedBounds(self, rounds):
+        """
+        Computes T_k[X][Y], the smallest number of active SSbs of k rounds
+        starting with the active nibbles X of x_i and Y of y_i, for k up to
+        the given number of rounds. A nibble of x_{i+1} is zero if no active
+        SSb and no active nibble of y_i is moved to it, active if exactly
+        one is, and both otherwise.
+        """
+        num_nibbles = len(self.shifts)
+        size = 1 << num_nibbles
+        powers = 3 ** numpy.arange(num_nibbles)
+        while len(self.truncated) <= rounds:
+            # The smallest T_{k-1}[X'][X] for the X' in each box, given by
+            # the digits 0 (inactive), 1 (active) and 2 (both)
+            boxes = self.getBoxes(self.truncated_tables[-1].T)
+
+            table = numpy.empty((size, size), dtype=numpy.int64)
+            for x in range(size):
+                counts = numpy.minimum(self.count_vectors[x][:, None, :] +
+                                       self.halves[None, :, :], 2)
+                table[x] = self.pattern_sizes[x] + boxes[x][
+                    counts @ powers].min(axis=0)
+            self.truncated_tables.append(table)
+            self.truncated.append(table.tolist())
+        return
+
+    def getStateBound(self, rounds, x, y):
+        """
+        Returns the lower bound for the cost of the given number of rounds
+        starting with the state (x, y).
+        """
+        if self.truncated is None:
+            return 0
+        return self.scale * self.truncated[rounds][self.getPattern(x)][
+            self.getPattern(y)]
+
+    def getBoxBounds(self, rounds, y_pattern):
+        """
+        Returns scale * T_rounds[X][y_pattern] for the patterns X where some
+        nibbles are not yet known, indexed by the digits 0 (inactive),
+        1 (active) and 2 (not known).
+        """
+        if self.truncated is None:
+            return None
+        if (rounds, y_pattern) not in self.box_bounds:
+            boxes = self.getBoxes(self.truncated_tables[rounds][None, :,
+                                                                y_pattern])
+            self.box_bounds[(rounds, y_pattern)] = (self.scale *
+                                                    boxes[0]).tolist()
+        return self.box_bounds[(rounds, y_pattern)]
+
+    def getActiveNibbles(self, state):
+        """
+        Returns the list of (nibble, input difference) of the active SSbs.
+        """
+        return [(i, (state >> shift) & 0xf)
+                for i, shift in enumerate(self.shifts)
+                if (state >> shift) & 0xf]
+
+    def getState(self, active):
+        """
+        Returns the state with the given active nibbles.
+        """
+        state = 0
+        for i, a in active:
+            state |= a << self.shifts[i]
+        return state
+
+    def getMinCost(self, state):
+        """
+        Returns the cost of the most probable transition of the state.
+        """
+        cost = 0
+        while state:
+            cost += self.byte_costs[state & 0xff]
+            state >>= 8
+        return cost
+
+    def getBestOutputs(self, active):
+        """
+        Returns the most probable output of each active SSb.
+        """
+        return [self.rows[a][0][1] for _, a in active]
+
+    def getRoundFunction(self, active, outputs):
+        """
+        Returns P(G0 <<< alpha ^ G1 <<< beta) for the given outputs.
+        """
+        state = 0
+        for (i, _), b in zip(active, outputs):
+            state ^= self.outputs[i][b]
+        return state
+
+    def isCanonical(self, state):
+        """
+        Returns True if the state is the smallest of its rotations. The
+        rotations of a trail have the same cost, so only the trails with a
+        canonical x_2 (or x_1 if x_2 is zero) are searched.
+        """
+        if self.rotation is None:
+            return True
+        return all(state <= rotl(state, rotation, self.wordsize)
+                   for rotation in range(self.rotation, self.wordsize,
+                                         self.rotation))
+
+    def getStateKey(self, rounds, x, y):
+        """
+        Returns the key of the state (x, y) with the given number of
+        remaining rounds, which is the same for all its rotations.
+        """
+        if self.rotation is None:
+            return (rounds, x, y)
+        return min((rounds, rotl(x, rotation, self.wordsize),
+                    rotl(y, rotation, self.wordsize))
+                   for rotation in range(0, self.wordsize, self.rotation))
+
+    def reachedDeadline(self):
+        """
+        Returns True if the time limit of the search is reached.
+        """
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def getFirstRoundBounds(self, rounds):
+        """
+        Returns the lower bounds for the cost of the rounds from 3 on for
+        each pattern of the active nibbles of x_2 and each pattern of F(x_2)
+        where some nibbles are not yet known. Every nibble of x_3 which
+        differs from F(x_2) in being active needs an active nibble of x_1.
+        """
+        if rounds == 2 or self.truncated is None:
+            return None
+        if rounds not in self.first_round_bounds:
+            num_patterns = 1 << len(self.shifts)
+            table = self.truncated_tables[rounds - 2].T
+            for bit in range(len(self.shifts)):
+                table = numpy.minimum(
+                    table, 1 + table[:, numpy.arange(num_patterns) ^
+                                     (1 << bit)])
+            self.first_round_bounds[rounds] = (
+                self.scale * self.getBoxes(table)).tolist()
+        return self.first_round_bounds[rounds]
+
+    def procedure_round_1(self, rounds):
+        """
+        Enumerates the input x_2 of the second round together with the
+        outputs of its SSbs. The inputs x_1 and x_2 are free, and x_3 is
+        F(x_2) ^ x_1, so p1 + p3 is bounded by the smallest p1 + p3 of each
+        nibble of F(x_2) once it is known. The bounds of the remaining
+        nibbles are precomputed for each value of the pending nibbles, and
+        for SAND-32 for the active nibbles of x_2 and F(x_2).
+        """
+        if rounds == 2:
+            transitions = self.best_transitions
+            completed = [[] for _ in self.shifts]
+            bounds = self.second_round_bounds[0]
+            later = 0
+        else:
+            transitions = self.transitions
+            completed = self.completed
+            bounds = self.second_round_bounds[1]
+            later = self.bounds[rounds - 3]
+        prefix = self.bounds[rounds - 2]
+        first_bounds = self.getFirstRoundBounds(rounds)
+        digits = [[3 ** m, 2 * 3 ** m] for m in range(len(self.shifts))]
+        unknown = sum(digits[target][1] for target in range(len(self.shifts))
+                      if any(target in targets for targets in self.targets))
+        by_activity = [[transition for transition in transitions
+                        if int(transition[1] != 0) == bit] for bit in (0, 1)]
+        active = []
+        outputs = []
+
+        def enumerateSecondRound(k, p2, function, known, box):
+            if self.best_trail is not None or self.reachedDeadline():
+                return
+            if k == len(self.shifts):
+                x2 = self.getState(active)
+                if x2 and not self.isCanonical(x2):
+                    return
+                self.procedure_round_1_input(rounds, x2, list(active),
+                                             list(outputs), p2, function)
+                return
+            if pattern is None:
+                choices = transitions
+                rest = prefix
+            else:
+                choices = by_activity[(pattern >> (self.shifts[k] // 4)) & 1]
+                rest = max(prefix, self.scale * pattern_sizes[k + 1] +
+                           first_bounds[pattern][box])
+            for pi, a, b in choices:
+                if p2 + pi + rest > self.bound:
+                    break
+                next_function = function ^ self.outputs[k][b]
+                cost = known
+                next_box = box
+                for shift in completed[k]:
+                    nibble = (next_function >> shift) & 0xf
+                    cost += self.pair_costs[nibble]
+                    next_box -= digits[shift // 4][nibble == 0]
+                if p2 + pi + cost + later + bounds[k + 1][
+                        next_function & self.masks[k + 1]] > self.bound:
+                    continue
+                if pattern is not None and p2 + pi + self.scale * \
+                   pattern_sizes[k + 1] + first_bounds[pattern][next_box] > \
+                   self.bound:
+                    continue
+                if a:
+                    active.append((k, a))
+                    outputs.append(b)
+                enumerateSecondRound(k + 1, p2 + pi, next_function, cost,
+                                     next_box)
+                if a:
+                    active.pop()
+                    outputs.pop()
+            return
+
+        # For SAND-32 the active nibbles of x_2 are chosen first, starting
+        # with the patterns with the smallest bound
+        if first_bounds is None:
+            patterns = [None]
+        else:
+            patterns = sorted(
+                (self.scale * int(self.pattern_sizes[pattern]) +
+                 first_bounds[pattern][unknown], pattern)
+                for pattern in range(1 << len(self.shifts)))
+            patterns = [pattern for bound, pattern in patterns
+                        if bound <= self.bound]
+        for pattern in patterns:
+            if pattern is not None:
+                # The number of active nibbles of x_2 from nibble k on
+                pattern_sizes = [0] * (len(self.shifts) + 1)
+                for k in range(len(self.shifts) - 1, -1, -1):
+                    pattern_sizes[k] = pattern_sizes[k + 1] + (
+                        (pattern >> (self.shifts[k] // 4)) & 1)
+            enumerateSecondRound(0, 0, 0, 0, unknown)
+            if self.best_trail is not None:
+                return
+        return
+
+    def procedure_round_1_input(self, rounds, x2, active, outputs, p2,
+                                function):
+        """
+        Enumerates the input x_1 of the first round for the given second
+        round. First the active nibbles of x_1 and x_3 = F(x_2) ^ x_1 are
+        chosen such that p1 + p2 + p3 + ... + pn can reach the bound, then
+        the values of x_1. The first round takes the most probable output,
+        y_1 is chosen to reach x_2.
+        """
+        if rounds == 2:
+            # A trail with x_2 = 0 costs as much as one with x_1 = 0
+            if x2:
+                self.recordTrail([(0, x2, [], [], 0),
+                                  (x2, 0, active, outputs, p2)], p2)
+            return
+
+        # The smallest p1 for each pattern of active nibbles of x_3 and the
+        # bound for the rounds from 3 on
+        choices = [self.first_round_choices[(function >> shift) & 0xf]
+                   for shift in self.shifts]
+        costs = numpy.zeros((2, len(self.shifts)), dtype=numpy.int64)
+        for k, shift in enumerate(self.shifts):
+            costs[0][shift // 4] = choices[k][0][0][0]
+            costs[1][shift // 4] = choices[k][1][0][0]
+        first_costs = costs[0].sum() + self.halves @ (costs[1] - costs[0])
+        remaining = self.scale * self.pattern_sizes + self.bounds[rounds - 3]
+        if self.truncated is not None:
+            remaining = numpy.maximum(remaining, self.scale *
+                                      self.truncated_tables[rounds - 2][
+                                          :, self.getPattern(x2)])
+        totals = p2 + first_costs + remaining
+        patterns = numpy.nonzero(totals <= self.bound)[0]
+
+        for x3_pattern in patterns[numpy.argsort(totals[patterns],
+                                                 kind="stable")].tolist():
+            values = [choices[k][(x3_pattern >> (shift // 4)) & 1]
+                      for k, shift in enumerate(self.shifts)]
+            self.enumerateFirstRound(rounds, x2, active, outputs, p2,
+                                     function, values,
+                                     int(remaining[x3_pattern]))
+            if self.best_trail is not None:
+                return
+        return
+
+    def enumerateFirstRound(self, rounds, x2, active, outputs, p2, function,
+                            values, remaining):
+        """
+        Enumerates the values of x_1 with the given values of each nibble
+        such that p1 + p2 + remaining reaches the bound.
+        """
+        # The smallest p1 of the nibbles which are not yet assigned
+        suffix = [0] * (len(values) + 1)
+        for k in range(len(values) - 1, -1, -1):
+            suffix[k] = suffix[k + 1] + values[k][0][0]
+
+        def enumerateValues(k, p1, x1):
+            if self.best_trail is not None:
+                return
+            if k == len(values):
+                if x2 == 0 and (x1 == 0 or not self.isCanonical(x1)):
+                    return
+                first_active = self.getActiveNibbles(x1)
+                first_outputs = self.getBestOutputs(first_active)
+                trail = [(x1, self.getRoundFunction(first_active,
+                                                    first_outputs) ^ x2,
+                          first_active, first_outputs, p1),
+                         (x2, x1, active, outputs, p2)]
+                self.continueTrail(3, rounds, function ^ x1, x2, p1 + p2,
+                                   trail)
+                return
+            for cost, a in values[k]:
+                if p2 + p1 + cost + suffix[k + 1] + remaining > self.bound:
+                    break
+                enumerateValues(k + 1, p1 + cost, x1 | (a << self.shifts[k]))
+            return
+
+        enumerateValues(0, 0, 0)
+        return
+
+    def continueTrail(self, i, rounds, x, y, weight, trail):
+        """
+        Continues the trail with round i, whose input is (x, y).
+        """
+        if i == rounds:
+            self.procedure_round_n(x, y, weight, trail)
+        else:
+            self.procedure_round_i(i, rounds, x, y, weight, trail)
+        return
+
+    def procedure_round_i(self, i, rounds, x, y, weight, trail):
+        """
+        Enumerates the outputs of the active SSbs of round i such that
+        p1 + ... + pi + B_{n-i} reaches the bound. The nibbles of the next
+        input which are already known bound p_{i+1}, and the outputs are
+        only continued if p1 + ... + p_{i+1} + B_{n-i-1} can reach it.
+        """
+        if weight + self.getStateBound(rounds - i + 1, x, y) > self.bound:
+            return
+        key = self.getStateKey(rounds - i + 1, x, y)
+        if weight + self.state_bounds.get(key, 0) > self.bound:
+            return
+        active = self.getActiveNibbles(x)
+        remaining = self.bounds[rounds - i]
+
+        # The smallest cost of the SSbs which are not yet assigned
+        suffix = [0] * (len(active) + 1)
+        for idx in range(len(active) - 1, -1, -1):
+            suffix[idx] = suffix[idx + 1] + self.min_costs[active[idx][1]]
+        if weight + suffix[0] + remaining > self.bound or \
+           self.reachedDeadline():
+            return
+
+        # A nibble of the next input is known once all active SSbs which
+        # are moved to it have an output
+        completed = [[] for _ in active]
+        pending = set()
+        for idx in range(len(active) - 1, -1, -1):
+            for k in self.targets[active[idx][0]]:
+                if k not in pending:
+                    pending.add(k)
+                    completed[idx].append(self.shifts[k])
+        known = sum(self.min_costs[(y >> shift) & 0xf]
+                    for k, shift in enumerate(self.shifts) if k not in pending)
+
+        outputs = []
+        next_remaining = self.bounds[rounds - i - 1]
+        # The nibbles of the next input are 0 (inactive), 1 (active) or
+        # 2 (not yet known) in the index of the truncated bound
+        box_bounds = self.getBoxBounds(rounds - i, self.getPattern(x))
+        digits = [[3 ** m, 2 * 3 ** m] for m in range(len(self.shifts))]
+        unknown = sum(digit[1] for digit in digits)
+
+        def enumerateOutputs(idx, partial, function, next_cost, box):
+            if self.best_trail is not None:
+                return
+            if idx == len(active):
+                next_x = function ^ y
+                if weight + partial + self.getStateBound(rounds - i, next_x,
+                                                         x) > self.bound:
+                    return
+                self.continueTrail(i + 1, rounds, next_x, x, weight + partial,
+                                   trail + [(x, y, active, list(outputs),
+                                             partial)])
+                return
+            j, a = active[idx]
+            for pi, b in self.rows[a]:
+                if weight + partial + pi + suffix[idx + 1] + remaining > \
+                   self.bound:
+                    break
+                next_function = function ^ self.outputs[j][b]
+                cost = next_cost
+                next_box = box
+                for shift in completed[idx]:
+                    nibble = ((next_function ^ y) >> shift) & 0xf
+                    cost += self.min_costs[nibble]
+                    next_box -= digits[shift // 4][nibble == 0]
+                if weight + partial + pi + suffix[idx + 1] + cost + \
+                   next_remaining > self.bound:
+                    continue
+                if box_bounds is not None and weight + partial + pi + \
+                   suffix[idx + 1] + box_bounds[next_box] > self.bound:
+                    continue
+                outputs.append(b)
+                enumerateOutputs(idx + 1, partial + pi, next_function, cost,
+                                 next_box)
+                outputs.pop()
+            return
+
+        known_box = unknown
+        for k, shift in enumerate(self.shifts):
+            if k not in pending:
+                known_box -= digits[shift // 4][(y >> shift) & 0xf == 0]
+        enumerateOutputs(0, 0, 0, known, known_box)
+        if self.best_trail is None and not self.reachedDeadline():
+            # All trails from this state cost more than bound - weight
+            self.state_bounds[key] = self.bound - weight + 1
+        return
+
+    def procedure_round_n(self, x, y, weight, trail):
+        """
+        Takes the most probable output of each active SSb in the last round
+        and stores the trail if p1 + ... + pn reaches the bound.
+        """
+        pn = self.getMinCost(x)
+        if weight + pn <= self.bound:
+            active = self.getActiveNibbles(x)
+            self.recordTrail(trail + [(x, y, active,
+                                       self.getBestOutputs(active), pn)],
+                             weight + pn)
+        return
+
+    def recordTrail(self, trail, weight):
+        """
+        Stores the trail, given by the input, the active SSbs, their outputs
+        and the cost of each round, as the best trail.
+        """
+        self.bound = weight
+        self.best_trail = trail
+        return
+
+    def getExtendedTrail(self, trail):
+        """
+        Returns the trail extended by one round at the end. This is an upper
+        bound for B_n.
+        """
+        x, y, active, outputs, _ = trail[-1]
+        next_x = self.getRoundFunction(active, outputs) ^ y
+        next_active = self.getActiveNibbles(next_x)
+        return trail + [(next_x, x, next_active,
+                         self.getBestOutputs(next_active),
+                         self.getMinCost(next_x))]
+
+    def getPrependedTrail(self, trail):
+        """
+        Returns the trail extended by one round at the start, where y_1 is
+        chosen to reach the old input. This is an upper bound for B_n.
+        """
+        x, y, _, _, _ = trail[0]
+        active = self.getActiveNibbles(y)
+        outputs = self.getBestOutputs(active)
+        return [(y, self.getRoundFunction(active, outputs) ^ x, active,
+                 outputs, self.getMinCost(y))] + trail
+
+    def findBestTrail(self, rounds, lower_bound=0):
+        """
+        Returns the trail of minimal cost for the given number of rounds,
+        where B_1, ..., B_{n-1} and their trails are already known. The
+        bound B_n' starts at the lower bound and is increased by one until a
+        trail is found. Returns None if the time limit is reached, then
+        lower_bound <= B_n <= bound. A lower bound for B_n can be given,
+        e.g. from the number of active SSbs.
+        """
+        assert len(self.bounds) == rounds
+        if self.truncated is not None:
+            self.extendTruncatedBounds(rounds)
+            # All states except the zero state
+            lower_bound = max(lower_bound, self.scale * int(
+                self.truncated_tables[rounds].ravel()[1:].min()))
+
+        # A round with x_i = 0 has no active SSb, so only B_{n-1} <= B_n
+        self.lower_bound = max([lower_bound, self.bounds[rounds - 1]] +
+                               [self.bounds[i] + self.bounds[rounds - i]
+                                for i in range(1, rounds)])
+        # The trails of n - 1 and n - 2 rounds extended at both ends give
+        # an upper bound
+        upper_trails = [[(0, 1, [], [], 0)]]
+        for start in range(max(1, rounds - 2), rounds):
+            trails = [self.trails[start]]
+            for _ in range(start, rounds):
+                trails = [extended for trail in trails
+                          for extended in (self.getExtendedTrail(trail),
+                                           self.getPrependedTrail(trail))]
+            upper_trails += trails
+        upper_trail = min(upper_trails[rounds > 1:], key=lambda trail: sum(
+            cost for _, _, _, _, cost in trail))
+        upper_bound = sum(cost for _, _, _, _, cost in upper_trail)
+
+        self.bound = self.lower_bound
+        self.best_trail = None
+        while self.bound < upper_bound:
+            self.procedure_round_1(rounds)
+            if self.reachedDeadline():
+                self.bound = upper_bound
+                return None
+            if self.best_trail is not None:
+                self.bounds.append(self.bound)
+                self.trails.append(self.best_trail)
+                return self.best_trail
+            # There is no trail with cost <= bound
+            self.bound += 1
+            self.lower_bound = self.bound
+
+        self.bound = upper_bound
+        self.best_trail = upper_trail
+        self.bounds.append(self.bound)
+        self.trails.append(self.best_trail)
+        return self.best_trail
+
+    def getWeight(self, trail):
+        """
+        Returns the weight of the transitions of the trail.
+        """
+        weights = sboxtables.getDifferentialWeights(ssb_ddt.SSB, 8)
+        return sum(int(weights[a][b]) for _, _, active, outputs, _ in trail
+                   for (_, a), b in zip(active, outputs))
+
+
+def rotl(value, rotation, wordsize):
+    """
+    Returns the value rotated to the left.
+    """
+    rotation %= wordsize
+    return ((value << rotation) | (value >> (wordsize - rotation))) & \
+        ((1 << wordsize) - 1)
+
+
+def printTrail(search, trail):
+    """
+    Prints the input of each round, the outputs of G0 and G1 and the number
+    of active SSbs and the weight of each round.
+    """
+    digits = search.wordsize // 4
+    print("Rounds\t{:<{width}}{:<{width}}{:<{width}}{:<{width}}act\tw".format(
+        "x", "y", "outG0", "outG1", width=digits + 4))
+    for rnd, (x, y, active, outputs, _) in enumerate(trail):
+        out_G0 = out_G1 = 0
+        for (i, _), b in zip(active, outputs):
+            out_G0 |= (b >> 4) << search.shifts[i]
+            out_G1 |= (b & 0xf) << search.shifts[i]
+        print("{}\t0x{:0{digits}x}  0x{:0{digits}x}  0x{:0{digits}x}  "
+              "0x{:0{digits}x}  {}\t-{}".format(
+                  rnd, x, y, out_G0, out_G1, len(active),
+                  search.getWeight([(x, y, active, outputs, 0)]),
+                  digits=digits))
+    print("Active SSbs: {} Weight: {}".format(
+        sum(len(active) for _, _, active, _, _ in trail),
+        search.getWeight(trail)))
+    return
+
+
+def findMinWeightCharacteristic(cipher, parameters):
+    """
+    Computes the minimal number of active SSbs A_1, ..., A_n and the minimal
+    weights B_1, ..., B_n of SAND and prints the characteristic of minimal
+    weight for n rounds. If the time limit is reached, the proven lower
+    bound for the current round count is printed.
+    """
+    wordsize = parameters["wordsize"]
+    permutation = cipher.getNibblePermutation(wordsize)
+    # Only the trails whose x_2 is the smallest of its rotations are searched
+    rotation = cipher.getRotationSymmetry(
+        {"wordsize": wordsize})["words"]["x"][1]
+    searches = [SandSearch(wordsize, cipher.rot_alpha, cipher.rot_beta,
+                           permutation, objective, rotation)
+                for objective in OBJECTIVES]
+    start_time = time.time()
+    if parameters["timelimit"] != -1:
+        for search in searches:
+            search.deadline = start_time + parameters["timelimit"]
+
+    print("Branch-and-bound search for {} - Rounds: {} Wordsize: {}".format(
+        cipher.name, parameters["rounds"], wordsize))
+    print("---")
+    trail = None
+    for rounds in range(1, parameters["rounds"] + 1):
+        for search, name in zip(searches, ["A", "B"]):
+            round_time = time.time()
+            # Every active SSb has a weight of at least scale
+            trail = search.findBestTrail(rounds, search.scale *
+                                         searches[0].bounds[-1]
+                                         if name == "B" else 0)
+            if trail is None:
+                print("Reached the time limit of {} seconds".format(
+                    parameters["timelimit"]))
+                print("{} <= {}_{} <= {}".format(search.lower_bound, name,
+                                                 rounds, search.bound))
+                return None
+            print("{}_{} = {}\t{:.2f}s".format(name, rounds, search.bound,
+                                              time.time() - round_time))
+        sys.stdout.flush()
+
+    print("---")
+    print("Characteristic for {} - Rounds {} - Wordsize {} - Weight {} - "
+          "Time {}s".format(cipher.name, parameters["rounds"], wordsize,
+                            searches[1].bound,
+                            round(time.time() - start_time, 2)))
+    printTrail(searches[1], trail)
+    return [search.bounds[1:] for search in searches]
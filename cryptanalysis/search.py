@@ -5,79 +5,198 @@ Created on Apr 3, 2014
 '''
 
 from parser import parsesolveroutput
-from config import (PATH_STP, PATH_BOOLECTOR, PATH_CRYPTOMINISAT, MAX_WEIGHT,
-                    MAX_CHARACTERISTICS)
+from cryptanalysis import (incremental, bounds, checkpoint, workspace,
+                           modelcache, symmetry, portfolio)
+from config import (PATH_STP, PATH_BOOLECTOR, PATH_CRYPTOMINISAT,
+                    PATH_APPROXMC, MAX_WEIGHT, MAX_CHARACTERISTICS)
 
+import multiprocessing
 import subprocess
-import random
 import math
 import os
+import re
 import time
 import sys
 
-from fractions import gcd
+from math import gcd
 
 
 def computeProbabilityOfDifferentials(cipher, parameters):
     """
     Computes the probability of the differential by iteratively
     summing up all characteristics of a specific weight using
-    a SAT solver.
+    a SAT solver. With the approxmc option the characteristics are
+    counted approximately and a confidence interval is given.
     """
-    rnd_string_tmp = '%030x' % random.randrange(16**30)
     diff_prob = 0
     characteristics_found = 0
-    sat_logfile = "tmp/satlog{}.tmp".format(rnd_string_tmp)
+    # Bounds for the probability which hold with the confidence of ApproxMC
+    diff_prob_bounds = [0, 0]
+    approximate_counts = 0
+
+    # Continue with the next weight after the last completed one
+    state = checkpoint.loadCheckpoint(cipher, parameters)
+    if state:
+        parameters["sweight"] = state["sweight"]
+        diff_prob = state["probability"]
+        characteristics_found = state["characteristics"]
+        diff_prob_bounds = state.get("probabilitybounds", [diff_prob, diff_prob])
+        approximate_counts = state.get("approximatecounts", 0)
 
     start_time = time.time()
 
     while not reachedTimelimit(start_time, parameters["timelimit"]) and \
         parameters["sweight"] < MAX_WEIGHT:
 
-        if os.path.isfile(sat_logfile):
-            os.remove(sat_logfile)
-
-        stp_file = "tmp/{}{}.stp".format(cipher.name, rnd_string_tmp)
-        cipher.createSTP(stp_file, parameters)
-
-        # Start solver
-        sat_process = startSATsolver(stp_file)
-        log_file = open(sat_logfile, "w")
+        stp_file = workspace.getWorkspaceFile(
+            parameters, "{}{}.stp".format(cipher.name, parameters["wordsize"]))
+        model = createModel(cipher, parameters)
 
         # Find the number of solutions with the SAT solver
         print("Finding all trails of weight {}".format(parameters["sweight"]))
 
-        # Watch the process and count solutions
-        solutions = 0
-        while sat_process.poll() is None:
-            line = sat_process.stdout.readline().decode("utf-8")
-            log_file.write(line)
-            if "s SATISFIABLE" in line:
-                solutions += 1
-            if solutions % 100 == 0:
-                print("\tSolutions: {}\r".format(solutions // 2), end="")
-
-        log_file.close()
-        print("\tSolutions: {}".format(solutions // 2))
-
-        assert solutions == countSolutionsLogfile(sat_logfile)
-
-        # The encoded CNF contains every solution twice
-        solutions //= 2
+        tolerance = 1
+        if parameters["approxmc"]:
+            solutions = countSolutionsApproxMC(model, stp_file, parameters)
+            tolerance = 1 + parameters["epsilon"]
+            approximate_counts += 1
+        elif symmetry.getSymmetry(cipher, parameters) is not None:
+            solutions = countSolutionsRotations(cipher, stp_file, parameters)
+        else:
+            solutions = countSolutions(model, stp_file, parameters)
 
         # Print result
-        diff_prob += math.pow(2, -parameters["sweight"]) * solutions
+        weight_prob = math.pow(2, -parameters["sweight"]) * solutions
+        diff_prob += weight_prob
+        diff_prob_bounds[0] += weight_prob / tolerance
+        diff_prob_bounds[1] += weight_prob * tolerance
         characteristics_found += solutions
         if diff_prob > 0.0:
             #print("\tSolutions: {}".format(solutions))
             print("\tTrails found: {}".format(characteristics_found))
             print("\tCurrent Probability: " + str(math.log(diff_prob, 2)))
+            if approximate_counts:
+                # Union bound over all approximate counts
+                confidence = max(0, 1 - approximate_counts * parameters["delta"])
+                print("\tConfidence Interval: [{}, {}] (confidence {})".format(
+                    math.log(diff_prob_bounds[0], 2),
+                    math.log(diff_prob_bounds[1], 2), round(confidence, 4)))
             print("\tTime: {}s".format(round(time.time() - start_time, 2)))
         parameters["sweight"] += 1
 
+        checkpoint.saveCheckpoint(cipher, parameters,
+                                  {"sweight" : parameters["sweight"],
+                                   "probability" : diff_prob,
+                                   "characteristics" : characteristics_found,
+                                   "probabilitybounds" : diff_prob_bounds,
+                                   "approximatecounts" : approximate_counts})
+
     return diff_prob
 
 
+def countSolutions(model, stp_file, parameters):
+    """
+    Returns the number of solutions of the model by enumerating them with
+    CryptoMiniSat.
+    """
+    sat_logfile = workspace.getWorkspaceFile(parameters, "satlog.tmp")
+    if os.path.isfile(sat_logfile):
+        os.remove(sat_logfile)
+
+    # Start solver
+    sat_process = startSATsolver(model, stp_file, parameters)
+    log_file = open(sat_logfile, "w")
+
+    # Watch the process and count solutions
+    solutions = 0
+    while sat_process.poll() is None:
+        line = sat_process.stdout.readline().decode("utf-8")
+        log_file.write(line)
+        if "s SATISFIABLE" in line:
+            solutions += 1
+        if solutions % 100 == 0:
+            print("\tSolutions: {}\r".format(solutions // 2), end="")
+
+    log_file.close()
+    print("\tSolutions: {}".format(solutions // 2))
+
+    assert solutions == countSolutionsLogfile(sat_logfile)
+
+    # The encoded CNF contains every solution twice
+    return solutions // 2
+
+
+def countSolutionsRotations(cipher, stp_file, parameters):
+    """
+    Returns the number of solutions including all rotations, while only the
+    characteristics with the smallest input of its rotations are counted by
+    the solver. A characteristic whose input has period p has p rotations
+    which are not counted, so the characteristics are counted separately
+    for every period.
+    """
+    rotation_symmetry = symmetry.getSymmetry(cipher, parameters)
+    solutions = 0
+    exact_counts = {}
+    for period in symmetry.getPeriods(rotation_symmetry):
+        print("\tInputs with period {}:".format(period))
+        period_parameters = dict(parameters)
+        period_parameters["symmetryperiod"] = period
+        count = countSolutions(createModel(cipher, period_parameters),
+                               stp_file, parameters)
+
+        # Remove the inputs with a smaller period
+        exact_counts[period] = count - sum(
+            exact_count for smaller_period, exact_count in exact_counts.items()
+            if period % smaller_period == 0)
+        solutions += period * exact_counts[period]
+    print("\tSolutions including rotations: {}".format(solutions))
+    return solutions
+
+
+def countSolutionsApproxMC(model, stp_file, parameters):
+    """
+    Returns an (epsilon, delta) approximation of the number of solutions of
+    the model using ApproxMC, i.e. with probability at least 1 - delta the
+    number of solutions lies within a factor of 1 + epsilon of the result.
+    """
+    cnf_file = writeCNF(model, stp_file, parameters)
+    approxmc_parameters = [PATH_APPROXMC,
+                           "--epsilon", str(parameters["epsilon"]),
+                           "--delta", str(parameters["delta"]),
+                           cnf_file]
+    result = subprocess.run(approxmc_parameters, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT).stdout.decode("utf-8")
+
+    solutions = parseApproxMCOutput(result)
+    print("\tSolutions: ~{} (epsilon {}, delta {})".format(
+        solutions // 2, parameters["epsilon"], parameters["delta"]))
+
+    # The encoded CNF contains every solution twice
+    return solutions // 2
+
+
+def parseApproxMCOutput(output):
+    """
+    Returns the number of solutions reported by ApproxMC. Supports the
+    output of ApproxMC 4 (s mc 1234) and of older versions
+    (Number of solutions is: 12*2**5).
+    """
+    match = re.search(r"^s mc (\d+)", output, re.MULTILINE)
+    if match:
+        return int(match.group(1))
+
+    match = re.search(r"Number of solutions is: (\d+)\s*\*\s*2\s*\*\*\s*(\d+)",
+                      output)
+    if match:
+        return int(match.group(1)) * 2**int(match.group(2))
+
+    if "UNSATISFIABLE" in output:
+        return 0
+
+    print("ERROR: Could not parse the output of ApproxMC:\n" + output)
+    exit(1)
+
+
 def findBestConstants(cipher, parameters):
     """
     Search for the optimal differential or linear characteristics.
@@ -105,18 +224,35 @@ def findBestConstants(cipher, parameters):
                 constantMinWeights.append(1)
                 continue
 
-            while weight < MAX_WEIGHT:
-                parameters["rotationconstants"] = [alpha, beta, gamma]
-
-                # Construct problem instance for given parameters
-                stp_file = "tmp/{}_{}const.stp".format(cipher.name, gamma)
-                cipher.createSTP(stp_file, parameters)
+            parameters["rotationconstants"] = [alpha, beta, gamma]
+            stp_file = workspace.getWorkspaceFile(
+                parameters, "{}_{}const.stp".format(cipher.name, gamma))
+
+            # The SAT backends keep the model of the constants in memory
+            session = None
+            if parameters["backend"] != "stp":
+                session = incremental.startSession(
+                    cipher, parameters, stp_file,
+                    lambda model: solve(model, parameters, stp_file))
+
+            # The MaxSAT solver returns the minimal weight in one call
+            if parameters["backend"] == "maxsat":
+                result, weight = session.minimizeWeight()
+                if result is None:
+                    weight = MAX_WEIGHT
+                else:
+                    print("Alpha: {} Beta: {} Gamma: {} Weight: {}".format(
+                        alpha, beta, gamma, weight))
 
-                result = ""
-                if parameters["boolector"]:
-                    result = solveBoolector(stp_file)
+            while weight < MAX_WEIGHT and parameters["backend"] != "maxsat":
+                if session:
+                    result = session.checkWeight(weight)
                 else:
-                    result = solveSTP(stp_file, parameters["threads"])
+                    # Construct problem instance for given parameters
+                    weight_parameters = dict(parameters)
+                    weight_parameters["sweight"] = weight
+                    model = createModel(cipher, weight_parameters)
+                    result = solve(model, parameters, stp_file)
 
                 # Check if a characteristic was found
                 if foundSolution(result):
@@ -124,6 +260,8 @@ def findBestConstants(cipher, parameters):
                         alpha, beta, gamma, weight))
                     break
                 weight += 1
+            if session:
+                session.close()
             constantMinWeights.append(weight)
     print(constantMinWeights)
     return constantMinWeights
@@ -141,76 +279,395 @@ def findMinWeightCharacteristic(cipher, parameters):
     print("---")
 
     start_time = time.time()
+    parameters["steptimes"] = []
+
+    stp_file = workspace.getWorkspaceFile(
+        parameters, "{}{}-r{}.stp".format(cipher.name, parameters["wordsize"],
+                                          parameters["rounds"]))
+
+    # Build the model only once if the weight is not increased one by one
+    session = None
+    if parameters["incremental"] or parameters["strategy"] != "linear" or \
+       parameters["matsuibounds"] or parameters["backend"] != "stp" or \
+       parameters["boolector"]:
+        session = incremental.startSession(
+            cipher, parameters, stp_file,
+            lambda model: solve(model, parameters, stp_file))
+
+    try:
+        if parameters["backend"] == "maxsat":
+            search_strategy = searchMaxSAT
+        else:
+            search_strategy = SEARCH_STRATEGIES[parameters["strategy"]]
+        characteristic = search_strategy(cipher, parameters, start_time,
+                                         stp_file, session)
+    finally:
+        if session:
+            session.close()
+
+    if characteristic:
+        outputCharacteristic(cipher, parameters, characteristic,
+                             round(time.time() - start_time, 2))
+        # The search of the next round count starts from this trail
+        parameters["seedtrail"] = characteristic.characteristic_data
+        # Only optimal weights can be used as round bounds
+        if not reachedTimelimit(start_time, parameters["timelimit"]):
+            parameters["roundbounds"][parameters["rounds"]] = \
+                parameters["sweight"]
+    printStepTimes(parameters["steptimes"])
+
+    return parameters["sweight"]
+
+
+def checkWeight(cipher, parameters, stp_file, session, weight, bound=False):
+    """
+    Checks if there is a characteristic with exactly the given weight, or
+    with at most the given weight if bound is set. Returns the
+    characteristic or None and records the time used by the solver.
+    """
+    step_time = time.time()
+
+    result = ""
+    if session:
+        result = session.checkWeight(weight, bound)
+    else:
+        # Construct problem instance for given parameters
+        parameters["sweight"] = weight
+        model = createModel(cipher, parameters)
+        result = solve(model, parameters, stp_file)
+
+    characteristic = None
+    if foundSolution(result):
+        if session:
+            characteristic = session.getCharacteristic(result, cipher,
+                                                       parameters["rounds"])
+        elif parameters["boolector"]:
+            characteristic = parsesolveroutput.getCharBoolectorOutput(
+                result, cipher, parameters["rounds"])
+        else:
+            characteristic = parsesolveroutput.getCharSTPOutput(
+                result, cipher, parameters["rounds"])
+
+    parameters["steptimes"].append(("<=" if bound else "=", weight,
+                                    "SAT" if characteristic else "UNSAT",
+                                    round(time.time() - step_time, 2)))
+    return characteristic
+
 
+def searchLinear(cipher, parameters, start_time, stp_file, session):
+    """
+    Increases the weight by one until a characteristic is found.
+    """
     while not reachedTimelimit(start_time, parameters["timelimit"]) and \
         parameters["sweight"] < MAX_WEIGHT:
 
+        # Skip weights excluded by the searches for fewer rounds
+        parameters["sweight"] = max(
+            parameters["sweight"], bounds.updateRoundBounds(cipher, parameters))
+
         print("Weight: {} Time: {}s".format(parameters["sweight"],
                                             round(time.time() - start_time, 2)))
 
-        # Construct problem instance for given parameters
-        stp_file = "tmp/{}{}.stp".format(cipher.name,
-                                         parameters["wordsize"])
-        cipher.createSTP(stp_file, parameters)
+        characteristic = checkWeight(cipher, parameters, stp_file, session,
+                                     parameters["sweight"])
+        if characteristic:
+            return characteristic
+        parameters["sweight"] += 1
+    return None
 
-        result = ""
-        if parameters["boolector"]:
-            result = solveBoolector(stp_file)
+
+def searchDescending(cipher, parameters, start_time, stp_file, session):
+    """
+    Starts with the bound weight <= endweight and tightens the bound to the
+    weight of the last characteristic found until the problem becomes
+    unsatisfiable.
+    """
+    best_characteristic = None
+    bound = parameters["endweight"]
+
+    while not reachedTimelimit(start_time, parameters["timelimit"]) and \
+        bound >= parameters["sweight"]:
+
+        print("Weight: <= {} Time: {}s".format(bound,
+                                               round(time.time() - start_time, 2)))
+
+        characteristic = checkWeight(cipher, parameters, stp_file, session,
+                                     bound, True)
+        if not characteristic:
+            break
+        best_characteristic = characteristic
+        bound = getCharacteristicWeight(characteristic) - 1
+
+    if best_characteristic:
+        parameters["sweight"] = getCharacteristicWeight(best_characteristic)
+    return best_characteristic
+
+
+def searchBinary(cipher, parameters, start_time, stp_file, session,
+                 galloping=False):
+    """
+    Binary search for the minimal weight between sweight and endweight. With
+    galloping the upper end is first found by checking the bounds
+    sweight + 2^i - 1 for increasing i.
+    """
+    best_characteristic = None
+    low = parameters["sweight"]
+    high = parameters["endweight"]
+
+    # All weights below low are proven to be impossible
+    step = 1
+    while galloping and low <= high and \
+        not reachedTimelimit(start_time, parameters["timelimit"]):
+        bound = min(low + step - 1, high)
+        print("Weight: <= {} Time: {}s".format(bound,
+                                               round(time.time() - start_time, 2)))
+
+        characteristic = checkWeight(cipher, parameters, stp_file, session,
+                                     bound, True)
+        if characteristic:
+            best_characteristic = characteristic
+            high = getCharacteristicWeight(characteristic)
+            break
+        low = bound + 1
+        step *= 2
+
+    if galloping and not best_characteristic:
+        return None
+
+    while low < high and \
+        not reachedTimelimit(start_time, parameters["timelimit"]):
+        bound = (low + high) // 2
+        print("Weight: <= {} Time: {}s".format(bound,
+                                               round(time.time() - start_time, 2)))
+
+        characteristic = checkWeight(cipher, parameters, stp_file, session,
+                                     bound, True)
+        if characteristic:
+            best_characteristic = characteristic
+            high = getCharacteristicWeight(characteristic)
         else:
-            result = solveSTP(stp_file, parameters["threads"])
-
-        # Check if a characteristic was found
-        if foundSolution(result):
-            current_time = round(time.time() - start_time, 2)
-            print("---")
-            print(("Characteristic for {} - Rounds {} - Wordsize {} - "
-                   "Weight {} - Time {}s".format(cipher.name,
-                                                 parameters["rounds"],
-                                                 parameters["wordsize"],
-                                                 parameters["sweight"],
-                                                 current_time)))
-            characteristic = ""
-            if parameters["boolector"]:
-                characteristic = parsesolveroutput.getCharBoolectorOutput(
-                    result, cipher, parameters["rounds"])
-            else:
-                characteristic = parsesolveroutput.getCharSTPOutput(
-                    result, cipher, parameters["rounds"])
-
-            characteristic.printText()
-
-            if parameters["dot"]:
-                with open(parameters["dot"], "w") as dot_file:
-                    dot_file.write("digraph graphname {")
-                    dot_file.write(characteristic.getDOTString())
-                    dot_file.write("}")
-                print("Wrote .dot to {}".format(parameters["dot"]))
-                
-            if True: #parameters["latex"]:
-                dirs = "tmp/{}-wd{}".format(cipher.name, parameters["wordsize"])
-                if parameters["boolector"]:
-                    dirs += "-bool"
-                elif parameters["threads"] >= 1:
-                    dirs += "-smt"
+            low = bound + 1
+
+    if not best_characteristic and low == high and \
+        not reachedTimelimit(start_time, parameters["timelimit"]):
+        print("Weight: <= {} Time: {}s".format(high,
+                                               round(time.time() - start_time, 2)))
+        best_characteristic = checkWeight(cipher, parameters, stp_file,
+                                          session, high, True)
+
+    if best_characteristic:
+        parameters["sweight"] = getCharacteristicWeight(best_characteristic)
+    return best_characteristic
+
+
+def searchGalloping(cipher, parameters, start_time, stp_file, session):
+    """
+    Galloping search for the minimal weight starting at sweight.
+    """
+    return searchBinary(cipher, parameters, start_time, stp_file, session,
+                        True)
+
+
+def searchMaxSAT(cipher, parameters, start_time, stp_file, session):
+    """
+    Finds the minimal weight with a single call of the MaxSAT solver. If the
+    time limit is reached, sweight is set to the proven lower bound.
+    """
+    timelimit = parameters["timelimit"]
+    if timelimit != -1:
+        timelimit = max(0, timelimit - (time.time() - start_time))
+
+    step_time = time.time()
+    result, lower_bound = session.minimizeWeight(timelimit)
+    if result is None:
+        parameters["steptimes"].append((">=", lower_bound, "UNKNOWN",
+                                        round(time.time() - step_time, 2)))
+        print("No characteristic found, lower bound weight >= {}".format(
+            lower_bound))
+        parameters["sweight"] = lower_bound
+        return None
+
+    characteristic = session.getCharacteristic(result, cipher,
+                                               parameters["rounds"])
+    parameters["sweight"] = getCharacteristicWeight(characteristic)
+    parameters["steptimes"].append(("=", parameters["sweight"], "SAT",
+                                    round(time.time() - step_time, 2)))
+    return characteristic
+
+
+def searchParallel(cipher, parameters, start_time, stp_file, session):
+    """
+    Runs the solver for the weights w, w + 1, ..., w + jobs - 1 at the same
+    time. If a weight is proven to be impossible the window is moved to the
+    next weight. As soon as a characteristic is found all jobs for a higher
+    weight are stopped and the search only waits for the lower weights.
+    Afterwards sweight is the weight of the returned characteristic, or the
+    proven lower bound if none is found.
+    """
+    jobs = {}
+    next_weight = parameters["sweight"]
+    best_weight = None
+    best_characteristic = None
+    impossible_weights = set()
+
+    try:
+        while not reachedTimelimit(start_time, parameters["timelimit"]):
+            # Start the solver for the next weights
+            while len(jobs) < parameters["jobs"] and next_weight < MAX_WEIGHT \
+                  and (best_weight is None or next_weight < best_weight):
+                print("Weight: {} Time: {}s".format(
+                    next_weight, round(time.time() - start_time, 2)))
+                job_file = "{}-w{}.stp".format(stp_file[:-4], next_weight)
+                model = session.getQuery(
+                    [session.getWeightAssertion(next_weight)])
+                jobs[next_weight] = (startSolver(model, job_file, parameters),
+                                     job_file, time.time())
+                next_weight += 1
+
+            if not jobs:
+                break
+
+            time.sleep(0.1)
+
+            for weight in sorted(jobs):
+                if weight not in jobs:
+                    # Already stopped by a lighter characteristic
+                    continue
+                solver_process, job_file, job_start_time = jobs[weight]
+                if solver_process.poll() is None:
+                    continue
+                del jobs[weight]
+
+                with open(job_file + ".out", "r") as output_file:
+                    result = output_file.read()
+                removeJobFiles(job_file)
+
+                if foundSolution(result):
+                    parameters["steptimes"].append(
+                        ("=", weight, "SAT", round(time.time() - job_start_time, 2)))
+                    if best_weight is None or weight < best_weight:
+                        best_weight = weight
+                        best_characteristic = session.getCharacteristic(
+                            result, cipher, parameters["rounds"])
+                        # Stop all jobs for heavier weights
+                        for heavier_weight in [w for w in jobs if w > weight]:
+                            stopJob(jobs.pop(heavier_weight))
                 else:
-                    dirs += "-stp"
-                if not os.path.exists(dirs):
-                    os.makedirs(dirs)
+                    parameters["steptimes"].append(
+                        ("=", weight, "UNSAT", round(time.time() - job_start_time, 2)))
+                    impossible_weights.add(weight)
+
+            if best_weight is not None and \
+               all(weight > best_weight for weight in jobs):
+                break
+    finally:
+        for job in jobs.values():
+            stopJob(job)
+
+    # Continue after the weights which are proven to be impossible
+    lower_bound = parameters["sweight"]
+    while lower_bound in impossible_weights:
+        lower_bound += 1
+
+    if best_characteristic is None:
+        parameters["sweight"] = lower_bound
+        return None
+
+    # A lighter weight may still be open if the time limit was reached
+    if lower_bound < best_weight:
+        print("Reached the time limit of {} seconds".format(
+            parameters["timelimit"]))
+        print("{} <= weight <= {}".format(lower_bound, best_weight))
+    parameters["sweight"] = best_weight
+    return best_characteristic
+
+
+def stopJob(job):
+    """
+    Kills the solver of a job and removes its files.
+    """
+    solver_process, job_file, _ = job
+    if solver_process.poll() is None:
+        solver_process.kill()
+    solver_process.wait()
+    removeJobFiles(job_file)
+    return
 
-                tex_file = dirs + "/{0}-wd{1}-{2}r-{3}weight.tex".format(
-                                         cipher.name,
-                                         parameters["wordsize"],
+
+def removeJobFiles(job_file):
+    """
+    Removes the input and output files of a solver job.
+    """
+    for filename in [job_file, job_file + ".out"]:
+        if os.path.isfile(filename):
+            os.remove(filename)
+    return
+
+
+SEARCH_STRATEGIES = {"linear" : searchLinear,
+                     "binary" : searchBinary,
+                     "galloping" : searchGalloping,
+                     "descending" : searchDescending,
+                     "parallel" : searchParallel}
+
+
+def getCharacteristicWeight(characteristic):
+    """
+    Returns the weight of a characteristic found by the solver.
+    """
+    return int(characteristic.weight, 16)
+
+
+def outputCharacteristic(cipher, parameters, characteristic, current_time):
+    """
+    Prints the characteristic of minimal weight and writes it to the
+    .dot and .tex files.
+    """
+    print("---")
+    print(("Characteristic for {} - Rounds {} - Wordsize {} - "
+           "Weight {} - Time {}s".format(cipher.name,
                                          parameters["rounds"],
+                                         parameters["wordsize"],
                                          parameters["sweight"],
-                )
-                with open(tex_file, "w") as tex:
-                    for i in parameters:
-                        tex.write("%%% {}: {}\n".format(i, parameters[i]))
-                    tex.write(characteristic.getTexString())
-                print("Wrote .tex to {}".format(tex_file))
-            break
-        parameters["sweight"] += 1
-    return parameters["sweight"]
+                                         current_time)))
+
+    characteristic.printText()
+
+    if parameters["dot"]:
+        with open(parameters["dot"], "w") as dot_file:
+            dot_file.write("digraph graphname {")
+            dot_file.write(characteristic.getDOTString())
+            dot_file.write("}")
+        print("Wrote .dot to {}".format(parameters["dot"]))
+        
+    if True: #parameters["latex"]:
+        dirs = getOutputDirectory(cipher, parameters)
+        # Can be created concurrently by the searches for other round counts
+        os.makedirs(dirs, exist_ok=True)
+
+        tex_file = dirs + "/{0}-wd{1}-{2}r-{3}weight.tex".format(
+                                 cipher.name,
+                                 parameters["wordsize"],
+                                 parameters["rounds"],
+                                 parameters["sweight"],
+        )
+        with open(tex_file, "w") as tex:
+            for i in parameters:
+                tex.write("%%% {}: {}\n".format(i, parameters[i]))
+            tex.write(characteristic.getTexString())
+        print("Wrote .tex to {}".format(tex_file))
+    return
+
+
+def printStepTimes(steptimes):
+    """
+    Prints the solver time used for each step of the weight search.
+    """
+    print("Step\tWeight\t\tResult\tTime")
+    for step, (relation, weight, result, step_time) in enumerate(steptimes):
+        print("{}\t{} {}\t\t{}\t{}s".format(step, relation, weight, result,
+                                            step_time))
+    return
 
 
 def findAllCharacteristics(cipher, parameters):
@@ -218,49 +675,54 @@ def findAllCharacteristics(cipher, parameters):
     Outputs all characteristics of a specific weight by excluding
     solutions iteratively.
     """
-    rnd_string_tmp = '%030x' % random.randrange(16**30)
     start_time = time.time()
     total_num_characteristics = 0
 
-    while not reachedTimelimit(start_time, parameters["timelimit"]) and \
-          parameters["sweight"] != parameters["endweight"]:
-        stp_file = "tmp/{}{}.stp".format(cipher.name, rnd_string_tmp)
+    # Continue with the characteristics found before
+    state = checkpoint.loadCheckpoint(cipher, parameters)
+    if state:
+        parameters["sweight"] = state["sweight"]
+        total_num_characteristics = state["characteristics"]
+        parameters["characteristiclog"] = state["characteristiclog"]
+        parameters["blockedCharacteristics"] = checkpoint.loadCharacteristicLog(
+            cipher, parameters, state["characteristiclog"])
+    else:
+        parameters["characteristiclog"] = 0
+        checkpoint.clearCharacteristicLog(cipher, parameters)
 
-        # Start STP TODO: add boolector support
-        cipher.createSTP(stp_file, parameters)
+    stp_file = workspace.getWorkspaceFile(
+        parameters, "{}{}.stp".format(cipher.name, parameters["wordsize"]))
 
-        result = ""
-        if parameters["boolector"]:
-            result = solveBoolector(stp_file)
-        else:
-            result = solveSTP(stp_file, parameters["threads"])
-
-        # Check for solution
-        if foundSolution(result):
-            print(("Characteristic for {} - Rounds {} - Wordsize {}- "
-                   "Weight {}".format(cipher.name,
-                                      parameters["rounds"],
-                                      parameters["wordsize"],
-                                      parameters["sweight"])))
-
-            characteristic = ""
-            if parameters["boolector"]:
-                characteristic = parsesolveroutput.getCharBoolectorOutput(
-                    result, cipher, parameters["rounds"])
-            else:
-                characteristic = parsesolveroutput.getCharSTPOutput(
-                    result, cipher, parameters["rounds"])
+    if parameters["incremental"]:
+        enumerateCharacteristics(cipher, parameters, start_time, stp_file,
+                                 total_num_characteristics)
+    else:
+        while not reachedTimelimit(start_time, parameters["timelimit"]) and \
+              parameters["sweight"] != parameters["endweight"]:
+            # Start STP TODO: add boolector support
+            model = createModel(cipher, parameters)
+            result = solve(model, parameters, stp_file)
+
+            # Check for solution
+            if foundSolution(result):
+                characteristic = ""
+                if parameters["boolector"]:
+                    characteristic = parsesolveroutput.getCharBoolectorOutput(
+                        result, cipher, parameters["rounds"])
+                else:
+                    characteristic = parsesolveroutput.getCharSTPOutput(
+                        result, cipher, parameters["rounds"])
 
-            characteristic.printText()
-            parameters["blockedCharacteristics"].append(characteristic)
-        else:
-            print("Found {} characteristics with weight {}".format(
-                total_num_characteristics, parameters["sweight"]))
-            parameters["sweight"] += 1
-            total_num_characteristics = 0
-            continue
+                total_num_characteristics += addCharacteristic(
+                    cipher, parameters, characteristic)
+            else:
+                print("Found {} characteristics with weight {}".format(
+                    total_num_characteristics, parameters["sweight"]))
+                parameters["sweight"] += 1
+                total_num_characteristics = 0
 
-        total_num_characteristics += 1
+            saveCharacteristicsCheckpoint(cipher, parameters,
+                                          total_num_characteristics)
 
     if parameters["dot"]:
         with open(parameters["dot"], "w") as dot_file:
@@ -275,18 +737,81 @@ def findAllCharacteristics(cipher, parameters):
         
     return
 
+def enumerateCharacteristics(cipher, parameters, start_time, stp_file,
+                             total_num_characteristics):
+    """
+    Outputs all characteristics of each weight using a single incremental
+    boolector session. The found characteristics are excluded by blocking
+    assertions in the solver instead of regenerating the model.
+    """
+    session = incremental.BoolectorSession(
+        incremental.getSMT2Model(cipher, parameters, stp_file))
+
+    try:
+        while not reachedTimelimit(start_time, parameters["timelimit"]) and \
+              parameters["sweight"] != parameters["endweight"]:
+            characteristics = session.enumerateCharacteristics(
+                parameters["sweight"], cipher, parameters["rounds"])
+            for characteristic in characteristics:
+                total_num_characteristics += addCharacteristic(
+                    cipher, parameters, characteristic)
+                saveCharacteristicsCheckpoint(cipher, parameters,
+                                              total_num_characteristics)
+                if reachedTimelimit(start_time, parameters["timelimit"]):
+                    characteristics.close()
+                    return
+            print("Found {} characteristics with weight {}".format(
+                total_num_characteristics, parameters["sweight"]))
+            parameters["sweight"] += 1
+            total_num_characteristics = 0
+            saveCharacteristicsCheckpoint(cipher, parameters,
+                                          total_num_characteristics)
+    finally:
+        session.close()
+    return
+
+
+def addCharacteristic(cipher, parameters, characteristic):
+    """
+    Prints a characteristic found in mode 2 and excludes it from the
+    further search. With --symmetry its rotated copies are printed as well.
+    Returns the number of printed characteristics.
+    """
+    rotations = symmetry.getRotatedCharacteristics(cipher, parameters,
+                                                   characteristic)
+    for rotation in rotations:
+        print(("Characteristic for {} - Rounds {} - Wordsize {}- "
+               "Weight {}".format(cipher.name,
+                                  parameters["rounds"],
+                                  parameters["wordsize"],
+                                  parameters["sweight"])))
+        rotation.printText()
+    parameters["blockedCharacteristics"].append(characteristic)
+    parameters["characteristiclog"] = checkpoint.appendCharacteristic(
+        cipher, parameters, characteristic)
+    return len(rotations)
+
+
+def saveCharacteristicsCheckpoint(cipher, parameters, total_num_characteristics):
+    """
+    Stores the current weight and the number of characteristics found in
+    mode 2. The characteristics themselves are appended to the log by
+    addCharacteristic, the checkpoint only records the size of the log.
+    """
+    checkpoint.saveCheckpoint(
+        cipher, parameters,
+        {"sweight" : parameters["sweight"],
+         "characteristics" : total_num_characteristics,
+         "characteristiclog" : parameters["characteristiclog"]})
+    return
+
+
 def searchCharacteristics(cipher, parameters):
     """
     Searches for differential characteristics of minimal weight
     for an increasing number of rounds.
     """
-    dirs = "tmp/{}-wd{}".format(cipher.name, parameters["wordsize"])
-    if parameters["boolector"]:
-        dirs += "-bool"
-    elif parameters["threads"] >= 1:
-        dirs += "-smt"
-    else:
-        dirs += "-stp"
+    dirs = getOutputDirectory(cipher, parameters)
 
     if not os.path.exists(dirs):
         os.makedirs(dirs)
@@ -307,29 +832,54 @@ def searchCharacteristics(cipher, parameters):
                                          parameters["threads"],
         )
 
+    # Skip the round counts which are already completed
+    state = checkpoint.loadCheckpoint(cipher, parameters)
+    records = []
+    if state:
+        parameters["rounds"] = state["rounds"]
+        parameters["sweight"] = state["sweight"]
+        parameters["roundbounds"] = {int(rounds): weight for rounds, weight
+                                     in state["roundbounds"].items()}
+        records = state["records"]
+
+    if parameters["roundjobs"] > 1:
+        if parameters["endrounds"] is None:
+            print("ERROR: --roundjobs requires --endrounds.")
+            return
+        with open(rec_file, "w") as rec_file:
+            writeRecords(rec_file, records)
+            searchRoundsConcurrent(cipher, parameters, rec_file, records)
+        return
+
     start_time = time.time()
     with open(rec_file, "w") as rec_file:
+        writeRecords(rec_file, records)
         try:
-            while True:
+            while parameters["endrounds"] is None or \
+                  parameters["rounds"] <= parameters["endrounds"]:
                 nr = "R {:2d}r: ".format(parameters["rounds"])
                 print(nr)
                 sys.stdout.flush()
                 rec_file.write(nr)
                 rec_file.flush()
 
+                # The trail contains a prefix and a suffix of fewer rounds
+                parameters["sweight"] = max(parameters["sweight"],
+                                            bounds.getLowerBound(cipher, parameters))
+
                 a_time = time.time()
                 parameters["sweight"] = findMinWeightCharacteristic(
                         cipher, parameters)
                 b_time = time.time() - a_time
                 print("current round time cost: %8.2f s\n" % b_time)
                 sys.stdout.flush()
-                rec_file.write("%2d" % parameters["sweight"])
-                rec_file.write(" (%8.2f s)\n" % b_time)
-                rec_file.flush()
+                writeRoundRecord(rec_file, parameters["sweight"], b_time,
+                                 parameters["steptimes"])
 
-                if parameters["endrounds"] == parameters["rounds"]:
-                    break
+                records.append([parameters["rounds"], parameters["sweight"],
+                                b_time, parameters["steptimes"]])
                 parameters["rounds"] = parameters["rounds"] + 1
+                saveRoundCheckpoint(cipher, parameters, records)
         finally:
             dura_time = time.time() - start_time
             time_cost = "total: %8.2f s\n" % dura_time
@@ -337,6 +887,123 @@ def searchCharacteristics(cipher, parameters):
             rec_file.write(time_cost)
     return
 
+def searchRoundsConcurrent(cipher, parameters, rec_file, records):
+    """
+    Searches the round counts from rounds to endrounds with roundjobs
+    processes at the same time. The optimal weights are shared in a bound
+    table, which every running search uses to raise its weight, as an
+    r-round trail has at least the weight of the best trail for fewer
+    rounds. The results are written to rec_file in the order of the rounds.
+    """
+    manager = multiprocessing.Manager()
+    bound_table = manager.dict(parameters["roundbounds"])
+
+    round_parameters = []
+    for rounds in range(parameters["rounds"], parameters["endrounds"] + 1):
+        job_parameters = dict(parameters)
+        job_parameters["rounds"] = rounds
+        job_parameters["roundbounds"] = dict(parameters["roundbounds"])
+        job_parameters["boundtable"] = bound_table
+        round_parameters.append((cipher, job_parameters))
+
+    start_time = time.time()
+    results = {}
+    next_rounds = parameters["rounds"]
+    try:
+        with multiprocessing.Pool(parameters["roundjobs"]) as pool:
+            for rounds, weight, duration, steptimes in \
+                pool.imap_unordered(searchRound, round_parameters):
+                print("R {:2d}r: {} ({:8.2f} s)".format(rounds, weight,
+                                                         duration))
+                results[rounds] = (weight, duration, steptimes)
+                # Keep the record file in the order of the rounds
+                while next_rounds in results:
+                    rec_file.write("R {:2d}r: ".format(next_rounds))
+                    writeRoundRecord(rec_file, *results[next_rounds])
+                    records.append([next_rounds] +
+                                   list(results.pop(next_rounds)))
+                    next_rounds += 1
+
+                    parameters["rounds"] = next_rounds
+                    parameters["sweight"] = max(parameters["sweight"],
+                                                records[-1][1])
+                    parameters["roundbounds"].update(bound_table.items())
+                    saveRoundCheckpoint(cipher, parameters, records)
+        parameters["roundbounds"].update(bound_table)
+    finally:
+        manager.shutdown()
+        dura_time = time.time() - start_time
+        time_cost = "total: %8.2f s\n" % dura_time
+        print(time_cost)
+        rec_file.write(time_cost)
+    return
+
+def searchRound(round_parameters):
+    """
+    Searches the characteristic of minimal weight for one round count and
+    publishes the optimal weight in the shared bound table.
+    """
+    cipher, parameters = round_parameters
+
+    parameters["sweight"] = max(parameters["sweight"],
+                                bounds.updateRoundBounds(cipher, parameters))
+
+    start_time = time.time()
+    weight = findMinWeightCharacteristic(cipher, parameters)
+    if parameters["rounds"] in parameters["roundbounds"]:
+        parameters["boundtable"][parameters["rounds"]] = weight
+
+    return (parameters["rounds"], weight, time.time() - start_time,
+            parameters["steptimes"])
+
+def saveRoundCheckpoint(cipher, parameters, records):
+    """
+    Saves the completed round counts of mode 1 in the checkpoint.
+    """
+    checkpoint.saveCheckpoint(cipher, parameters,
+                              {"rounds" : parameters["rounds"],
+                               "sweight" : parameters["sweight"],
+                               "roundbounds" : parameters["roundbounds"],
+                               "records" : records})
+    return
+
+def writeRecords(rec_file, records):
+    """
+    Writes the records of the round counts completed before resuming.
+    """
+    for rounds, weight, duration, steptimes in records:
+        rec_file.write("R {:2d}r: ".format(rounds))
+        writeRoundRecord(rec_file, weight, duration, steptimes)
+    return
+
+def writeRoundRecord(rec_file, weight, duration, steptimes):
+    """
+    Writes the minimal weight of one round count and the time of each step
+    to the record file.
+    """
+    rec_file.write("%2d" % weight)
+    rec_file.write(" (%8.2f s)\n" % duration)
+    for relation, step_weight, result, step_time in steptimes:
+        rec_file.write("\t{} {:2d} {:5s} ({:8.2f} s)\n".format(
+            relation, step_weight, result, step_time))
+    rec_file.flush()
+    return
+
+def getOutputDirectory(cipher, parameters):
+    """
+    Returns the directory for the output files of the search.
+    """
+    dirs = "tmp/{}-wd{}".format(cipher.name, parameters["wordsize"])
+    if parameters["backend"] != "stp":
+        dirs += "-" + parameters["backend"]
+    elif parameters["boolector"]:
+        dirs += "-bool"
+    elif parameters["threads"] >= 1:
+        dirs += "-smt"
+    else:
+        dirs += "-stp"
+    return dirs
+
 def reachedTimelimit(start_time, timelimit):
     """
     Return True if the timelimit was reached.
@@ -358,51 +1025,123 @@ def countSolutionsLogfile(logfile_path):
         return logged_solutions
     return -1
 
-def startSATsolver(stp_file):
+def createModel(cipher, parameters):
+    """
+    Returns the model of the cipher for the given parameters in CVC format.
+    The body of the model is generated only once for each structure.
+    """
+    return modelcache.getModel(cipher, parameters)
+
+def writeCNF(model, stp_file, parameters):
     """
-    Return CryptoMiniSat process started with the given stp_file.
+    Converts the model to CNF with STP and returns the path of the CNF
+    file, which is written to the directory of stp_file.
     """
-    # Start STP to construct CNF
-    subprocess.check_output([PATH_STP, "--exit-after-CNF", "--output-CNF",
-                             stp_file, "--CVC", "--disable-simplifications"])
+    workspace.writeModelFile(parameters, stp_file, model)
+
+    # Start STP to construct CNF, which is written to output_0.cnf in the
+    # working directory of STP
+    cnf_dir = os.path.dirname(os.path.abspath(stp_file))
+    stp_binary = PATH_STP
+    if os.sep in stp_binary:
+        stp_binary = os.path.abspath(stp_binary)
+    subprocess.check_output([stp_binary, "--exit-after-CNF", "--output-CNF",
+                             "--CVC", "--disable-simplifications"],
+                            input=model.encode("utf-8"), cwd=cnf_dir)
+    return os.path.join(cnf_dir, "output_0.cnf")
+
+def startSATsolver(model, stp_file, parameters):
+    """
+    Return CryptoMiniSat process started with the given model. The CNF is
+    written to the directory of stp_file.
+    """
+    cnf_file = writeCNF(model, stp_file, parameters)
 
     # Find the number of solutions with the SAT solver
     sat_params = [PATH_CRYPTOMINISAT, "--maxsol", str(MAX_CHARACTERISTICS),
-                  "--verb", "0", "-s", "0", "output_0.cnf"]
+                  "--verb", "0", "-s", "0", cnf_file]
 
     sat_process = subprocess.Popen(sat_params, stderr=subprocess.PIPE,
                                    stdout=subprocess.PIPE)
 
     return sat_process
 
-def solveSTP(stp_file, threads=0):
+def solve(model, parameters, stp_file=None):
     """
-    Returns the solution for the given SMT problem using STP.
+    Returns the solution for the given SMT problem using the solver selected
+    in the parameters. The model is passed to the solver over stdin and
+    only written to stp_file if the .stp files are kept.
+    """
+    if stp_file is not None:
+        workspace.writeModelFile(parameters, stp_file, model)
+    if parameters["portfolio"]:
+        return portfolio.solve(model, parameters)
+    if parameters["boolector"]:
+        return solveBoolector(model)
+    return solveSTP(model, parameters["threads"])
+
+def startSolver(model, stp_file, parameters):
+    """
+    Returns the solver process started on the given model. The output of
+    the solver is written to stp_file.out.
+    """
+    workspace.writeModelFile(parameters, stp_file, model)
+
+    with open(stp_file + ".out", "w") as output_file:
+        if parameters["boolector"]:
+            model = getSMT2Model(model)
+            solver_process = subprocess.Popen([PATH_BOOLECTOR, "-x", "-m"],
+                                              stdin=subprocess.PIPE,
+                                              stdout=output_file)
+        else:
+            solver_process = subprocess.Popen(
+                getSTPParameters(parameters["threads"]),
+                stdin=subprocess.PIPE, stdout=output_file)
+        solver_process.stdin.write(model.encode("utf-8"))
+        solver_process.stdin.close()
+    return solver_process
+
+def getSTPParameters(threads=0):
+    """
+    Returns the command line for STP, which reads the model from stdin.
     if given threads number (at least >=1), then use cryptominisat.
     """
-    stp_parameters = [PATH_STP, stp_file, "--CVC"]
+    stp_parameters = [PATH_STP, "--CVC"]
     if threads >= 1:
-        stp_parameters = [PATH_STP, stp_file,
-                          "--CVC", "--cryptominisat",
+        stp_parameters = [PATH_STP, "--CVC", "--cryptominisat",
                           "--threads", str(threads)]
-    result = subprocess.check_output(stp_parameters)
+    return stp_parameters
+
+def solveSTP(model, threads=0):
+    """
+    Returns the solution for the given SMT problem using STP.
+    if given threads number (at least >=1), then use cryptominisat.
+    """
+    result = subprocess.check_output(getSTPParameters(threads),
+                                     input=model.encode("utf-8"))
 
     return result.decode("utf-8")
 
-def solveBoolector(stp_file):
+def getSMT2Model(model):
     """
-    Returns the solution for the given SMT problem using boolector.
+    Returns the given model in SMT-LIB2 format using STP.
     """
-    # Create input file with help of STP
-    stp_parameters = [PATH_STP, "--print-back-SMTLIB2", stp_file, "--CVC"]
-    input_file = subprocess.check_output(stp_parameters)
+    stp_parameters = [PATH_STP, "--print-back-SMTLIB2", "--CVC"]
+    smt2_model = subprocess.check_output(stp_parameters,
+                                         input=model.encode("utf-8"))
+    return smt2_model.decode("utf-8")
 
+def solveBoolector(model):
+    """
+    Returns the solution for the given SMT problem using boolector.
+    """
     boolector_parameters = [PATH_BOOLECTOR, "-x", "-m"]
     boolector_process = subprocess.Popen(boolector_parameters,
                                          stdout=subprocess.PIPE,
                                          stdin=subprocess.PIPE)
 
-    result = boolector_process.communicate(input=input_file)[0]
+    result = boolector_process.communicate(
+        input=getSMT2Model(model).encode("utf-8"))[0]
 
     return result.decode("utf-8")
 
@@ -410,4 +1149,5 @@ def foundSolution(solver_result):
     """
     Check if a solution was found.
     """
-    return "Valid" not in solver_result and "unsat" not in solver_result
+    return "Valid" not in solver_result and "unsat" not in solver_result \
+        and "UNSATISFIABLE" not in solver_result
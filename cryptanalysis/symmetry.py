@@ -0,0 +1,167 @@
+'''
+Rotational symmetry of the models. For ciphers like SIMON or SAND the
+model is invariant under rotating all state words, so every characteristic
+has up to wordsize rotated copies with the same weight. With --symmetry
+only the characteristics whose input difference is the smallest of its
+rotations are searched (lex-leader), and the copies are added again when
+the characteristics are printed or counted.
+'''
+
+from parser.stpcommands import getStringLeftRotate as rotl
+
+import re
+
+
+def getSymmetry(cipher, parameters):
+    """
+    Returns the rotational symmetry declared by the cipher if it is used for
+    the search, otherwise None. The parameters are checked once by
+    checkSymmetry before the search.
+    """
+    if not parameters.get("symmetry"):
+        return None
+    return cipher.getRotationSymmetry(parameters)
+
+
+def checkSymmetry(cipher, parameters):
+    """
+    Disables --symmetry and prints the reason if the symmetry can not be
+    used for the search.
+    """
+    if not parameters.get("symmetry"):
+        return
+
+    if cipher.getRotationSymmetry(parameters) is None:
+        print("WARNING: {} does not declare a rotational symmetry, "
+              "all rotations are searched.".format(cipher.name))
+        parameters["symmetry"] = False
+    elif parameters["fixedVariables"]:
+        print("WARNING: The symmetry is not used for fixed variables.")
+        parameters["symmetry"] = False
+    elif parameters["approxmc"]:
+        # The periodic counts are subtracted, which is not possible for an
+        # approximate count
+        print("WARNING: The symmetry is not used with ApproxMC.")
+        parameters["symmetry"] = False
+    elif parameters["backend"] != "stp" and parameters["mode"] in [0, 1]:
+        # The assertions are only available as CVC expressions, the CNF of
+        # these backends is generated without them
+        print("WARNING: The symmetry is not used by the {} backend.".format(
+            parameters["backend"]))
+        parameters["symmetry"] = False
+    return
+
+
+def getWordRotation(symmetry, var_name):
+    """
+    Returns (width, step) of the word, where step is the rotation of the
+    word for one step of the symmetry, or None if the word is not rotated.
+    """
+    for prefix, rotation in symmetry["words"].items():
+        if re.match(r"{}\d+$".format(prefix), var_name):
+            return rotation
+    return None
+
+
+def getRotatedInput(symmetry, steps):
+    """
+    Returns the concatenated input words rotated by the given number of
+    steps.
+    """
+    words = []
+    for var_name in symmetry["inputs"]:
+        width, step = getWordRotation(symmetry, var_name)
+        words.append(rotl(var_name, steps * step, width))
+    return "({})".format("@".join(words))
+
+
+def getSymmetryAssertions(cipher, parameters):
+    """
+    Returns the assertions that the input is the smallest of its rotations.
+    If symmetryperiod is set, the input must also be invariant under
+    rotating it by this number of steps.
+    """
+    symmetry = getSymmetry(cipher, parameters)
+    if symmetry is None:
+        return []
+
+    assertions = []
+    for steps in range(1, symmetry["order"]):
+        assertions.append("BVLE({}, {})".format(getRotatedInput(symmetry, 0),
+                                                getRotatedInput(symmetry, steps)))
+
+    period = parameters.get("symmetryperiod")
+    if period is not None and period % symmetry["order"] != 0:
+        assertions.append("{} = {}".format(getRotatedInput(symmetry, 0),
+                                           getRotatedInput(symmetry, period)))
+    return assertions
+
+
+def getPeriods(symmetry):
+    """
+    Returns the possible periods of the input, which are the divisors of the
+    order of the symmetry.
+    """
+    return [period for period in range(1, symmetry["order"] + 1)
+            if symmetry["order"] % period == 0]
+
+
+def rotateValue(value, rotation, width):
+    """
+    Returns the value of the solver output (0x... or 0b...) rotated to the
+    left and in the same format.
+    """
+    number = int(value, 0)
+    rotation %= width
+    number = ((number << rotation) | (number >> (width - rotation))) & \
+             ((1 << width) - 1)
+    if value.startswith("0b"):
+        return "0b{:0{}b}".format(number, len(value) - 2)
+    return "0x{:0{}x}".format(number, len(value) - 2)
+
+
+def rotateCharacteristic(characteristic, symmetry, steps):
+    """
+    Returns a copy of the characteristic with all words rotated by the given
+    number of steps.
+    """
+    data = {}
+    for var_name, var_value in characteristic.characteristic_data.items():
+        rotation = getWordRotation(symmetry, var_name)
+        if rotation is None:
+            data[var_name] = var_value
+        else:
+            data[var_name] = rotateValue(var_value, steps * rotation[1],
+                                         rotation[0])
+    return type(characteristic)(data, characteristic.cipher,
+                                characteristic.num_rounds,
+                                characteristic.weight)
+
+
+def getInputPeriod(characteristic, symmetry):
+    """
+    Returns the smallest number of steps which leaves the input of the
+    characteristic unchanged.
+    """
+    for period in getPeriods(symmetry):
+        rotated = rotateCharacteristic(characteristic, symmetry, period)
+        if all(rotated.characteristic_data[var_name] ==
+               characteristic.characteristic_data[var_name]
+               for var_name in symmetry["inputs"]):
+            return period
+    return symmetry["order"]
+
+
+def getRotatedCharacteristics(cipher, parameters, characteristic):
+    """
+    Returns the characteristic and its rotated copies. A characteristic with
+    an input of period p is only rotated p times, as the other rotations
+    have the same input and are found by the solver themselves.
+    """
+    symmetry = getSymmetry(cipher, parameters)
+    if symmetry is None:
+        return [characteristic]
+
+    return [characteristic] + [
+        rotateCharacteristic(characteristic, symmetry, steps)
+        for steps in range(1, getInputPeriod(characteristic, symmetry))]
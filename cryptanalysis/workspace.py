@@ -0,0 +1,58 @@
+'''
+Every search gets its own scratch directory for the CNF and solver output
+files and the optional .stp files, so several searches can run on the same
+host at the same time.
+'''
+
+import os
+import shutil
+import tempfile
+
+
+def createWorkspace(cipher, parameters):
+    """
+    Creates a new scratch directory for the search inside tmpdir (default is
+    ./tmp/, e.g. /dev/shm/ to keep all files in memory).
+    """
+    base_dir = parameters["tmpdir"] or "tmp"
+    os.makedirs(base_dir, exist_ok=True)
+    parameters["workspace"] = tempfile.mkdtemp(
+        prefix="work-{}-wd{}-".format(cipher.name, parameters["wordsize"]),
+        dir=base_dir)
+    return parameters["workspace"]
+
+
+def removeWorkspace(parameters):
+    """
+    Removes the scratch directory of the search and all files in it, unless
+    the files should be kept for debugging.
+    """
+    if parameters.get("workspace") is None:
+        return
+    if parameters["keeptmp"]:
+        print("Kept temporary files in {}".format(parameters["workspace"]))
+    else:
+        shutil.rmtree(parameters["workspace"], ignore_errors=True)
+    parameters["workspace"] = None
+    return
+
+
+def getWorkspaceFile(parameters, filename):
+    """
+    Returns the path of a scratch file of the search.
+    """
+    workspace = parameters.get("workspace")
+    if workspace is None:
+        workspace = "tmp"
+    return os.path.join(workspace, filename)
+
+
+def writeModelFile(parameters, stp_file, model):
+    """
+    Writes the model to stp_file if the .stp files should be kept for
+    debugging. The solvers read the model from stdin.
+    """
+    if parameters["stpfiles"]:
+        with open(stp_file, "w") as output_file:
+            output_file.write(model)
+    return
@@ -4,26 +4,30 @@ Created on Mar 28, 2014
 @author: stefan
 '''
 
-from cryptanalysis import search
+from cryptanalysis import (search, workspace, portfolio, matsui, sandsearch,
+                           symmetry)
+from parser import stpcommands
 from ciphers import (simon, speck, simonlinear, keccak, keccakdiff,
                      siphash, simonrk, chaskeymachalf, simonkeyrc,
                      ketje, ascon, salsa, chacha, skinny, skinnyrk, gimli,
-                     present, craft, craftlinear, trifle, trifle, triflerk,
-                     sand_diff_pattern, sand_diff_actsbox, sand_linear_actsbox)
+                     present, gift, rectangle, craft, craftlinear, trifle,
+                     trifle, triflerk, sand_diff_pattern, sand_diff_actsbox,
+                     sand_linear_actsbox)
 
-from config import PATH_STP, PATH_CRYPTOMINISAT, PATH_BOOLECTOR
+from config import PATH_STP, PATH_CRYPTOMINISAT, PATH_BOOLECTOR, PATH_APPROXMC
 
 from argparse import ArgumentParser, RawTextHelpFormatter
 
 import yaml
 import os
+import signal
+import sys
 
 
-def startsearch(tool_parameters):
+def getCipher(name):
     """
-    Starts the search tool for the given parameters
+    Returns the cipher with the given name or None if it is not supported.
     """
-
     cipher_suite = {"simon" : simon.SimonCipher(),
                     "speck" : speck.SpeckCipher(),
                     "simonlinear" : simonlinear.SimonLinearCipher(),
@@ -41,6 +45,8 @@ def startsearch(tool_parameters):
                     "skinnyrk" : skinnyrk.SkinnyRKCipher(),
                     "gimli" : gimli.GimliCipher(),
                     "present" : present.PresentCipher(),
+                    "gift" : gift.GiftCipher(),
+                    "rectangle" : rectangle.RectangleCipher(),
                     "craft" : craft.CraftCipher(),
                     "craftlinear" : craftlinear.CraftCipherLinear(),                   
                     "trifle" : trifle.TrifleCipher(),
@@ -50,29 +56,62 @@ def startsearch(tool_parameters):
                     "sand_linear_actsbox" : sand_linear_actsbox.Cipher(),
     }
 
-    cipher = None
+    return cipher_suite.get(name)
+
+
+def startsearch(tool_parameters):
+    """
+    Starts the search tool for the given parameters
+    """
+    cipher = getCipher(tool_parameters["cipher"])
 
-    if tool_parameters["cipher"] in cipher_suite:
-        cipher = cipher_suite[tool_parameters["cipher"]]
-    else:
+    if cipher is None:
         print("Cipher not supported!")
         return
 
+    stpcommands.setWeightEncoding(tool_parameters["weightencoding"],
+                                  tool_parameters["endweight"])
+
+    # Only keep --symmetry if the cipher and the options support it
+    symmetry.checkSymmetry(cipher, tool_parameters)
+
+    # Each search uses its own directory for temporary files
+    workspace.createWorkspace(cipher, tool_parameters)
+
     # Handle program flow
-    if tool_parameters["mode"] == 0:
-        search.findMinWeightCharacteristic(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 1:
-        search.searchCharacteristics(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 2:
-        search.findAllCharacteristics(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 3:
-        search.findBestConstants(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 4:
-        search.computeProbabilityOfDifferentials(cipher, tool_parameters)
+    try:
+        if tool_parameters["mode"] == 0:
+            search.findMinWeightCharacteristic(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 1:
+            search.searchCharacteristics(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 2:
+            search.findAllCharacteristics(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 3:
+            search.findBestConstants(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 4:
+            search.computeProbabilityOfDifferentials(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 5:
+            if cipher.name == "sand_diff_actsbox":
+                sandsearch.findMinWeightCharacteristic(cipher, tool_parameters)
+            else:
+                matsui.findMinWeightCharacteristic(cipher, tool_parameters)
+    finally:
+        workspace.removeWorkspace(tool_parameters)
 
     return
 
-def checkenviroment():
+def requiresSTP(params):
+    """
+    Returns True if the search runs STP. The cnf, pysat and maxsat backends
+    of mode 0 and 1 and the branch-and-bound search of mode 5 do not.
+    """
+    if params["mode"] == 5:
+        return False
+    if params["mode"] in [0, 1]:
+        return params["backend"] == "stp"
+    return True
+
+def checkenviroment(params):
     """
     Basic checks if the enviroment is set up correctly
     """
@@ -81,8 +120,10 @@ def checkenviroment():
         os.makedirs("./tmp/")
 
     if not os.path.exists(PATH_STP):
-        print("ERROR: Could not find STP binary, please check config.py")
-        exit()
+        if requiresSTP(params):
+            print("ERROR: Could not find STP binary, please check config.py")
+            exit()
+        print("WARNING: Could not find STP binary, please check config.py.")
 
     if not os.path.exists(PATH_CRYPTOMINISAT):
         print("WARNING: Could not find CRYPTOMINISAT binary, please check "
@@ -92,6 +133,10 @@ def checkenviroment():
         print("WARNING: Could not find BOOLECTOR binary, \"--boolector\" "
               "option not available.")
 
+    if not os.path.exists(PATH_APPROXMC):
+        print("WARNING: Could not find APPROXMC binary, \"--approxmc\" "
+              "option not available.")
+
     return
 
 
@@ -111,6 +156,30 @@ def loadparameters(args):
               "endweight" : 1000,
               "iterative" : False,
               "boolector" : False,
+              "incremental" : False,
+              "strategy" : "linear",
+              "jobs" : os.cpu_count(),
+              "matsuibounds" : False,
+              "roundbounds" : {},
+              "roundjobs" : 1,
+              "checkpoint" : None,
+              "resume" : False,
+              "checkpointkey" : None,
+              "characteristiclog" : 0,
+              "tmpdir" : None,
+              "keeptmp" : False,
+              "stpfiles" : False,
+              "approxmc" : False,
+              "symmetry" : False,
+              "portfolio" : None,
+              "backend" : "stp",
+              "satsolver" : None,
+              "seedphases" : False,
+              "weightencoding" : "bvplus",
+              "ssbencoding" : "cnf",
+              "modelcache" : None,
+              "epsilon" : 0.8,
+              "delta" : 0.2,
               "dot" : None,
               "latex" : None,
               "nummessages" : 1,
@@ -121,7 +190,7 @@ def loadparameters(args):
     # Check if there is an input file specified
     if args.inputfile:
         with open(args.inputfile[0], 'r') as input_file:
-            doc = yaml.load(input_file)
+            doc = yaml.safe_load(input_file)
             params.update(doc)
             if "fixedVariables" in doc:
                 fixed_vars = {}
@@ -165,6 +234,76 @@ def loadparameters(args):
     if args.boolector:
         params["boolector"] = args.boolector
 
+    if args.incremental:
+        params["incremental"] = args.incremental
+
+    if args.strategy:
+        params["strategy"] = args.strategy[0]
+
+    if args.jobs:
+        params["jobs"] = args.jobs[0]
+
+    if args.matsuibounds:
+        params["matsuibounds"] = args.matsuibounds
+
+    if args.roundjobs:
+        params["roundjobs"] = args.roundjobs[0]
+
+    if args.checkpoint:
+        params["checkpoint"] = args.checkpoint[0]
+
+    if args.resume:
+        params["resume"] = args.resume
+
+    if args.tmpdir:
+        params["tmpdir"] = args.tmpdir[0]
+
+    if args.keeptmp:
+        params["keeptmp"] = args.keeptmp
+
+    if args.stpfiles:
+        params["stpfiles"] = args.stpfiles
+
+    if args.symmetry:
+        params["symmetry"] = args.symmetry
+
+    if args.portfolio:
+        for configuration in args.portfolio:
+            portfolio.parseConfiguration(configuration)
+        params["portfolio"] = args.portfolio
+        # The result of the portfolio is always in the format of STP
+        params["boolector"] = False
+
+    if args.approxmc:
+        params["approxmc"] = args.approxmc
+
+    if args.epsilon:
+        params["epsilon"] = args.epsilon[0]
+
+    if args.delta:
+        params["delta"] = args.delta[0]
+
+    if args.backend:
+        params["backend"] = args.backend[0]
+
+    if args.satsolver:
+        params["satsolver"] = args.satsolver[0]
+
+    if args.seedphases:
+        if params["backend"] not in ["pysat", "maxsat"]:
+            print("WARNING: --seedphases is only used by the pysat and "
+                  "maxsat backends.")
+        params["seedphases"] = args.seedphases
+
+    if args.weightencoding:
+        params["weightencoding"] = args.weightencoding[0]
+
+    if args.ssbencoding:
+        params["ssbencoding"] = args.ssbencoding[0]
+
+    if args.modelcache:
+        params["modelcache"] = args.modelcache[0]
+
     if args.nummessages:
         params["nummessages"] = args.nummessages[0]
 
@@ -180,10 +319,9 @@ def loadparameters(args):
     return params
 
 
-def main():
+def getArgumentParser():
     """
-    Parse the arguments and start the request functionality with the provided
-    parameters.
+    Returns the parser for the command line arguments.
     """
     parser = ArgumentParser(description="This tool finds the best differential"
                                         "trail in a cryptopgrahic primitive"
@@ -206,13 +344,15 @@ def main():
     parser.add_argument('--nummessages', nargs=1, type=int,
                         help="Number of message blocks.")
     parser.add_argument('--mode', nargs=1, type=int, 
-                        choices=[0, 1, 2, 3, 4], help=
+                        choices=[0, 1, 2, 3, 4, 5], help=
                         "0 = search characteristic for fixed round\n"
                         "1 = search characteristic for all rounds starting at"
                         "the round specified\n"
                         "2 = search all characteristic for a specific weight\n"
                         "3 = used for key recovery\n"
-                        "4 = determine the probability of the differential\n")
+                        "4 = determine the probability of the differential\n"
+                        "5 = search characteristic with Matsui's algorithm\n"
+                        "    (present, gift, rectangle, sand_diff_actsbox)\n")
     parser.add_argument('--timelimit', nargs=1, type=int,
                         help="Set a timelimit for the search in seconds.")
     parser.add_argument('--iterative', action="store_true",
@@ -225,14 +365,123 @@ def main():
     parser.add_argument('--latex', nargs=1, help="Print the trail in .tex format.")
     parser.add_argument('--threads', nargs=1, type=int,
                         help="the number of used threads for cryptominisat.")
+    parser.add_argument('--incremental', action="store_true",
+                        help="Build the model once and check all weights in a\n"
+                             "single incremental boolector session.")
+    parser.add_argument('--strategy', nargs=1,
+                        choices=["linear", "binary", "galloping", "descending",
+                                 "parallel"],
+                        help=
+                        "Strategy used to find the minimal weight.\n"
+                        "linear = increase the weight by one (default)\n"
+                        "binary = binary search between sweight and endweight\n"
+                        "galloping = check sweight + 2^i - 1 and then binary search\n"
+                        "descending = tighten weight <= w until unsatisfiable\n"
+                        "parallel = check the weights w, ..., w + jobs - 1 at\n"
+                        "           the same time\n")
+    parser.add_argument('--jobs', nargs=1, type=int,
+                        help="Number of solver processes used by the parallel\n"
+                             "strategy (default: number of cores).")
+    parser.add_argument('--matsuibounds', action="store_true",
+                        help="Use the optimal weights B_i of fewer rounds to\n"
+                             "bound the weight of every prefix and suffix.")
+    parser.add_argument('--roundjobs', nargs=1, type=int,
+                        help="Number of round counts searched at the same time\n"
+                             "in mode 1.")
+    parser.add_argument('--checkpoint', nargs=1,
+                        help="File used to store the state of the search in\n"
+                             "mode 1, 2 and 4.")
+    parser.add_argument('--resume', action="store_true",
+                        help="Resume the search from the checkpoint file.")
+    parser.add_argument('--tmpdir', nargs=1,
+                        help="Directory for the temporary files of the search,\n"
+                             "e.g. /dev/shm (default: ./tmp/).")
+    parser.add_argument('--keeptmp', action="store_true",
+                        help="Keep the temporary files after the search.")
+    parser.add_argument('--stpfiles', action="store_true",
+                        help="Also write the models passed to the solver to\n"
+                             ".stp files in the temporary directory.")
+    parser.add_argument('--portfolio', nargs='+',
+                        help="Run several solver configurations on every\n"
+                             "query and take the first answer: stp,\n"
+                             "cms<threads> (STP with CryptoMiniSat) or\n"
+                             "boolector, each with an optional @seed which\n"
+                             "shuffles the assertions, e.g. stp cms4 boolector\n"
+                             "stp@1. The winners are logged to\n"
+                             "tmp/portfolio.log.")
+    parser.add_argument('--symmetry', action="store_true",
+                        help="Search only one rotation of each characteristic\n"
+                             "for ciphers which are invariant under rotations\n"
+                             "(simon, sand). Mode 2 and 4 add the rotations.")
+    parser.add_argument('--seedphases', action="store_true",
+                        help="In mode 1, use the optimal trail of the previous\n"
+                             "round count as phases of the solver, aligned as\n"
+                             "prefix and as suffix (pysat and maxsat backend).")
+    parser.add_argument('--approxmc', action="store_true",
+                        help="Count the trails of each weight in mode 4\n"
+                             "approximately with ApproxMC.")
+    parser.add_argument('--epsilon', nargs=1, type=float,
+                        help="Tolerance of the approximate count (default: 0.8).")
+    parser.add_argument('--delta', nargs=1, type=float,
+                        help="Confidence 1 - delta of the approximate count\n"
+                             "(default: 0.2).")
+    parser.add_argument('--backend', nargs=1,
+                        choices=["stp", "cnf", "pysat", "maxsat"],
+                        help=
+                        "Backend used for mode 0 and 1.\n"
+                        "stp = generate a CVC model for STP (default)\n"
+                        "cnf = generate the CNF directly, if supported by the\n"
+                        "      cipher (simon, present, sand_diff_actsbox)\n"
+                        "pysat = solve the same CNF incrementally inside the\n"
+                        "        process with pycryptosat or PySAT\n"
+                        "maxsat = find the minimal weight of the same CNF in\n"
+                        "         one call of the MaxSAT solver RC2 (PySAT)\n")
+    parser.add_argument('--satsolver', nargs=1,
+                        help="Command of the DIMACS solver used by the cnf\n"
+                             "backend (default: cryptominisat --verb 0).\n"
+                             "For the pysat backend the name of the PySAT\n"
+                             "solver, e.g. cadical153 or glucose4, or\n"
+                             "cryptominisat for pycryptosat (default if\n"
+                             "installed, otherwise cadical153). For the\n"
+                             "maxsat backend the SAT solver of RC2\n"
+                             "(default: g3).")
+    parser.add_argument('--weightencoding', nargs=1,
+                        choices=["bvplus", "seqcounter", "totalizer",
+                                 "modtotalizer"],
+                        help=
+                        "Encoding of the weight in the STP model.\n"
+                        "bvplus = sum of the bits with BVPLUS (default)\n"
+                        "seqcounter = sequential counter\n"
+                        "totalizer = totalizer\n"
+                        "modtotalizer = modulo totalizer\n"
+                        "The cardinality networks count up to endweight.\n")
+    parser.add_argument('--ssbencoding', nargs=1, choices=["cnf", "array"],
+                        help=
+                        "Encoding of the SSb of SAND in the STP model.\n"
+                        "cnf = minimized clauses over the bits (default)\n"
+                        "array = reads of a lookup table array\n")
+    parser.add_argument('--modelcache', nargs=1,
+                        help="Directory in which the generated round models\n"
+                             "are kept for later searches.")
+    return parser
+
 
+def main():
+    """
+    Parse the arguments and start the request functionality with the provided
+    parameters.
+    """
+    parser = getArgumentParser()
 
     # Parse command line arguments and construct parameter list.
     args = parser.parse_args()
     params = loadparameters(args)
 
     # Check if enviroment is setup correctly.
-    checkenviroment()
+    checkenviroment(params)
+
+    # Remove the temporary files also if the search is terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(1))
 
     # Start the solver
     startsearch(params)
@@ -0,0 +1,193 @@
+'''
+Cardinality networks for the weight of a characteristic. Instead of adding
+up the bits with BVPLUS, a circuit of 1-bit AND/OR gates computes for each
+k whether at least k of the bits are set, which bit-blasts into a much
+smaller CNF and lets the solver propagate the weight bound directly.
+'''
+
+import math
+
+TRUE = "0bin1"
+FALSE = "0bin0"
+
+
+class Circuit(object):
+    """
+    A circuit of AND and OR gates over 1-bit expressions. Every gate is a
+    new 1-bit variable, which is defined by an assertion in the model.
+    """
+
+    prefix = None
+    gates = None
+
+    def __init__(self, prefix="wc"):
+        self.prefix = prefix
+        self.gates = []
+        return
+
+    def addGate(self, operation, inputs):
+        """
+        Returns a new variable for the given gate.
+        """
+        output = "{}{}".format(self.prefix, len(self.gates))
+        self.gates.append((output, operation, inputs))
+        return output
+
+    def AND(self, inputs):
+        """
+        Returns the conjunction of the inputs.
+        """
+        if FALSE in inputs:
+            return FALSE
+        inputs = [literal for literal in inputs if literal != TRUE]
+        if not inputs:
+            return TRUE
+        if len(inputs) == 1:
+            return inputs[0]
+        return self.addGate("&", inputs)
+
+    def OR(self, inputs):
+        """
+        Returns the disjunction of the inputs.
+        """
+        if TRUE in inputs:
+            return TRUE
+        inputs = [literal for literal in inputs if literal != FALSE]
+        if not inputs:
+            return FALSE
+        if len(inputs) == 1:
+            return inputs[0]
+        return self.addGate("|", inputs)
+
+    def NOT(self, literal):
+        """
+        Returns the negation of the input.
+        """
+        if literal == TRUE:
+            return FALSE
+        if literal == FALSE:
+            return TRUE
+        return self.addGate("~", [literal])
+
+    def getCVC(self):
+        """
+        Returns the declaration and definition of all gates in CVC format.
+        """
+        if not self.gates:
+            return ""
+        command = ", ".join(output for output, _, _ in self.gates)
+        command += ": BITVECTOR(1);\n"
+        for output, operation, inputs in self.gates:
+            if operation == "~":
+                command += "ASSERT({} = ~{});\n".format(output, inputs[0])
+            else:
+                command += "ASSERT({} = ({}));\n".format(
+                    output, " {} ".format(operation).join(inputs))
+        return command
+
+
+def getSumAtLeast(circuit, a, b, limit):
+    """
+    Returns s with s[k] = (a + b >= k) for k = 0, ..., limit, where a and b
+    are given in the same unary form, a[i] = (a >= i).
+    """
+    total = [TRUE]
+    for k in range(1, limit + 1):
+        total.append(circuit.OR([circuit.AND([a[i], b[k - i]])
+                                 for i in range(k + 1)
+                                 if i < len(a) and k - i < len(b)]))
+    return total
+
+
+def sequentialCounter(circuit, bits, limit):
+    """
+    Returns ge with ge[k] = (hw(bits) >= k) for k = 0, ..., limit using a
+    sequential counter, which adds O(n * limit) gates.
+    """
+    counter = [TRUE] + [FALSE] * limit
+    for bit in bits:
+        counter = [TRUE] + [circuit.OR([counter[k],
+                                        circuit.AND([counter[k - 1], bit])])
+                            for k in range(1, limit + 1)]
+    return counter
+
+
+def totalizer(circuit, bits, limit):
+    """
+    Returns ge with ge[k] = (hw(bits) >= k) for k = 0, ..., limit using a
+    totalizer, which merges the unary counts of both halves in a tree.
+    """
+    if not bits:
+        return [TRUE] + [FALSE] * limit
+    if len(bits) == 1:
+        return [TRUE, bits[0]] + [FALSE] * (limit - 1)
+
+    middle = len(bits) // 2
+    left = totalizer(circuit, bits[:middle], min(limit, middle))
+    right = totalizer(circuit, bits[middle:], min(limit, len(bits) - middle))
+    count = getSumAtLeast(circuit, left, right, min(limit, len(bits)))
+    return count + [FALSE] * (limit + 1 - len(count))
+
+
+def moduloTotalizer(circuit, bits, limit):
+    """
+    Returns ge with ge[k] = (hw(bits) >= k) for k = 0, ..., limit using a
+    modulo totalizer. The counts are split into a quotient and a remainder
+    modulo p ~ sqrt(limit), which reduces the size of the tree to
+    O(n * sqrt(limit)) gates.
+    """
+    if not bits:
+        return [TRUE] + [FALSE] * limit
+
+    modulus = max(2, int(math.ceil(math.sqrt(limit + 1))))
+    upper, lower = getModuloCount(circuit, bits, modulus,
+                                  limit // modulus + 1)
+
+    ge = [TRUE]
+    for k in range(1, limit + 1):
+        quotient, remainder = divmod(k, modulus)
+        at_least_quotient = upper[quotient] if quotient < len(upper) else FALSE
+        more_than_quotient = upper[quotient + 1] \
+            if quotient + 1 < len(upper) else FALSE
+        ge.append(circuit.OR([more_than_quotient,
+                              circuit.AND([at_least_quotient,
+                                           lower[remainder]])]))
+    return ge
+
+
+def getModuloCount(circuit, bits, modulus, upper_limit):
+    """
+    Returns (upper, lower) with upper[q] = (hw(bits) // modulus >= q) and
+    lower[r] = (hw(bits) % modulus >= r).
+    """
+    if len(bits) == 1:
+        return [TRUE], [TRUE, bits[0]] + [FALSE] * (modulus - 2)
+
+    middle = len(bits) // 2
+    left_upper, left_lower = getModuloCount(circuit, bits[:middle], modulus,
+                                            upper_limit)
+    right_upper, right_lower = getModuloCount(circuit, bits[middle:], modulus,
+                                              upper_limit)
+
+    # Sum of the remainders and the carry into the quotient
+    lower_limit = min(2 * modulus - 2, len(bits))
+    lower_sum = getSumAtLeast(circuit, left_lower, right_lower, lower_limit)
+    lower_sum += [FALSE] * (2 * modulus - len(lower_sum))
+    carry = lower_sum[modulus]
+    no_carry = circuit.NOT(carry)
+    lower = [TRUE] + [circuit.OR([circuit.AND([lower_sum[r], no_carry]),
+                                  lower_sum[modulus + r]])
+                      for r in range(1, modulus)]
+
+    # Sum of the quotients plus the carry
+    limit = min(upper_limit, len(bits) // modulus)
+    upper_sum = getSumAtLeast(circuit, left_upper, right_upper, limit)
+    upper = [TRUE] + [circuit.OR([upper_sum[q],
+                                  circuit.AND([upper_sum[q - 1], carry])])
+                      for q in range(1, limit + 1)]
+    return upper, lower
+
+
+WEIGHT_ENCODINGS = {"seqcounter" : sequentialCounter,
+                    "totalizer" : totalizer,
+                    "modtotalizer" : moduloTotalizer}
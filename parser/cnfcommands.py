@@ -0,0 +1,374 @@
+'''
+Provides functions for constructing a CNF in DIMACS format directly from
+the cipher model, without the CVC front end of STP.
+'''
+
+from parser import sboxcnf, cardinality
+
+import re
+
+
+class CNFModel(object):
+    """
+    A CNF formula over named words. Each word is a list of literals, where
+    the i-th literal is the bit word[i:i]. Words can share the literals of
+    other words, so rotations and bit permutations need no clauses.
+    """
+
+    num_variables = 0
+    clauses = None
+    words = None
+    count_words = None
+    weight_literals = None
+
+    def __init__(self):
+        self.num_variables = 0
+        self.clauses = []
+        self.words = {}
+        self.count_words = {}
+        self.weight_literals = []
+        return
+
+    def copy(self):
+        """
+        Returns a copy of the model to which further clauses can be added.
+        """
+        model = CNFModel()
+        model.num_variables = self.num_variables
+        model.clauses = list(self.clauses)
+        model.words = dict(self.words)
+        model.count_words = dict(self.count_words)
+        model.weight_literals = list(self.weight_literals)
+        return model
+
+    def newVariable(self):
+        """
+        Returns a new variable.
+        """
+        self.num_variables += 1
+        return self.num_variables
+
+    def setupVariables(self, variables, wordsize):
+        """
+        Adds a list of words with wordsize bits to the model.
+        """
+        for variable in variables:
+            self.words[variable] = [self.newVariable() for _ in range(wordsize)]
+        return
+
+    def setWord(self, variable, literals):
+        """
+        Adds a word which consists of the given literals.
+        """
+        self.words[variable] = list(literals)
+        return
+
+    def getBits(self, variable):
+        """
+        Returns the literals of a word, starting with the least significant
+        bit.
+        """
+        return self.words[variable]
+
+    def addClause(self, literals):
+        """
+        Adds the clause (l_0 | l_1 | ...) to the model.
+        """
+        self.clauses.append(list(literals))
+        return
+
+    def addWeight(self, literals):
+        """
+        Adds literals to the weight of the characteristic. Each literal
+        which is true adds one to the weight.
+        """
+        self.weight_literals += literals
+        return
+
+    def setupCountWord(self, variable, literals):
+        """
+        Adds a word which is not part of the formula, but shows the number
+        of true literals in the characteristic.
+        """
+        self.count_words[variable] = list(literals)
+        return
+
+    def assertEqual(self, a, b):
+        """
+        Asserts that the literals in a and b are equal.
+        """
+        for bit_a, bit_b in zip(a, b):
+            self.addClause([-bit_a, bit_b])
+            self.addClause([bit_a, -bit_b])
+        return
+
+    def assertXor(self, a, b, c):
+        """
+        Asserts that c = a ^ b for the literals in a, b and c.
+        """
+        for bit_a, bit_b, bit_c in zip(a, b, c):
+            self.addClause([-bit_a, -bit_b, -bit_c])
+            self.addClause([bit_a, bit_b, -bit_c])
+            self.addClause([bit_a, -bit_b, bit_c])
+            self.addClause([-bit_a, bit_b, bit_c])
+        return
+
+    def assertOr(self, output, inputs):
+        """
+        Asserts that output = inputs[0] | inputs[1] | ...
+        """
+        for literal in inputs:
+            self.addClause([-literal, output])
+        self.addClause([-output] + list(inputs))
+        return
+
+    def assertValue(self, variable, value):
+        """
+        Asserts that the word has the given value, e.g. 0x0001.
+        """
+        if isinstance(value, str):
+            value = int(value, 0)
+        for bit, literal in enumerate(self.getBits(variable)):
+            self.addClause([literal if (value >> bit) & 1 else -literal])
+        return
+
+    def assertVariableValue(self, a, b):
+        """
+        Asserts that the word a is equal to the word or value b.
+        """
+        if b in self.words:
+            self.assertEqual(self.getBits(a), self.getBits(b))
+        else:
+            self.assertValue(a, b)
+        return
+
+    def assertTable(self, literals, table):
+        """
+        Asserts that the value of the literals, with literals[0] as the most
+        significant bit, is one of the values in the table. The clauses are
+        minimized once for each table.
+        """
+        for clause in sboxcnf.getTableCNF(table, len(literals)):
+            self.addClause([literals[literal - 1] if literal > 0
+                            else -literals[-literal - 1] for literal in clause])
+        return
+
+    def assertNonZero(self, variables):
+        """
+        Asserts that not all of the words are zero.
+        """
+        self.addClause([literal for variable in variables
+                        for literal in self.getBits(variable)])
+        return
+
+    def blockCharacteristic(self, words):
+        """
+        Excludes the given values of the words, e.g. {"x0" : "0x0001"}.
+        """
+        clause = []
+        for variable, value in words.items():
+            if variable not in self.words:
+                continue
+            value = int(value, 0)
+            for bit, literal in enumerate(self.getBits(variable)):
+                clause.append(-literal if (value >> bit) & 1 else literal)
+        self.addClause(clause)
+        return
+
+    def assertAtMost(self, literals, bound):
+        """
+        Asserts that at most bound of the literals are true, using the
+        sequential counter of Sinz.
+        """
+        if bound >= len(literals):
+            return
+        if bound < 0:
+            self.addClause([])
+            return
+        if bound == 0:
+            for literal in literals:
+                self.addClause([-literal])
+            return
+
+        # counter[j] is true if at least j + 1 of the literals so far are true
+        counter = [self.newVariable() for _ in range(bound)]
+        self.addClause([-literals[0], counter[0]])
+        for j in range(1, bound):
+            self.addClause([-counter[j]])
+
+        for literal in literals[1:]:
+            next_counter = [self.newVariable() for _ in range(bound)]
+            self.addClause([-literal, next_counter[0]])
+            self.addClause([-counter[0], next_counter[0]])
+            for j in range(1, bound):
+                self.addClause([-literal, -counter[j - 1], next_counter[j]])
+                self.addClause([-counter[j], next_counter[j]])
+            self.addClause([-literal, -counter[bound - 1]])
+            counter = next_counter
+        return
+
+    def assertAtLeast(self, literals, bound):
+        """
+        Asserts that at least bound of the literals are true.
+        """
+        self.assertAtMost([-literal for literal in literals],
+                          len(literals) - bound)
+        return
+
+    def assertWeight(self, weight, bound=False):
+        """
+        Asserts that the weight of the characteristic is equal to weight,
+        or at most weight if bound is set.
+        """
+        self.assertAtMost(self.weight_literals, weight)
+        if not bound:
+            self.assertAtLeast(self.weight_literals, weight)
+        return
+
+    def getWeightCounter(self, encoding, limit):
+        """
+        Returns ge with ge[k] = (weight >= k) for k = 0, ..., limit, using
+        one of the cardinality networks in parser.cardinality. The entries
+        are literals of the model or cardinality.TRUE and cardinality.FALSE.
+        The gates are defined by equivalences, so the counter can be added to
+        a model which is already passed to an incremental solver.
+        """
+        return cardinality.WEIGHT_ENCODINGS[encoding](CNFCircuit(self),
+                                                      self.weight_literals,
+                                                      limit)
+
+    def getDIMACS(self):
+        """
+        Returns the model in DIMACS format. The literals of each word are
+        given in comments of the form "c word x0 1 2 3 ...".
+        """
+        lines = ["c word {} {}".format(variable,
+                                       " ".join(str(l) for l in literals))
+                 for variable, literals in sorted(self.words.items())]
+        lines.append("p cnf {} {}".format(self.num_variables,
+                                          len(self.clauses)))
+        lines += [" ".join(str(literal) for literal in clause) + " 0"
+                  for clause in self.clauses]
+        return "\n".join(lines) + "\n"
+
+    def getValues(self, assignment):
+        """
+        Returns the values of all words for the given set of true literals
+        as hex strings, and the weight of the characteristic.
+        """
+        values = {}
+        for variable, literals in self.words.items():
+            value = 0
+            for bit, literal in enumerate(literals):
+                if literal in assignment:
+                    value |= 1 << bit
+            values[variable] = formatValue(value, len(literals))
+
+        for variable, literals in self.count_words.items():
+            count = sum(1 for literal in literals if literal in assignment)
+            values[variable] = formatValue(count, 16)
+
+        weight = sum(1 for literal in self.weight_literals
+                     if literal in assignment)
+        return values, formatValue(weight, 16)
+
+
+    def getPhases(self, values, shift=0):
+        """
+        Returns the literals which set the words to the given values, where
+        the word with index i takes the value of the word with index i - shift,
+        e.g. x3 takes the value of x2 for shift 1.
+        """
+        phases = []
+        for variable, literals in self.words.items():
+            match = re.match(r"(.*?)(\d+)$", variable)
+            if match is None:
+                continue
+            source = "{}{}".format(match.group(1), int(match.group(2)) - shift)
+            if source not in values:
+                continue
+            value = int(values[source], 0)
+            for bit, literal in enumerate(literals):
+                phases.append(literal if (value >> bit) & 1 else -literal)
+        return phases
+
+class CNFCircuit(object):
+    """
+    A circuit of AND and OR gates over the literals of a CNF model, which
+    provides the interface of cardinality.Circuit. Every gate is a new
+    variable of the model which is defined by its Tseitin clauses.
+    """
+
+    model = None
+
+    def __init__(self, model):
+        self.model = model
+        return
+
+    def AND(self, inputs):
+        """
+        Returns the conjunction of the inputs.
+        """
+        if cardinality.FALSE in inputs:
+            return cardinality.FALSE
+        inputs = [literal for literal in inputs if literal != cardinality.TRUE]
+        if not inputs:
+            return cardinality.TRUE
+        if len(inputs) == 1:
+            return inputs[0]
+        output = self.model.newVariable()
+        for literal in inputs:
+            self.model.addClause([-output, literal])
+        self.model.addClause([output] + [-literal for literal in inputs])
+        return output
+
+    def OR(self, inputs):
+        """
+        Returns the disjunction of the inputs.
+        """
+        if cardinality.TRUE in inputs:
+            return cardinality.TRUE
+        inputs = [literal for literal in inputs if literal != cardinality.FALSE]
+        if not inputs:
+            return cardinality.FALSE
+        if len(inputs) == 1:
+            return inputs[0]
+        output = self.model.newVariable()
+        for literal in inputs:
+            self.model.addClause([output, -literal])
+        self.model.addClause([-output] + inputs)
+        return output
+
+    def NOT(self, literal):
+        """
+        Returns the negation of the input.
+        """
+        if literal == cardinality.TRUE:
+            return cardinality.FALSE
+        if literal == cardinality.FALSE:
+            return cardinality.TRUE
+        return -literal
+
+
+def formatValue(value, wordsize):
+    """
+    Returns the value in the same format as the output of STP.
+    """
+    if wordsize % 4 == 0:
+        return "0x{:0{}x}".format(value, wordsize // 4)
+    return "0b{:0{}b}".format(value, wordsize)
+
+
+def parseSolution(output):
+    """
+    Returns the set of true literals from the output of a SAT solver, or
+    None if the formula is unsatisfiable.
+    """
+    if "s SATISFIABLE" not in output:
+        return None
+
+    assignment = set()
+    for row in output.split("\n"):
+        if row.startswith("v "):
+            assignment.update(int(literal) for literal in row.split()[1:])
+    return assignment
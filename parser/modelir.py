@@ -0,0 +1,674 @@
+'''
+A small intermediate representation for the models of the ciphers. A
+cipher describes its model once with words, bit slices, XOR/AND/rotation
+expressions, table relations and weight terms, and the emitters lower it
+to CVC for STP, SMT-LIB2 for Boolector or a CNF for the DIMACS backend.
+
+Expressions are tuples (operation, width, arguments...). The constructors
+below fold constants, so for example a XOR with zero or a rotation by the
+wordsize does not show up in the model.
+'''
+
+from parser import stpcommands, cnfcommands, sboxcnf
+
+
+def word(name, width):
+    """
+    Returns the word with the given name.
+    """
+    return ("var", width, name)
+
+
+def const(value, width):
+    """
+    Returns a constant of the given width.
+    """
+    return ("const", width, value % 2**width)
+
+
+def isConst(expr, value=None):
+    """
+    Returns True if expr is a constant, with the given value if set.
+    """
+    return expr[0] == "const" and (value is None or expr[2] == value)
+
+
+def getOnes(width):
+    """
+    Returns the value with all bits set.
+    """
+    return 2**width - 1
+
+
+def extract(expr, high, low):
+    """
+    Returns the bits high, ..., low of expr.
+    """
+    width = expr[1]
+    if low == 0 and high == width - 1:
+        return expr
+    if isConst(expr):
+        return const(expr[2] >> low, high - low + 1)
+    if expr[0] == "extract":
+        return extract(expr[2], expr[4] + high, expr[4] + low)
+    if expr[0] == "concat":
+        low_width = expr[3][1]
+        if high < low_width:
+            return extract(expr[3], high, low)
+        if low >= low_width:
+            return extract(expr[2], high - low_width, low - low_width)
+    return ("extract", high - low + 1, expr, high, low)
+
+
+def bit(expr, index):
+    """
+    Returns the bit index of expr.
+    """
+    return extract(expr, index, index)
+
+
+def concat(high, low):
+    """
+    Returns the concatenation high || low.
+    """
+    if isConst(high) and isConst(low):
+        return const((high[2] << low[1]) | low[2], high[1] + low[1])
+    return ("concat", high[1] + low[1], high, low)
+
+
+def concatBits(bits):
+    """
+    Returns the word with the given bits, starting with the least
+    significant bit.
+    """
+    result = bits[0]
+    for next_bit in bits[1:]:
+        result = concat(next_bit, result)
+    return result
+
+
+def bvxor(*exprs):
+    """
+    Returns the XOR of all expressions.
+    """
+    result = exprs[0]
+    for expr in exprs[1:]:
+        if isConst(result, 0):
+            result = expr
+        elif isConst(expr, 0):
+            continue
+        elif result == expr:
+            result = const(0, expr[1])
+        elif isConst(result) and isConst(expr):
+            result = const(result[2] ^ expr[2], expr[1])
+        else:
+            result = ("xor", expr[1], result, expr)
+    return result
+
+
+def bvand(*exprs):
+    """
+    Returns the AND of all expressions.
+    """
+    result = exprs[0]
+    for expr in exprs[1:]:
+        width = expr[1]
+        if isConst(result, 0) or isConst(expr, 0):
+            result = const(0, width)
+        elif isConst(result, getOnes(width)) or result == expr:
+            result = expr
+        elif isConst(expr, getOnes(width)):
+            continue
+        elif isConst(result) and isConst(expr):
+            result = const(result[2] & expr[2], width)
+        else:
+            result = ("and", width, result, expr)
+    return result
+
+
+def bvor(*exprs):
+    """
+    Returns the OR of all expressions.
+    """
+    result = exprs[0]
+    for expr in exprs[1:]:
+        width = expr[1]
+        if isConst(result, getOnes(width)) or isConst(expr, getOnes(width)):
+            result = const(getOnes(width), width)
+        elif isConst(result, 0) or result == expr:
+            result = expr
+        elif isConst(expr, 0):
+            continue
+        elif isConst(result) and isConst(expr):
+            result = const(result[2] | expr[2], width)
+        else:
+            result = ("or", width, result, expr)
+    return result
+
+
+def bvnot(expr):
+    """
+    Returns the bitwise complement of expr.
+    """
+    if isConst(expr):
+        return const(~expr[2], expr[1])
+    if expr[0] == "not":
+        return expr[2]
+    return ("not", expr[1], expr)
+
+
+def rotl(expr, rotation):
+    """
+    Returns expr rotated to the left.
+    """
+    width = expr[1]
+    rotation %= width
+    if rotation == 0:
+        return expr
+    if isConst(expr):
+        value = expr[2]
+        return const((value << rotation) | (value >> (width - rotation)), width)
+    if expr[0] == "rotl":
+        return rotl(expr[2], expr[3] + rotation)
+    return ("rotl", width, expr, rotation)
+
+
+def rotr(expr, rotation):
+    """
+    Returns expr rotated to the right.
+    """
+    return rotl(expr, -rotation)
+
+
+def ite(condition, if_true, if_false):
+    """
+    Returns if_true if the 1-bit condition is set and if_false otherwise.
+    """
+    if isConst(condition):
+        return if_true if condition[2] else if_false
+    if if_true == if_false:
+        return if_true
+    return ("ite", if_true[1], condition, if_true, if_false)
+
+
+def isEqual(a, b):
+    """
+    Returns the 1-bit expression a = b.
+    """
+    if a == b:
+        return const(1, 1)
+    if isConst(a) and isConst(b):
+        return const(int(a[2] == b[2]), 1)
+    return ("eq", 1, a, b)
+
+
+class Model(object):
+    """
+    The model of a cipher. Words are either free variables or defined by an
+    expression, and the constraints and the weight refer to both.
+    """
+
+    variables = None
+    definitions = None
+    constraints = None
+    weight_words = None
+
+    def __init__(self):
+        self.variables = {}
+        self.definitions = {}
+        self.constraints = []
+        self.weight_words = []
+        return
+
+    def addVariables(self, names, width):
+        """
+        Adds free words to the model and returns them.
+        """
+        for name in names:
+            self.variables[name] = width
+        return [word(name, width) for name in names]
+
+    def define(self, name, expr):
+        """
+        Adds a word which is equal to expr and returns it.
+        """
+        self.variables[name] = expr[1]
+        self.definitions[name] = expr
+        return word(name, expr[1])
+
+    def assertEqual(self, a, b):
+        """
+        Asserts that a = b.
+        """
+        if a != b:
+            self.constraints.append(("equal", a, b))
+        return
+
+    def assertZero(self, expr):
+        """
+        Asserts that all bits of expr are zero.
+        """
+        self.assertEqual(expr, const(0, expr[1]))
+        return
+
+    def assertTable(self, bits, table):
+        """
+        Asserts that the value of the bits, with bits[0] as the most
+        significant bit, is one of the values in the table.
+        """
+        self.constraints.append(("table", list(bits), list(table)))
+        return
+
+    def assertNonZero(self, exprs):
+        """
+        Asserts that not all of the expressions are zero.
+        """
+        self.constraints.append(("nonzero", list(exprs)))
+        return
+
+    def addWeight(self, names):
+        """
+        Adds the hamming weight of the words to the weight of the
+        characteristic.
+        """
+        self.weight_words += names
+        return
+
+    def getUsedVariables(self, keep=()):
+        """
+        Returns the free words which occur in a constraint, a definition,
+        the weight or keep. All other words are dropped from the output.
+        """
+        used = set(self.weight_words) | set(self.definitions) | set(keep)
+        pending = list(self.definitions.values())
+        for constraint in self.constraints:
+            if constraint[0] == "equal":
+                pending += constraint[1:]
+            else:
+                pending += constraint[1]
+
+        visited = set()
+        while pending:
+            expr = pending.pop()
+            if expr in visited:
+                continue
+            visited.add(expr)
+            if expr[0] == "var":
+                used.add(expr[2])
+            elif expr[0] not in ("const",):
+                pending += [arg for arg in expr[2:] if isinstance(arg, tuple)]
+        return [name for name in self.variables
+                if name in used and name not in self.definitions]
+
+    def getWeightWidth(self):
+        """
+        Returns the width of the words which make up the weight.
+        """
+        widths = set(self.variables[name] for name in self.weight_words)
+        if len(widths) != 1:
+            print("ERROR: The weight words need to have the same width.")
+            exit(1)
+        return widths.pop()
+
+
+def getCVCExpression(expr):
+    """
+    Returns the expression in CVC format.
+    """
+    operation, width = expr[0], expr[1]
+    if operation == "var":
+        return expr[2]
+    if operation == "const":
+        if width % 4 == 0:
+            return "0hex{:0{}x}".format(expr[2], width // 4)
+        return "0bin{:0{}b}".format(expr[2], width)
+    if operation == "extract":
+        if expr[2][0] == "var":
+            return "{}[{}:{}]".format(expr[2][2], expr[3], expr[4])
+        return "({})[{}:{}]".format(getCVCExpression(expr[2]), expr[3], expr[4])
+    if operation == "xor":
+        return "BVXOR({}, {})".format(getCVCExpression(expr[2]),
+                                      getCVCExpression(expr[3]))
+    if operation == "and":
+        return "({} & {})".format(getCVCExpression(expr[2]),
+                                  getCVCExpression(expr[3]))
+    if operation == "or":
+        return "({} | {})".format(getCVCExpression(expr[2]),
+                                  getCVCExpression(expr[3]))
+    if operation == "not":
+        return "~{}".format(getCVCExpression(expr[2]))
+    if operation == "rotl":
+        return stpcommands.getStringLeftRotate(getCVCExpression(expr[2]),
+                                               expr[3], width)
+    if operation == "concat":
+        return "({} @ {})".format(getCVCExpression(expr[2]),
+                                  getCVCExpression(expr[3]))
+    if operation == "ite":
+        return "(IF {} = 0bin1 THEN {} ELSE {} ENDIF)".format(
+            getCVCExpression(expr[2]), getCVCExpression(expr[3]),
+            getCVCExpression(expr[4]))
+    if operation == "eq":
+        return "(IF {} = {} THEN 0bin1 ELSE 0bin0 ENDIF)".format(
+            getCVCExpression(expr[2]), getCVCExpression(expr[3]))
+    raise ValueError("Unknown operation {}".format(operation))
+
+
+def writeCVC(model, stp_file, parameters, header=""):
+    """
+    Writes the model in CVC format together with the weight, the fixed
+    variables, the blocked characteristics and the query.
+    """
+    commands = [header]
+
+    widths = {}
+    for name in (model.getUsedVariables(parameters["fixedVariables"]) +
+                 list(model.definitions)):
+        widths.setdefault(model.variables[name], []).append(name)
+    for width, names in widths.items():
+        commands.append(stpcommands.getStringForVariables(names, width) + "\n")
+
+    for name, expr in model.definitions.items():
+        commands.append("ASSERT({} = {});\n".format(name, getCVCExpression(expr)))
+
+    for constraint in model.constraints:
+        if constraint[0] == "equal":
+            commands.append("ASSERT({} = {});\n".format(
+                getCVCExpression(constraint[1]), getCVCExpression(constraint[2])))
+        elif constraint[0] == "table":
+            cnf = sboxcnf.getCVCString(
+                sboxcnf.getTableCNF(constraint[2], len(constraint[1])),
+                [getCVCExpression(expr) for expr in constraint[1]])
+            commands.append("ASSERT({} = 0bin1);\n".format(cnf))
+        elif constraint[0] == "nonzero":
+            commands.append("ASSERT(NOT({}));\n".format(" AND ".join(
+                "{} = {}".format(getCVCExpression(expr),
+                                 getCVCExpression(const(0, expr[1])))
+                for expr in constraint[1])))
+    stp_file.write("".join(commands))
+
+    if model.weight_words:
+        stpcommands.setupWeightComputation(stp_file, parameters["sweight"],
+                                           model.weight_words,
+                                           model.getWeightWidth())
+
+    for key, value in parameters["fixedVariables"].items():
+        stpcommands.assertVariableValue(stp_file, key, value)
+
+    for characteristic in parameters["blockedCharacteristics"]:
+        stp_file.write(stpcommands.getBlockingString(characteristic) + "\n")
+
+    stpcommands.setupQuery(stp_file)
+    return
+
+
+def getSMT2Value(value):
+    """
+    Returns a value like 0x0001 or 0b01 in SMT-LIB2 format.
+    """
+    if value.startswith("0x"):
+        return "#x" + value[2:]
+    if value.startswith("0b"):
+        return "#b" + value[2:]
+    return value
+
+
+def getSMT2Expression(expr):
+    """
+    Returns the expression in SMT-LIB2 format.
+    """
+    operation, width = expr[0], expr[1]
+    if operation == "var":
+        return expr[2]
+    if operation == "const":
+        if width % 4 == 0:
+            return "#x{:0{}x}".format(expr[2], width // 4)
+        return "#b{:0{}b}".format(expr[2], width)
+    if operation == "extract":
+        return "((_ extract {} {}) {})".format(expr[3], expr[4],
+                                               getSMT2Expression(expr[2]))
+    if operation in ("xor", "and", "or", "concat"):
+        name = "concat" if operation == "concat" else "bv" + operation
+        return "({} {} {})".format(name, getSMT2Expression(expr[2]),
+                                   getSMT2Expression(expr[3]))
+    if operation == "not":
+        return "(bvnot {})".format(getSMT2Expression(expr[2]))
+    if operation == "rotl":
+        return "((_ rotate_left {}) {})".format(expr[3],
+                                                getSMT2Expression(expr[2]))
+    if operation == "ite":
+        return "(ite (= {} #b1) {} {})".format(getSMT2Expression(expr[2]),
+                                               getSMT2Expression(expr[3]),
+                                               getSMT2Expression(expr[4]))
+    if operation == "eq":
+        return "(ite (= {} {}) #b1 #b0)".format(getSMT2Expression(expr[2]),
+                                                getSMT2Expression(expr[3]))
+    raise ValueError("Unknown operation {}".format(operation))
+
+
+def getSMT2(model, parameters):
+    """
+    Returns the model in SMT-LIB2 format without the final check-sat. The
+    weight is the 16-bit variable weight, which is only fixed if sweight
+    is set.
+    """
+    commands = ["(set-logic QF_BV)\n"]
+    for name in (model.getUsedVariables(parameters["fixedVariables"]) +
+                 list(model.definitions)):
+        commands.append("(declare-fun {} () (_ BitVec {}))\n".format(
+            name, model.variables[name]))
+
+    for name, expr in model.definitions.items():
+        commands.append("(assert (= {} {}))\n".format(name,
+                                                      getSMT2Expression(expr)))
+
+    for constraint in model.constraints:
+        if constraint[0] == "equal":
+            commands.append("(assert (= {} {}))\n".format(
+                getSMT2Expression(constraint[1]),
+                getSMT2Expression(constraint[2])))
+        elif constraint[0] == "table":
+            bits = [getSMT2Expression(expr) for expr in constraint[1]]
+            for clause in sboxcnf.getTableCNF(constraint[2], len(bits)):
+                commands.append("(assert (or {}))\n".format(" ".join(
+                    "(= {} {})".format(bits[abs(literal) - 1],
+                                       "#b1" if literal > 0 else "#b0")
+                    for literal in clause)))
+        elif constraint[0] == "nonzero":
+            commands.append("(assert (or {}))\n".format(" ".join(
+                "(not (= {} {}))".format(getSMT2Expression(expr),
+                                         getSMT2Expression(const(0, expr[1])))
+                for expr in constraint[1])))
+
+    if model.weight_words:
+        width = model.getWeightWidth()
+        terms = ["((_ zero_extend 15) ((_ extract {1} {1}) {0}))".format(name, i)
+                 for name in model.weight_words for i in range(width)]
+        commands.append("(declare-fun weight () (_ BitVec 16))\n")
+        commands.append("(assert (= weight (bvadd {})))\n".format(
+            " ".join(terms) if len(terms) > 1 else terms[0] + " #x0000"))
+        if parameters["sweight"] is not None:
+            commands.append("(assert (= weight (_ bv{} 16)))\n".format(
+                parameters["sweight"]))
+
+    for key, value in parameters["fixedVariables"].items():
+        commands.append("(assert (= {} {}))\n".format(key, getSMT2Value(value)))
+
+    for characteristic in parameters["blockedCharacteristics"]:
+        equalities = ["(= {} {})".format(key, getSMT2Value(value)) for key, value
+                      in sorted(stpcommands.getBlockedWords(
+                          characteristic).items())]
+        commands.append("(assert (not (and {} true)))\n".format(
+            " ".join(equalities)))
+    return "".join(commands)
+
+
+class CNFLowering(object):
+    """
+    Lowers the expressions of a model to literals of a CNFModel. Rotations,
+    bit slices and concatenations only rewire the literals, and every gate
+    is added once even if the expression is used several times.
+    """
+
+    model = None
+    cnf_model = None
+    true_literal = None
+    lowered = None
+
+    def __init__(self, model):
+        self.model = model
+        self.cnf_model = cnfcommands.CNFModel()
+        self.lowered = {}
+        return
+
+    def getTrue(self):
+        """
+        Returns a literal which is always true.
+        """
+        if self.true_literal is None:
+            self.true_literal = self.cnf_model.newVariable()
+            self.cnf_model.addClause([self.true_literal])
+        return self.true_literal
+
+    def getWord(self, name):
+        """
+        Returns the literals of a word and lowers its definition if needed.
+        """
+        if name not in self.cnf_model.words:
+            if name in self.model.definitions:
+                self.cnf_model.setWord(name,
+                                       self.lower(self.model.definitions[name]))
+            else:
+                self.cnf_model.setupVariables([name], self.model.variables[name])
+        return self.cnf_model.getBits(name)
+
+    def getAnd(self, a, b):
+        """
+        Returns a literal for a & b.
+        """
+        true = self.getTrue()
+        if a == -true or b == -true or a == -b:
+            return -true
+        if a == true or a == b:
+            return b
+        if b == true:
+            return a
+        output = self.cnf_model.newVariable()
+        self.cnf_model.addClause([-output, a])
+        self.cnf_model.addClause([-output, b])
+        self.cnf_model.addClause([output, -a, -b])
+        return output
+
+    def getXor(self, a, b):
+        """
+        Returns a literal for a ^ b.
+        """
+        true = self.getTrue()
+        if abs(a) == true:
+            return b if a == -true else -b
+        if abs(b) == true:
+            return a if b == -true else -a
+        if a == b:
+            return -true
+        if a == -b:
+            return true
+        output = self.cnf_model.newVariable()
+        self.cnf_model.assertXor([a], [b], [output])
+        return output
+
+    def getIte(self, condition, a, b):
+        """
+        Returns a literal for (condition ? a : b).
+        """
+        if a == b:
+            return a
+        output = self.cnf_model.newVariable()
+        self.cnf_model.addClause([-condition, -a, output])
+        self.cnf_model.addClause([-condition, a, -output])
+        self.cnf_model.addClause([condition, -b, output])
+        self.cnf_model.addClause([condition, b, -output])
+        return output
+
+    def lower(self, expr):
+        """
+        Returns the literals of expr, starting with the least significant
+        bit.
+        """
+        if expr in self.lowered:
+            return self.lowered[expr]
+
+        operation, width = expr[0], expr[1]
+        if operation == "var":
+            literals = self.getWord(expr[2])
+        elif operation == "const":
+            true = self.getTrue()
+            literals = [true if (expr[2] >> i) & 1 else -true
+                        for i in range(width)]
+        elif operation == "extract":
+            literals = self.lower(expr[2])[expr[4]:expr[3] + 1]
+        elif operation == "xor":
+            literals = [self.getXor(a, b) for a, b in
+                        zip(self.lower(expr[2]), self.lower(expr[3]))]
+        elif operation == "and":
+            literals = [self.getAnd(a, b) for a, b in
+                        zip(self.lower(expr[2]), self.lower(expr[3]))]
+        elif operation == "or":
+            literals = [-self.getAnd(-a, -b) for a, b in
+                        zip(self.lower(expr[2]), self.lower(expr[3]))]
+        elif operation == "not":
+            literals = [-literal for literal in self.lower(expr[2])]
+        elif operation == "rotl":
+            bits = self.lower(expr[2])
+            literals = bits[width - expr[3]:] + bits[:width - expr[3]]
+        elif operation == "concat":
+            literals = self.lower(expr[3]) + self.lower(expr[2])
+        elif operation == "ite":
+            condition = self.lower(expr[2])[0]
+            literals = [self.getIte(condition, a, b) for a, b in
+                        zip(self.lower(expr[3]), self.lower(expr[4]))]
+        elif operation == "eq":
+            equal = self.getTrue()
+            for a, b in zip(self.lower(expr[2]), self.lower(expr[3])):
+                equal = self.getAnd(equal, -self.getXor(a, b))
+            literals = [equal]
+        else:
+            raise ValueError("Unknown operation {}".format(operation))
+
+        self.lowered[expr] = literals
+        return literals
+
+
+def getCNF(model, parameters):
+    """
+    Returns the model as a cnfcommands.CNFModel together with the weight,
+    the fixed variables and the blocked characteristics.
+    """
+    lowering = CNFLowering(model)
+    cnf_model = lowering.cnf_model
+
+    for name in (model.getUsedVariables(parameters["fixedVariables"]) +
+                 list(model.definitions)):
+        lowering.getWord(name)
+
+    for constraint in model.constraints:
+        if constraint[0] == "equal":
+            cnf_model.assertEqual(lowering.lower(constraint[1]),
+                                  lowering.lower(constraint[2]))
+        elif constraint[0] == "table":
+            cnf_model.assertTable([lowering.lower(expr)[0]
+                                   for expr in constraint[1]], constraint[2])
+        elif constraint[0] == "nonzero":
+            cnf_model.addClause([literal for expr in constraint[1]
+                                 for literal in lowering.lower(expr)])
+
+    for name in model.weight_words:
+        cnf_model.addWeight(cnf_model.getBits(name))
+    if parameters["sweight"] is not None:
+        cnf_model.assertWeight(parameters["sweight"])
+
+    for key, value in parameters["fixedVariables"].items():
+        cnf_model.assertVariableValue(key, value)
+
+    for characteristic in parameters["blockedCharacteristics"]:
+        cnf_model.blockCharacteristic(stpcommands.getBlockedWords(characteristic))
+
+    return cnf_model
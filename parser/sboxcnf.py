@@ -0,0 +1,149 @@
+'''
+Minimized CNF for the valid transitions of an S-box. The invalid patterns
+are merged into prime implicants with Quine-McCluskey and a small cover is
+chosen greedily, so each S-box needs a few dozen clauses instead of one
+clause for every invalid pattern. The result is cached in memory and on
+disk, and only the variables are substituted for each S-box in the model.
+'''
+
+import hashlib
+import json
+import os
+
+# Directory of the on-disk cache of minimized tables
+CACHE_DIR = os.path.join("tmp", "sboxcnf")
+
+# Minimized tables which are already loaded
+table_cache = {}
+
+
+def getPrimeImplicants(minterms, num_bits):
+    """
+    Returns the prime implicants of the function which is true exactly for
+    the minterms. Each implicant is a pair (value, mask), where the bits
+    set in mask can take any value.
+    """
+    primes = set()
+    implicants = set((minterm, 0) for minterm in minterms)
+    while implicants:
+        merged = set()
+        combined = set()
+        for value, mask in implicants:
+            for bit in range(num_bits):
+                flip = 1 << bit
+                if mask & flip or value & flip:
+                    continue
+                if (value | flip, mask) in implicants:
+                    merged.add((value, mask | flip))
+                    combined.add((value, mask))
+                    combined.add((value | flip, mask))
+        primes |= implicants - combined
+        implicants = merged
+    return primes
+
+
+def getMinterms(value, mask):
+    """
+    Returns all minterms which are covered by the implicant.
+    """
+    minterms = [value]
+    for bit in range(mask.bit_length()):
+        if (mask >> bit) & 1:
+            minterms += [minterm | (1 << bit) for minterm in minterms]
+    return minterms
+
+
+def getMinimalCover(primes, minterms):
+    """
+    Returns a small set of prime implicants which covers all minterms. The
+    essential implicants are taken first, then the implicant covering most
+    of the remaining minterms, and finally redundant implicants are removed.
+    """
+    coverage = {prime: set(getMinterms(*prime)) for prime in primes}
+    covered_by = {minterm: [] for minterm in minterms}
+    for prime, prime_minterms in coverage.items():
+        for minterm in prime_minterms:
+            covered_by[minterm].append(prime)
+
+    cover = set(primes[0] for primes in covered_by.values() if len(primes) == 1)
+    uncovered = set(minterms)
+    for prime in cover:
+        uncovered -= coverage[prime]
+
+    while uncovered:
+        best = max(coverage, key=lambda prime: (len(coverage[prime] & uncovered),
+                                                bin(prime[1]).count("1"),
+                                                prime))
+        cover.add(best)
+        uncovered -= coverage[best]
+
+    # Larger implicants cover the minterms of some of the first choices
+    for prime in sorted(cover, key=lambda prime: bin(prime[1]).count("1")):
+        others = set()
+        for other in cover:
+            if other != prime:
+                others |= coverage[other]
+        if coverage[prime] <= others:
+            cover.remove(prime)
+    return sorted(cover)
+
+
+def minimizeTable(table, num_bits):
+    """
+    Returns a minimized CNF which is satisfied exactly by the values in
+    the table. Bit 0 is the most significant bit of the values, and each
+    clause is a list of literals i + 1 or -(i + 1) for bit i.
+    """
+    allowed = set(table)
+    invalid = [value for value in range(2**num_bits) if value not in allowed]
+
+    clauses = []
+    for value, mask in getMinimalCover(getPrimeImplicants(invalid, num_bits),
+                                       invalid):
+        clause = []
+        for i in range(num_bits):
+            bit = num_bits - 1 - i
+            if (mask >> bit) & 1:
+                continue
+            clause.append(-(i + 1) if (value >> bit) & 1 else i + 1)
+        clauses.append(clause)
+    return clauses
+
+
+def getTableCNF(table, num_bits):
+    """
+    Returns the minimized CNF of the table, see minimizeTable. Each table is
+    only minimized once and then loaded from the cache.
+    """
+    key = hashlib.sha1("{}:{}".format(
+        num_bits, sorted(set(table))).encode("utf-8")).hexdigest()
+    if key in table_cache:
+        return table_cache[key]
+
+    cache_file = os.path.join(CACHE_DIR, key + ".json")
+    if os.path.isfile(cache_file):
+        with open(cache_file, "r") as input_file:
+            table_cache[key] = json.load(input_file)
+        return table_cache[key]
+
+    clauses = minimizeTable(table, num_bits)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    temp_file = "{}.{}.tmp".format(cache_file, os.getpid())
+    with open(temp_file, "w") as output_file:
+        json.dump(clauses, output_file)
+    os.replace(temp_file, cache_file)
+
+    table_cache[key] = clauses
+    return clauses
+
+
+def getCVCString(clauses, variables):
+    """
+    Returns the CNF as a CVC expression over the 1-bit variables.
+    """
+    cnf = []
+    for clause in clauses:
+        cnf.append("({})".format(" | ".join(
+            variables[literal - 1] if literal > 0
+            else "~" + variables[-literal - 1] for literal in clause)))
+    return " & ".join(cnf)
@@ -0,0 +1,190 @@
+'''
+Computes the DDT, LAT, BCT and DLCT of n x m S-boxes with NumPy. The
+S-box is given as a list of 2^n outputs of m bits. Every table is only
+computed once and then loaded from the cache, which is keyed by a hash of
+the S-box. The returned arrays are shared and therefore read-only.
+'''
+
+import hashlib
+import os
+
+import numpy
+
+CACHE_DIR = os.path.join("tmp", "sboxtables")
+
+# Tables which are already computed
+table_cache = {}
+
+
+def getSboxSize(sbox, output_bits=None):
+    """
+    Returns (n, m), the number of input and output bits of the S-box. If
+    output_bits is not given, it is the larger of n and the bit length of
+    the largest output.
+    """
+    input_bits = len(sbox).bit_length() - 1
+    if len(sbox) != 1 << input_bits:
+        print("ERROR: The S-box has {} entries, which is not a power of "
+              "two.".format(len(sbox)))
+        exit(1)
+
+    if output_bits is None:
+        output_bits = max(input_bits, max(sbox).bit_length())
+    return input_bits, output_bits
+
+
+def getParities(num_bits):
+    """
+    Returns the parity of every num_bits value.
+    """
+    values = numpy.arange(1 << num_bits)
+    parities = numpy.zeros(1 << num_bits, dtype=numpy.int64)
+    for bit in range(num_bits):
+        parities ^= (values >> bit) & 1
+    return parities
+
+
+def computeDDT(sbox, input_bits, output_bits):
+    """
+    DDT[a][b] = #{x | S(x) ^ S(x ^ a) = b}
+    """
+    x = numpy.arange(1 << input_bits)
+    outputs = numpy.array(sbox, dtype=numpy.int64)
+    a = x[:, None] ^ x[None, :]
+    b = outputs[:, None] ^ outputs[None, :]
+    entries = (a << output_bits) | b
+    return numpy.bincount(entries.ravel(),
+                          minlength=1 << (input_bits + output_bits)).reshape(
+                              1 << input_bits, 1 << output_bits)
+
+
+def computeLAT(sbox, input_bits, output_bits):
+    """
+    LAT[a][b] = #{x | a.x = b.S(x)} - 2^(n-1)
+    """
+    parities = getParities(max(input_bits, output_bits))
+    x = numpy.arange(1 << input_bits)
+    outputs = numpy.array(sbox, dtype=numpy.int64)
+    input_signs = 1 - 2 * parities[x[:, None] & x[None, :]]
+    output_signs = 1 - 2 * parities[numpy.arange(1 << output_bits)[:, None] &
+                                    outputs[None, :]]
+    return (input_signs @ output_signs.T) // 2
+
+
+def computeBCT(sbox, input_bits, output_bits):
+    """
+    BCT[a][b] = #{x | S^-1(S(x) ^ b) ^ S^-1(S(x ^ a) ^ b) = a}, only for
+    bijective S-boxes.
+    """
+    if input_bits != output_bits or len(set(sbox)) != len(sbox):
+        print("ERROR: The BCT is only defined for bijective S-boxes.")
+        exit(1)
+
+    x = numpy.arange(1 << input_bits)
+    outputs = numpy.array(sbox, dtype=numpy.int64)
+    inverse = numpy.empty_like(outputs)
+    inverse[outputs] = x
+
+    bct = numpy.empty((1 << input_bits, 1 << output_bits), dtype=numpy.int64)
+    for a in range(1 << input_bits):
+        upper = inverse[outputs[None, :] ^ x[:, None]]
+        lower = inverse[outputs[None, x ^ a] ^ x[:, None]]
+        bct[a] = numpy.count_nonzero((upper ^ lower) == a, axis=1)
+    return bct
+
+
+def computeDLCT(sbox, input_bits, output_bits):
+    """
+    DLCT[a][b] = #{x | b.(S(x) ^ S(x ^ a)) = 0} - 2^(n-1)
+    """
+    parities = getParities(output_bits)
+    y = numpy.arange(1 << output_bits)
+    signs = 1 - 2 * parities[y[:, None] & y[None, :]]
+    return (getDDT(sbox, output_bits) @ signs) // 2
+
+
+TABLES = {"ddt": computeDDT, "lat": computeLAT, "bct": computeBCT,
+          "dlct": computeDLCT}
+
+
+def getTable(name, sbox, output_bits=None):
+    """
+    Returns the table with the given name, which is computed once for each
+    S-box.
+    """
+    input_bits, output_bits = getSboxSize(sbox, output_bits)
+    key = "{}-{}".format(name, hashlib.sha1("{}:{}:{}".format(
+        input_bits, output_bits, list(sbox)).encode("utf-8")).hexdigest())
+    if key in table_cache:
+        return table_cache[key]
+
+    cache_file = os.path.join(CACHE_DIR, key + ".npy")
+    if os.path.isfile(cache_file):
+        table = numpy.load(cache_file)
+    else:
+        table = TABLES[name](sbox, input_bits, output_bits)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp_file = "{}.{}.tmp".format(cache_file, os.getpid())
+        with open(temp_file, "wb") as output_file:
+            numpy.save(output_file, table)
+        os.replace(temp_file, cache_file)
+
+    table.setflags(write=False)
+    table_cache[key] = table
+    return table
+
+
+def getDDT(sbox, output_bits=None):
+    """
+    Returns the difference distribution table of the S-box.
+    """
+    return getTable("ddt", sbox, output_bits)
+
+
+def getLAT(sbox, output_bits=None):
+    """
+    Returns the linear approximation table of the S-box, with the entries
+    #{x | a.x = b.S(x)} - 2^(n-1).
+    """
+    return getTable("lat", sbox, output_bits)
+
+
+def getBCT(sbox, output_bits=None):
+    """
+    Returns the boomerang connectivity table of the S-box.
+    """
+    return getTable("bct", sbox, output_bits)
+
+
+def getDLCT(sbox, output_bits=None):
+    """
+    Returns the differential-linear connectivity table of the S-box, with
+    the entries #{x | b.(S(x) ^ S(x ^ a)) = 0} - 2^(n-1).
+    """
+    return getTable("dlct", sbox, output_bits)
+
+
+def getWeights(table, total):
+    """
+    Returns -log2(|table| / total), which is inf for the zero entries.
+    """
+    weights = numpy.full(table.shape, numpy.inf)
+    nonzero = table != 0
+    weights[nonzero] = -numpy.log2(numpy.abs(table[nonzero]) / total)
+    weights.setflags(write=False)
+    return weights
+
+
+def getDifferentialWeights(sbox, output_bits=None):
+    """
+    Returns the weight -log2(DDT[a][b] / 2^n) of each transition.
+    """
+    return getWeights(getDDT(sbox, output_bits), len(sbox))
+
+
+def getLinearWeights(sbox, output_bits=None):
+    """
+    Returns the correlation weight -log2(|LAT[a][b]| / 2^(n-1)) of each
+    approximation.
+    """
+    return getWeights(getLAT(sbox, output_bits), len(sbox) // 2)
@@ -5,20 +5,58 @@ Provides functions for constructing the input file for STP.
 @author: stefan
 '''
 
-import itertools
+from parser import cardinality, sboxcnf
 
-def blockCharacteristic(stpfile, characteristic, wordsize):
+import contextlib
+
+# Encoding of the weight in setupWeightComputation, either the sum of the
+# bits with BVPLUS or one of the cardinality networks in
+# cardinality.WEIGHT_ENCODINGS, which count up to WEIGHT_LIMIT if the
+# weight is not fixed in the model
+WEIGHT_ENCODING = "bvplus"
+WEIGHT_LIMIT = 1000
+
+
+def setWeightEncoding(encoding, limit):
     """
-    Excludes this characteristic from being found.
+    Selects the encoding of the weight for all following models.
+    """
+    global WEIGHT_ENCODING, WEIGHT_LIMIT
+    WEIGHT_ENCODING = encoding
+    WEIGHT_LIMIT = limit
+    return
+
+
+def openModel(stp_output):
+    """
+    Returns a context manager for writing a model. The output is either the
+    name of a file or a text stream, e.g. an io.StringIO or the stdin of a
+    solver, which is not closed afterwards.
+    """
+    if hasattr(stp_output, "write"):
+        return contextlib.nullcontext(stp_output)
+    return open(stp_output, 'w')
+
+
+def getBlockedWords(characteristic):
+    """
+    Returns the words of the characteristic which are used to exclude it.
     """
     # Only add state words (x, y, s)
     # TODO: extend for other ciphers
-    filtered_words = {var_name: var_value for var_name, var_value in
-                      characteristic.characteristic_data.items()
-                      if var_name.startswith('x') or
-                      var_name.startswith('y') or
-                      var_name.startswith('s') or
-                      var_name.startswith('v')}
+    return {var_name: var_value for var_name, var_value in
+            characteristic.characteristic_data.items()
+            if var_name.startswith('x') or
+            var_name.startswith('y') or
+            var_name.startswith('s') or
+            var_name.startswith('v')}
+
+
+def blockCharacteristic(stpfile, characteristic, wordsize):
+    """
+    Excludes this characteristic from being found.
+    """
+    filtered_words = getBlockedWords(characteristic)
 
     blockingStatement = "ASSERT(NOT("
 
@@ -31,6 +69,16 @@ def blockCharacteristic(stpfile, characteristic, wordsize):
     return
 
 
+def getBlockingString(characteristic):
+    """
+    Returns the assertion which excludes this characteristic. Unlike
+    blockCharacteristic it does not depend on the size of the words.
+    """
+    equalities = ["{} = {}".format(key, value) for key, value in
+                  sorted(getBlockedWords(characteristic).items())]
+    return "ASSERT(NOT({}));".format(" AND ".join(equalities))
+
+
 def setupQuery(stpfile):
     """
     Adds the query and printing of counterexample to the stp stpfile.
@@ -95,12 +143,14 @@ def limitWeight(stpfile, weight, p, wordsize, ignoreMSBs=0):
     """
     stpfile.write("limitWeight: BITVECTOR(16);\n")
     stpfile.write(getWeightString(p, wordsize, ignoreMSBs, "limitWeight") + "\n")
-    stpfile.write("ASSERT(BVLE(limitWeight, {0:#018b}));\n".format(weight))
+    if weight is not None:
+        stpfile.write("ASSERT(BVLE(limitWeight, {0:#018b}));\n".format(weight))
     return
 
 def setupWeightComputationSum(stpfile, weight, p, wordsize, ignoreMSBs=0):
     """
-    Assert that weight is equal to the sum of p.
+    Assert that weight is equal to the sum of p. If weight is None the
+    weight is left unconstrained.
     """
     stpfile.write("weight: BITVECTOR(16);\n")
     round_sum = ""
@@ -111,20 +161,90 @@ def setupWeightComputationSum(stpfile, weight, p, wordsize, ignoreMSBs=0):
     else:
         stpfile.write("ASSERT(weight = {});\n".format(round_sum[:-1]))
 
-    stpfile.write("ASSERT(weight = {0:#018b});\n".format(weight))
+    if weight is not None:
+        stpfile.write("ASSERT(weight = {0:#018b});\n".format(weight))
     return
 
 def setupWeightComputation(stpfile, weight, p, wordsize, ignoreMSBs=0):
     """
     Assert that weight is equal to the sum of the hamming weight of p.
+    If weight is None the weight is left unconstrained.
     """
+    if WEIGHT_ENCODING != "bvplus":
+        setupWeightCardinality(stpfile, weight, p, wordsize, ignoreMSBs)
+        return
+
     stpfile.write("weight: BITVECTOR(16);\n")
     stpfile.write(getWeightString(p, wordsize, ignoreMSBs) + "\n")
-    stpfile.write("ASSERT(weight = {0:#018b});\n".format(weight))
+    if weight is not None:
+        stpfile.write("ASSERT(weight = {0:#018b});\n".format(weight))
     #stpfile.write("ASSERT(BVLE(weight, {0:#018b}));\n".format(weight))
     return
 
 
+def setupWeightCardinality(stpfile, weight, p, wordsize, ignoreMSBs=0):
+    """
+    Computes the hamming weight of p with a cardinality network, where
+    weightge[k:k] = 1 if the weight is at least k. The weight is fixed by
+    asserting weightge[weight:weight] = 1 and weightge[weight+1:weight+1] = 0,
+    and the 16-bit variable weight is only set for the output.
+    """
+    limit = WEIGHT_LIMIT if weight is None else weight
+    bits = ["{0}[{1}:{1}]".format(variable, bit) for variable in p
+            for bit in range(wordsize - ignoreMSBs)]
+
+    # Counts above the number of bits are impossible
+    count_limit = min(limit + 1, len(bits))
+    circuit = cardinality.Circuit()
+    weight_ge = cardinality.WEIGHT_ENCODINGS[WEIGHT_ENCODING](circuit, bits,
+                                                              count_limit)
+    stpfile.write(circuit.getCVC())
+
+    stpfile.write("weightge: BITVECTOR({});\n".format(limit + 2))
+    for k in range(count_limit + 1):
+        stpfile.write("ASSERT(weightge[{0}:{0}] = {1});\n".format(
+            k, weight_ge[k]))
+    if count_limit + 1 < limit + 2:
+        stpfile.write("ASSERT(weightge[{}:{}] = 0bin{});\n".format(
+            limit + 1, count_limit + 1, "0" * (limit - count_limit + 1)))
+
+    stpfile.write("weight: BITVECTOR(16);\n")
+    for k in range(count_limit):
+        stpfile.write("ASSERT((weightge[{0}:{0}] = 0bin1 AND "
+                      "weightge[{1}:{1}] = 0bin0) => weight = {2:#018b});\n".format(
+                          k, k + 1, k))
+    stpfile.write("ASSERT(weightge[{0}:{0}] = 0bin1 => weight = {0:#018b});\n".format(
+        count_limit))
+
+    if weight is not None:
+        stpfile.write("ASSERT({});\n".format(getWeightCardinalityString(weight)))
+    return
+
+
+def getWeightAssertion(weight, bound=False, cardinality=False):
+    """
+    Returns the condition weight = w, or weight <= w if bound is set. If
+    the weight is counted by setupWeightCardinality the unary bits are
+    used instead.
+    """
+    if cardinality and weight <= WEIGHT_LIMIT:
+        return getWeightCardinalityString(weight, bound)
+    if bound:
+        return "BVLE(weight, {0:#018b})".format(weight)
+    return "weight = {0:#018b}".format(weight)
+
+
+def getWeightCardinalityString(weight, bound=False):
+    """
+    Returns the condition that the weight computed by setupWeightCardinality
+    is equal to weight, or at most weight if bound is set.
+    """
+    command = "weightge[{0}:{0}] = 0bin0".format(weight + 1)
+    if not bound:
+        command += " AND weightge[{0}:{0}] = 0bin1".format(weight)
+    return command
+
+
 def getWeightString(variables, wordsize, ignoreMSBs=0, weightVariable="weight"):
     """
     Asserts that the weight is equal to the hamming weight of the
@@ -135,15 +255,7 @@ def getWeightString(variables, wordsize, ignoreMSBs=0, weightVariable="weight"):
 
     command = "ASSERT(({} = BVPLUS(16,".format(weightVariable)
     for var in variables:
-        tmp = "0b00000000@(BVPLUS(8, "
-        for bit in range(wordsize - ignoreMSBs):
-            # Ignore MSBs if they do not contribute to
-            # probability of the characteristic.
-            tmp += "0bin0000000@({0}[{1}:{1}]),".format(var, bit)
-        # Pad the constraint if necessary
-        if (wordsize - ignoreMSBs) == 1:
-            tmp += "0bin0,"
-        command += tmp[:-1] + ")),"
+        command += getHammingWeightString(var, wordsize, ignoreMSBs) + ","
     if len(variables):
         command += "0bin0000000000000000,"
     command = command[:-1]
@@ -152,6 +264,21 @@ def getWeightString(variables, wordsize, ignoreMSBs=0, weightVariable="weight"):
     return command
 
 
+def getHammingWeightString(variable, wordsize, ignoreMSBs=0):
+    """
+    Returns a 16-bit expression for the hamming weight of the given variable.
+    """
+    command = "0b00000000@(BVPLUS(8, "
+    for bit in range(wordsize - ignoreMSBs):
+        # Ignore MSBs if they do not contribute to
+        # probability of the characteristic.
+        command += "0bin0000000@({0}[{1}:{1}]),".format(variable, bit)
+    # Pad the constraint if necessary
+    if (wordsize - ignoreMSBs) == 1:
+        command += "0bin0,"
+    return command[:-1] + "))"
+
+
 def getStringEq(a, b, c):
     command = "(BVXOR(~{0}, {1}) & BVXOR(~{0}, {2}))".format(a, b, c)
     return command
@@ -211,12 +338,23 @@ def add4bitSbox(sbox, variables):
     assert(len(sbox) == 16)
     assert(len(variables) == 12)
 
-    # First compute the DDT
-    DDT = [[0]*16 for i in range(16)]
+    # The minimized CNF is only computed once for each S-box
+    trails = [int("".join(str(bit) for bit in trail), 2)
+              for trail in get4bitSboxTrails(sbox)]
+    cnf = sboxcnf.getCVCString(sboxcnf.getTableCNF(trails, 12), variables)
 
-    for a in range(16):
-        for b in range(16):
-            DDT[a ^ b][sbox[a] ^ sbox[b]] += 1
+    return "ASSERT({} = 0bin1);\n".format(cnf)
+
+
+def get4bitSboxTrails(sbox):
+    """
+    Returns all valid differential transitions of the S-box as lists of
+    12 bits: the input difference, the output difference and the weight
+    bits w0, w1, w2, w3, where the probability is 2^-{hw(w0||w1||w2||w3)}.
+    """
+    # Imported here, as only the ciphers with S-boxes need NumPy
+    from parser import sboxtables
+    DDT = sboxtables.getDDT(sbox, 4)
 
     # Construct DNF of all valid trails
     trails = []
@@ -244,16 +382,4 @@ def add4bitSbox(sbox, variables):
                     tmp += [0, 0, 0, 0]
                 trails.append(tmp)
 
-    # Build CNF from invalid trails
-    cnf = ""
-    for prod in itertools.product([0, 1], repeat=len(trails[0])):
-        # Trail is not valid
-        if list(prod) not in trails:
-            expr = ["~" if x == 1 else "" for x in list(prod)]
-            clause = ""
-            for literal in range(12):
-                clause += "{0}{1} | ".format(expr[literal], variables[literal])
-
-            cnf += "({}) &".format(clause[:-2])
-
-    return "ASSERT({} = 0bin1);\n".format(cnf[:-2])
+    return trails